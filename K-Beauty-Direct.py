@@ -1,7 +1,17 @@
+import os
 import streamlit as st
 import pandas as pd
 import altair as alt
-from modules.recommender import initialize_recommender_system, fast_recommend
+from contextlib import nullcontext
+from modules.recommender import (
+    get_shared_recommender, fast_recommend, is_semantic_ready, load_country_names, country_display_name,
+    result_cache,
+)
+from modules.chart_specs import vega_lite_spec
+from modules.country_pages import detail_country_name
+from modules.instrumentation import record_stages
+from modules.legal_jobs import LEGAL_PREFETCH, get_legal_queue
+from modules.trade_store import ensure_snapshot, read_snapshot
 from modules.utils import inject_fonts
 
 inject_fonts() # 폰트 설정
@@ -46,29 +56,15 @@ st.markdown("""
             화장품 키워드를 입력해 보세요. (영문/한글 모두 검색 가능)
             """)
 
-country_names = {
-    'usa': '미국',
-    'uae': '아랍에미리트',
-    'vietnam': '베트남',
-    'brazil': '브라질',
-    'france': '프랑스',
-    'uk': '영국',
-    'india': '인도',
-    'japan': '일본',
-    'indonesia': '인도네시아',
-    'turkey': '튀르키예',
-    'thailand': '태국',
-    'china': '중국'
-}
-
-st.markdown("**추천 국가:** " + ", ".join(country_names.values()))
+# 추천 시스템 (모든 세션이 공유하는 읽기 전용 객체, 세션에는 복사본을 두지 않음)
+# 임베딩 모델은 백그라운드에서 로드되며, 그동안은 정확 일치 키워드만으로 추천
+with st.spinner('추천 시스템 초기화 중...'):
+    recommender_data = get_shared_recommender()
 
-# 추천 시스템 초기화 (세션 상태로 관리)
-if "recommender_data" not in st.session_state:
-    with st.spinner('추천 시스템 초기화 중...'):
-        st.session_state.recommender_data = initialize_recommender_system()
-
-recommender_data = st.session_state.recommender_data
+# 추천 대상 국가는 키워드 워크북의 시트에서 읽음 (표시 이름과 순서는 data/countries.json)
+country_order = {code: i for i, code in enumerate(load_country_names())}
+market_codes = sorted(recommender_data['countries'], key=lambda c: (country_order.get(c, len(country_order)), c))
+st.markdown("**추천 국가:** " + ", ".join(country_display_name(c) for c in market_codes))
 
 col1, col2 = st.columns([3, 1])
 
@@ -82,6 +78,10 @@ with col1:
 with col2:
     top_n = st.selectbox("추천 국가 수:", [3, 5], index=0)
 
+# 단계별 소요 시간 디버그 패널 (?debug=1 또는 KBD_DEBUG_PANEL=1일 때만 계측)
+debug_panel = st.query_params.get("debug") == "1" or os.environ.get("KBD_DEBUG_PANEL") == "1"
+stage_timings = None
+
 # 추천 실행
 if keywords_input:
     keywords = [kw.strip() for kw in keywords_input.split(',') if kw.strip()]
@@ -90,15 +90,28 @@ if keywords_input:
         with st.spinner('국가를 추천하는 중...'):
             try:
                 # fast_recommend 헬퍼 함수 사용 (더 빠른 추천)
-                recommendations = fast_recommend(
-                    recommender_data,
-                    keywords,
-                    top_n=top_n,
-                    return_scores=True
-                )
+                with (record_stages() if debug_panel else nullcontext()) as stage_timings:
+                    recommendations = fast_recommend(
+                        recommender_data,
+                        keywords,
+                        top_n=top_n,
+                        return_scores=True
+                    )
                 
                 recommendations = [(country, score) for country, score in recommendations if score > 0]
 
+                semantic = recommender_data['semantic']
+                if semantic.warming_up:
+                    st.caption("⏳ 유사 키워드(의미 기반) 매칭을 준비 중입니다. 지금은 정확히 일치하는 키워드만 반영됩니다.")
+                elif not is_semantic_ready(recommender_data):
+                    st.caption("⚠️ 임베딩 모델을 불러오지 못해 정확히 일치하는 키워드만 반영됩니다.")
+
+                if recommendations and LEGAL_PREFETCH:
+                    # 상세 화면에서 바로 볼 수 있도록 추천 국가의 법률 요약을 백그라운드에서 미리 요청
+                    # (국가 상세 분석 화면이 작업을 찾는 이름으로 요청, 화면이 지원하지 않는 국가는 제외)
+                    detail_names = [detail_country_name(country_display_name(country)) for country, _ in recommendations]
+                    get_legal_queue().prefetch([name for name in detail_names if name is not None])
+
                 if recommendations:
                     st.markdown(f"#### 🎯 '{', '.join(keywords)}' 키워드 기반 추천 국가")
                     
@@ -112,13 +125,17 @@ if keywords_input:
                             <div style="display: flex; justify-content: space-between; align-items: center; background-color: #f0f2f6; padding: 1rem; border-radius: 0.5rem; margin-bottom: 0.5rem;">
                                 <div>
                                     <div style="font-size: 0.875rem; color: #666;">#{i+1} {country.upper()} {score:.3f}</div>
-                                    <div style="font-size: 1.25rem; font-weight: 600;">{country_names[country]}</div>
+                                    <div style="font-size: 1.25rem; font-weight: 600;">{country_display_name(country)}</div>
                                 </div>
                             </div>
                             """, unsafe_allow_html=True)
 
-                            if st.button(f"📊 {country_names[country]} 상세 보기", key=f"detail_{country}_{i}", use_container_width=True):
-                                st.session_state.selected_country = country_names[country]
+                            # 국가 상세 분석 화면에 데이터가 있는 국가만 상세 보기 제공
+                            detail_name = detail_country_name(country_display_name(country))
+                            if detail_name is None:
+                                st.caption("국가 상세 분석 데이터가 아직 없는 시장입니다.")
+                            elif st.button(f"📊 {country_display_name(country)} 상세 보기", key=f"detail_{country}_{i}", use_container_width=True):
+                                st.session_state.selected_country = detail_name
                                 st.switch_page("pages/국가 상세 분석.py")
                 else:
                     st.warning("⚠️ 입력하신 키워드와 매칭되는 결과가 없습니다. 다른 키워드를 시도해보세요.")
@@ -128,10 +145,31 @@ if keywords_input:
     else:
         st.info("키워드를 입력해주세요.")
 
+if debug_panel:
+    with st.sidebar:
+        st.markdown("#### ⏱ 추천 단계별 소요 시간")
+        if stage_timings is not None:
+            st.dataframe(
+                pd.DataFrame(
+                    [(name, seconds * 1000) for name, seconds in stage_timings.totals().items()],
+                    columns=["단계", "ms"]
+                ),
+                hide_index=True,
+                column_config={"ms": st.column_config.NumberColumn(format="%.3f")}
+            )
+        else:
+            st.caption("키워드를 입력하면 이번 요청의 단계별 시간이 표시됩니다.")
+        semantic = recommender_data['semantic']
+        status = "준비 중" if semantic.warming_up else ("사용 가능" if semantic.ready else f"오류: {semantic.error}")
+        st.caption(f"임베딩 백엔드: {semantic.backend} ({status})")
+        cache_stats = result_cache.stats()
+        st.caption(f"결과 캐시: 적중 {cache_stats['hits']:,} / 실패 {cache_stats['misses']:,} "
+                   f"(적중률 {cache_stats['hit_rate']:.0%}, {cache_stats['size']:,}/{cache_stats['max_entries']:,}개)")
+
 # TF-IDF 캐시 관리 (개발/디버깅용)
 # if st.sidebar.button("🔄 TF-IDF 캐시 재빌드", help="데이터가 변경되었을 때 사용"):
 #     with st.spinner('TF-IDF 캐시를 재빌드하는 중...'):
-#         st.session_state.recommender_data = initialize_recommender_system(force_rebuild=True)
+#         rebuild_tfidf_cache()  # 공유 추천 시스템도 함께 초기화됨
 #         st.sidebar.success("캐시가 재빌드되었습니다!")
 
 st.markdown("----")
@@ -141,23 +179,18 @@ st.markdown("----")
 # --------------------------------
 
 @st.cache_data
-def load_excel(file_path: str):
-    xls = pd.ExcelFile(file_path)
+def load_trade_3304(version: str):
+    # 원본 엑셀 대신 스냅샷(modules/trade_store.py)을 읽음, version은 원본이 바뀌면 캐시를 새로 만들기 위한 키
     data_list = []
-    for sheet in xls.sheet_names:
-        df = pd.read_excel(file_path, sheet_name=sheet)
+    for sheet, df in read_snapshot("trade_3304").items():
         df["국가"] = sheet  # 시트명이 곧 국가명
         data_list.append(df)
     return pd.concat(data_list, ignore_index=True)
 
-excel_file = "data/한국무역통계포털 3304 수출입.xlsx"  # 파일 경로 수정
-df = load_excel(excel_file)
-
-st.subheader("화장품 수출입 변화")
-col1, col2 = st.columns(2)
-
-with col1:
-    st.markdown("##### 수출 금액 변화")
+@st.cache_data(show_spinner=False)
+def trade_chart_specs(version: str):
+    # 수출/수입 금액 변화 차트의 Vega-Lite 스펙 (데이터 버전마다 한 번만 만들고 이후 실행은 캐시된 스펙을 그림)
+    df = load_trade_3304(version)
     export_chart = alt.Chart(df).mark_line(point=True).encode(
         x=alt.X("기간:N", axis=alt.Axis(labelAngle=-45)),
         y=alt.Y("수출 금액:Q", axis=alt.Axis(title="수출 금액 ($)")),
@@ -173,10 +206,6 @@ with col1:
         labelFont="JalnanGothic",
         titleFont="JalnanGothic"
     )
-    st.altair_chart(export_chart, use_container_width=True)
-
-with col2:
-    st.markdown("##### 수입 금액 변화")
     import_chart = alt.Chart(df[df["국가"] != "한국"]).mark_line(point=True).encode(
         x=alt.X("기간:N", axis=alt.Axis(labelAngle=-45)),
         y=alt.Y("수입 금액:Q", axis=alt.Axis(title="수입 금액 ($)")),
@@ -192,4 +221,17 @@ with col2:
         labelFont="JalnanGothic",
         titleFont="JalnanGothic"
     )
-    st.altair_chart(import_chart, use_container_width=True)
\ No newline at end of file
+    return vega_lite_spec(export_chart), vega_lite_spec(import_chart)
+
+export_spec, import_spec = trade_chart_specs(ensure_snapshot("trade_3304"))
+
+st.subheader("화장품 수출입 변화")
+col1, col2 = st.columns(2)
+
+with col1:
+    st.markdown("##### 수출 금액 변화")
+    st.vega_lite_chart(spec=export_spec, use_container_width=True)
+
+with col2:
+    st.markdown("##### 수입 금액 변화")
+    st.vega_lite_chart(spec=import_spec, use_container_width=True)
@@ -0,0 +1,113 @@
+import hashlib
+import os
+import numpy as np
+
+# ======================
+# 임베딩 근사 최근접 이웃(ANN) 인덱스
+# ======================
+# IVF(Inverted File) 방식: 정규화된 임베딩을 구면 k-means로 n_lists개 군집에 나누고,
+# 검색 시 쿼리와 가까운 군집 n_probe개에 속한 키워드만 정확히 비교합니다.
+# NumPy만 사용하며, 어휘가 수십만 개로 늘어도 검색 비용은 (n_lists + 후보 수)에 비례합니다.
+
+class IVFIndex:
+    """정규화된 임베딩 행렬용 IVF 근사 검색 인덱스"""
+
+    def __init__(self, centroids, list_ids, list_offsets, keywords_digest=''):
+        self.centroids = centroids          # (n_lists, dim) 정규화된 군집 중심
+        self.list_ids = list_ids            # 군집 순서로 정렬된 키워드 행 번호
+        self.list_offsets = list_offsets    # 군집 i의 행 번호 = list_ids[offsets[i]:offsets[i+1]]
+        self.keywords_digest = keywords_digest
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, matrix, n_lists=None, n_iter=10, sample_size=None, seed=0, keywords_digest=''):
+        """구면 k-means로 군집을 학습하고 전체 키워드를 군집에 배정합니다."""
+        matrix = np.asarray(matrix, dtype=np.float32)
+        n = len(matrix)
+        if n_lists is None:
+            n_lists = max(1, int(4 * np.sqrt(n)))
+        n_lists = min(n_lists, n)
+        rng = np.random.default_rng(seed)
+
+        # 학습은 표본으로 수행 (군집당 최대 256개)
+        sample_size = min(n, sample_size or 256 * n_lists)
+        sample = matrix[rng.choice(n, sample_size, replace=False)] if sample_size < n else matrix
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+
+        for _ in range(n_iter):
+            assign = _assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            sizes = np.bincount(assign, minlength=n_lists)
+            empty = sizes == 0
+            if empty.any():
+                # 빈 군집은 임의의 표본으로 다시 초기화
+                sums[empty] = sample[rng.choice(len(sample), empty.sum(), replace=False)]
+            centroids = _normalize(sums)
+
+        assign = _assign(matrix, centroids)
+        list_ids = np.argsort(assign, kind='stable').astype(np.int64)
+        list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=n_lists))]).astype(np.int64)
+        return cls(centroids, list_ids, list_offsets, keywords_digest)
+
+    def search(self, matrix, query, top_k=1, n_probe=8):
+        """쿼리와 가까운 군집 n_probe개 안에서 (행 번호, 유사도) top_k개를 찾습니다."""
+        query = np.asarray(query, dtype=np.float32).ravel()
+        n_probe = min(n_probe, self.n_lists)
+        centroid_sims = self.centroids @ query
+        probes = np.argpartition(-centroid_sims, n_probe - 1)[:n_probe] if n_probe < self.n_lists \
+            else np.arange(self.n_lists)
+
+        candidates = np.concatenate([
+            self.list_ids[self.list_offsets[p]:self.list_offsets[p + 1]] for p in probes
+        ])
+        if len(candidates) == 0:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+
+        sims = matrix[candidates] @ query
+        k = min(top_k, len(sims))
+        top = np.argpartition(-sims, k - 1)[:k] if k < len(sims) else np.arange(len(sims))
+        top = top[np.argsort(-sims[top])]
+        return candidates[top], sims[top]
+
+    def save(self, filepath):
+        """인덱스를 .npz로 저장합니다. (임시 파일 후 rename)"""
+        os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+        tmp_path = filepath + '.tmp.npz'
+        np.savez(tmp_path, centroids=self.centroids, list_ids=self.list_ids,
+                 list_offsets=self.list_offsets, keywords_digest=np.array(self.keywords_digest))
+        os.replace(tmp_path, filepath)
+
+    @classmethod
+    def load(cls, filepath):
+        if not os.path.exists(filepath):
+            return None
+        try:
+            with np.load(filepath) as data:
+                return cls(data['centroids'], data['list_ids'], data['list_offsets'],
+                           str(data['keywords_digest']))
+        except Exception as e:
+            print(f"ANN 인덱스 로드 실패: {e}")
+            return None
+
+def keywords_digest(keywords, dim):
+    """인덱스가 어떤 어휘/차원으로 만들어졌는지 식별하는 해시"""
+    h = hashlib.sha256()
+    h.update(str(dim).encode('utf-8'))
+    h.update('\x1f'.join(keywords).encode('utf-8'))
+    return h.hexdigest()
+
+def _assign(points, centroids, batch_size=8192):
+    """각 점을 코사인 유사도가 가장 높은 군집에 배정합니다."""
+    assign = np.empty(len(points), dtype=np.int64)
+    for start in range(0, len(points), batch_size):
+        assign[start:start + batch_size] = np.argmax(points[start:start + batch_size] @ centroids.T, axis=1)
+    return assign
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
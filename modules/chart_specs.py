@@ -0,0 +1,40 @@
+import hashlib
+import threading
+import altair as alt
+import pandas as pd
+import pyarrow as pa
+
+# ======================
+# 차트 스펙 캐시용 변환
+# ======================
+# st.altair_chart는 실행마다 Altair 객체 생성·검증 → Vega-Lite 변환 → 데이터 Arrow 직렬화를 반복합니다.
+# 페이지는 vega_lite_spec()으로 만든 스펙(dict)을 st.cache_data로 (데이터 버전, 선택값)마다 캐시하고
+# st.vega_lite_chart(spec=...)로 그립니다. 데이터는 이미 Arrow 바이트라서 다시 직렬화하지 않습니다.
+# (st.altair_chart와 같은 방식: 기본 테마 없이 변환, 데이터는 이름 붙은 Arrow 데이터셋 - pyarrow로 직접 직렬화)
+
+_altair_lock = threading.Lock()  # 테마·데이터 변환기 설정은 프로세스 전역
+
+def arrow_bytes(data):
+    """DataFrame → Arrow IPC 스트림 바이트 (st.altair_chart가 데이터셋에 쓰는 형식과 같음)"""
+    table = pa.Table.from_pandas(pd.DataFrame(data))
+    sink = pa.BufferOutputStream()
+    with pa.RecordBatchStreamWriter(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def _arrow_dataset(data, datasets):
+    data_bytes = arrow_bytes(data)
+    name = 'kbd-' + hashlib.md5(data_bytes).hexdigest()
+    datasets[name] = data_bytes
+    return {"name": name}
+
+alt.data_transformers.register('kbd_arrow_dataset', _arrow_dataset)
+
+def vega_lite_spec(chart):
+    """Altair 차트 → st.vega_lite_chart에 그대로 넘길 수 있는 Vega-Lite 스펙 (데이터는 Arrow 바이트)"""
+    datasets = {}
+    with _altair_lock:
+        with alt.theme.enable('none'), alt.data_transformers.enable('kbd_arrow_dataset', datasets=datasets):
+            spec = chart.to_dict()
+    spec['datasets'] = {**spec.get('datasets', {}), **datasets}
+    return spec
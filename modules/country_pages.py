@@ -0,0 +1,29 @@
+from modules.trade_store import load_tables
+
+# ======================
+# 국가 상세 분석 화면의 국가 목록
+# ======================
+# 국가 상세 분석 화면은 국가 정보.xlsx(KPI 시트)에 있는 국가만 보여줄 수 있으므로,
+# 화면의 선택 목록과 첫 화면의 '상세 보기' 버튼·법률 요약 미리 요청이 모두 이 목록을 기준으로 합니다.
+# 추천 시장(시트 이름)은 화면 표시 이름(data/countries.json)으로 찾고, 두 파일의 이름이 다르면 별칭으로 맞춥니다.
+
+# 국기 이미지·KOTRA 링크용 ISO 코드 (없으면 국기 없이 표시)
+COUNTRY_ISO_CODES = {
+    "미국": "US", "베트남": "VN", "브라질": "BR", "영국": "GB",
+    "인도": "IN", "인도네시아": "ID", "일본": "JP", "중국": "CN",
+    "태국": "TH", "튀르키예": "TR", "프랑스": "FR", "UAE": "AE"
+}
+
+# 추천 화면 표시 이름 → 국가 상세 분석 화면 이름 (다를 때만)
+COUNTRY_PAGE_ALIASES = {
+    "아랍에미리트": "UAE",
+}
+
+def detail_countries():
+    """국가 상세 분석 화면이 지원하는 국가 (KPI 시트 순서)"""
+    return list(dict.fromkeys(load_tables("country_info")["KPI"]["국가"].dropna().astype(str)))
+
+def detail_country_name(display_name):
+    """추천 국가의 표시 이름 → 국가 상세 분석 화면의 국가 이름. 화면이 지원하지 않는 국가면 None"""
+    name = COUNTRY_PAGE_ALIASES.get(display_name, display_name)
+    return name if name in detail_countries() else None
@@ -0,0 +1,78 @@
+import os
+import numpy as np
+
+# ======================
+# 임베딩 모델 백엔드 선택
+# ======================
+# - torch     : 원본 fp32 PyTorch SentenceTransformer (기준 모델)
+# - onnx-int8 : 같은 MiniLM 모델을 ONNX로 내보내 int8 동적 양자화한 CPU 전용 버전
+# 환경 변수 KBD_EMBEDDING_BACKEND로 선택하며, int8 모델은 기준 임베딩과의
+# 코사인 일치도가 평균 PARITY_THRESHOLD 또는 하위 PARITY_TAIL_PERCENTILE% PARITY_TAIL_THRESHOLD 미만이면 사용하지 않습니다.
+
+EMBEDDING_MODEL_NAME = os.environ.get('KBD_EMBEDDING_MODEL', "paraphrase-multilingual-MiniLM-L12-v2")
+EMBEDDING_BACKENDS = ('torch', 'onnx-int8')
+EMBEDDING_BACKEND = os.environ.get('KBD_EMBEDDING_BACKEND', 'torch')
+
+# 허브 모델 저장소에 포함된 양자화 파일 (AVX2 지원 x86 CPU 공통)
+# scripts/export_onnx_int8.py로 직접 내보낸 경우 해당 경로의 파일명을 지정
+ONNX_INT8_FILE = os.environ.get('KBD_ONNX_INT8_FILE', 'onnx/model_quint8_avx2.onnx')
+
+PARITY_THRESHOLD = float(os.environ.get('KBD_EMBEDDING_PARITY_THRESHOLD', '0.98'))  # 평균 코사인 일치도
+PARITY_TAIL_THRESHOLD = float(os.environ.get('KBD_EMBEDDING_PARITY_TAIL_THRESHOLD', '0.95'))  # 하위 꼬리 코사인 일치도
+PARITY_TAIL_PERCENTILE = 1  # 일부 키워드만 크게 어긋나는 경우를 잡기 위한 하위 백분위 (표본이 작으면 최솟값에 가까움)
+PARITY_SAMPLE_SIZE = 256
+
+class EmbeddingParityError(RuntimeError):
+    """양자화 모델의 임베딩이 기준 모델과 충분히 일치하지 않을 때 발생"""
+
+def load_model(backend=EMBEDDING_BACKEND, model_name=EMBEDDING_MODEL_NAME):
+    """선택한 백엔드로 SentenceTransformer를 로드합니다."""
+    # torch/onnxruntime을 끌어오는 무거운 import는 모델이 실제로 필요할 때만 수행
+    from sentence_transformers import SentenceTransformer
+
+    if backend == 'torch':
+        return SentenceTransformer(model_name)
+    if backend == 'onnx-int8':
+        return SentenceTransformer(
+            model_name,
+            backend='onnx',
+            model_kwargs={'file_name': ONNX_INT8_FILE, 'provider': 'CPUExecutionProvider'},
+        )
+    raise ValueError(f"지원하지 않는 임베딩 백엔드입니다: {backend} (가능: {', '.join(EMBEDDING_BACKENDS)})")
+
+def embedding_agreement(reference, candidate):
+    """두 임베딩 행렬의 행별 코사인 유사도"""
+    reference = np.asarray(reference, dtype=np.float32)
+    candidate = np.asarray(candidate, dtype=np.float32)
+    ref_norm = np.linalg.norm(reference, axis=1)
+    cand_norm = np.linalg.norm(candidate, axis=1)
+    denom = np.where((ref_norm == 0) | (cand_norm == 0), 1.0, ref_norm * cand_norm)
+    return np.einsum('ij,ij->i', reference, candidate) / denom
+
+def check_parity(model, texts, reference_embeddings, threshold=PARITY_THRESHOLD, tail_threshold=PARITY_TAIL_THRESHOLD):
+    """model의 임베딩이 기준 임베딩과 평균 코사인 threshold 이상,
+    하위 PARITY_TAIL_PERCENTILE% 코사인 tail_threshold 이상 일치하는지 검사합니다.
+
+    일치도 배열을 반환하며, 기준에 못 미치거나 검사할 표본이 없으면 EmbeddingParityError를 발생시킵니다.
+    """
+    texts = list(texts)
+    if not texts:
+        raise EmbeddingParityError("임베딩 일치도를 검사할 표본이 없습니다.")
+    candidate = model.encode(texts, batch_size=64)
+    sims = embedding_agreement(reference_embeddings, candidate)
+    tail = np.percentile(sims, PARITY_TAIL_PERCENTILE)
+    if sims.mean() < threshold or tail < tail_threshold:
+        raise EmbeddingParityError(
+            f"임베딩 일치도 부족: 평균 코사인 {sims.mean():.4f} (기준 {threshold:.4f}), "
+            f"하위 {PARITY_TAIL_PERCENTILE}% {tail:.4f} (기준 {tail_threshold:.4f}) "
+            f"(최소 {sims.min():.4f}, 표본 {len(texts)}개)"
+        )
+    return sims
+
+def sample_texts(keywords, size=PARITY_SAMPLE_SIZE, seed=0):
+    """일치도 검사에 쓸 키워드 표본 (재현 가능하도록 고정 시드)"""
+    keywords = list(keywords)
+    if len(keywords) <= size:
+        return keywords
+    rng = np.random.default_rng(seed)
+    return [keywords[i] for i in sorted(rng.choice(len(keywords), size, replace=False))]
@@ -0,0 +1,230 @@
+import io
+import json
+import os
+import pickle
+import tempfile
+import zlib
+from contextlib import contextmanager
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: 파일 잠금 없이 항상 임시 파일 + os.replace로 전체 재작성
+    fcntl = None
+
+# ======================
+# 키워드 임베딩 저장소
+# ======================
+# .npy 행렬(정규화된 float32/float16, 행 = 키워드) + 키워드 인덱스(JSON Lines)
+# - 로딩은 np.load(mmap_mode='r')로 복사 없이 수행 → 여러 프로세스가 같은 페이지 공유
+# - 새 키워드는 파일 끝에 행을 덧붙이고(fsync) 그다음 헤더의 shape만 제자리에서 갱신
+#   → 헤더가 가리키는 행은 항상 파일에 있으므로 도중에 읽거나 중단되어도 로딩이 실패하지 않음
+# - 쓰기는 배타적 파일 잠금(.lock), 읽기는 공유 잠금 아래에서 수행 → 여러 프로세스가 동시에 추가해도
+#   서로의 행을 지우거나 행렬과 인덱스가 어긋나지 않음
+# - 인덱스의 각 줄은 [키워드, 행 CRC32] → 로딩 시 표본 행을 대조해 다른 세대의 행렬과 짝지어졌으면
+#   잘라서 쓰지 않고 빈 저장소로 취급(전체 재계산)
+
+VERIFY_SAMPLE_ROWS = 8  # 로딩 시 CRC를 대조할 표본 행 수 (처음·끝 포함)
+
+class EmbeddingStore:
+    """키워드 임베딩 디스크 저장소 (mmap 로딩, 끝에 추가 또는 전체 재작성)"""
+
+    def __init__(self, prefix='./data/keyword_embeddings', dtype=np.float32):
+        self.matrix_path = f'{prefix}.npy'
+        self.index_path = f'{prefix}.keywords.jsonl'
+        self.legacy_path = f'{prefix}.pkl'
+        self.lock_path = f'{prefix}.lock'
+        self.dtype = np.dtype(dtype)
+
+    def exists(self):
+        return os.path.exists(self.matrix_path) and os.path.exists(self.index_path)
+
+    def load(self):
+        """(mmap 행렬, 키워드 목록)을 반환합니다. 저장소가 없으면 (None, [])"""
+        if not self.exists():
+            self._migrate_legacy()
+            if not self.exists():
+                return None, []
+
+        with self._locked(exclusive=False):
+            return self._load_unlocked()
+
+    def _load_unlocked(self):
+        keywords, checksums = self._read_index()
+        matrix = np.load(self.matrix_path, mmap_mode='r')
+        # 끝에 추가하다 중단되면 행렬에만 인덱스 밖의 행이 남음 → 인덱스 길이에 맞춤
+        n = min(len(keywords), matrix.shape[0])
+        if len(keywords) > matrix.shape[0] or not _rows_match(matrix, checksums, n):
+            # 인덱스가 더 길거나 행 CRC가 다르면 다른 세대의 행렬과 짝지어진 것 → 신뢰하지 않고 재계산
+            print(f"{self.index_path}와 {self.matrix_path}가 맞지 않아 임베딩을 다시 계산합니다.")
+            return None, []
+        return matrix[:n], keywords[:n]
+
+    def append(self, keywords, vectors):
+        """새 키워드 임베딩을 정규화하여 저장소 끝에 추가합니다."""
+        keywords = list(keywords)
+        if not keywords:
+            return
+        vectors = normalize_rows(np.asarray(vectors, dtype=np.float32)).astype(self.dtype)
+
+        with self._locked():
+            if not self.exists():
+                self._write_new(keywords, vectors)
+                return
+
+            matrix, existing = self._load_unlocked()
+            if matrix is None:
+                # 행렬과 인덱스가 맞지 않아 버린 저장소 → 새 행만으로 다시 작성
+                self._write_new(keywords, vectors)
+                return
+            with open(self.matrix_path, 'rb') as f:
+                shape, dtype, offset = _read_header(f)
+            n = shape[0]
+            header = _header_bytes((n + len(keywords), shape[1]), dtype)
+
+            if (fcntl is None or len(existing) != n or dtype != self.dtype
+                    or shape[1] != vectors.shape[1] or len(header) != offset):
+                # 잠금을 쓸 수 없거나, 중단된 기록으로 인덱스와 행렬 길이가 다르거나,
+                # 형식이 바뀌었거나 헤더 여유 공간이 부족한 경우에만 전체 재작성
+                merged = np.concatenate([np.asarray(matrix, dtype=self.dtype), vectors])
+                del matrix  # 열린 mmap이 있으면 Windows에서 os.replace가 실패
+                self._write_new(existing + keywords, merged)
+                return
+
+            # 데이터를 먼저 끝에 덧붙여 디스크에 기록한 뒤 헤더의 shape를 갱신
+            with open(self.matrix_path, 'r+b') as f:
+                f.truncate(offset + n * shape[1] * dtype.itemsize)  # 중단된 기록이 남긴 헤더 밖의 행 제거
+                f.seek(0, os.SEEK_END)
+                f.write(vectors.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+                f.seek(0)
+                f.write(header)
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.writelines(_index_lines(keywords, vectors))
+                f.flush()
+                os.fsync(f.fileno())
+
+    def rewrite(self, keywords, vectors):
+        """저장소 전체를 keywords 순서의 행렬로 교체합니다. (없어진 키워드 제거·어휘 순서 정렬)"""
+        vectors = normalize_rows(np.asarray(vectors, dtype=np.float32)).astype(self.dtype)
+        with self._locked():
+            self._write_new(list(keywords), vectors)
+
+    @contextmanager
+    def _locked(self, exclusive=True):
+        """저장소 파일 잠금 (쓰기 = 배타적, 읽기 = 공유). fcntl이 없으면 잠그지 않음"""
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(self.lock_path) or '.', exist_ok=True)
+        with open(self.lock_path, 'a') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _write_new(self, keywords, vectors):
+        """임시 파일에 쓴 뒤 행렬 → 인덱스 순서로 os.replace (잠금 아래에서 호출)
+
+        둘 사이에서 중단되면 새 행렬과 이전 인덱스가 남지만 행 CRC가 달라 로딩 시 감지됩니다.
+        """
+        dirname = os.path.dirname(self.matrix_path) or '.'
+        os.makedirs(dirname, exist_ok=True)
+        fd, tmp_matrix = tempfile.mkstemp(dir=dirname, prefix='.' + os.path.basename(self.matrix_path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(_header_bytes(vectors.shape, vectors.dtype))
+                f.write(np.ascontiguousarray(vectors).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_matrix, 0o644)
+            os.replace(tmp_matrix, self.matrix_path)
+        except BaseException:
+            if os.path.exists(tmp_matrix):
+                os.remove(tmp_matrix)
+            raise
+        self._rewrite_index(keywords, vectors)
+
+    def _rewrite_index(self, keywords, vectors):
+        tmp_index = f'{self.index_path}.{os.getpid()}.tmp'
+        with open(tmp_index, 'w', encoding='utf-8') as f:
+            f.writelines(_index_lines(keywords, vectors))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_index, self.index_path)
+
+    def _read_index(self):
+        """(키워드 목록, 행 CRC 목록)을 반환합니다. CRC가 없는 이전 형식의 줄은 None"""
+        keywords, checksums = [], []
+        with open(self.index_path, encoding='utf-8') as f:
+            for line in f:
+                if not line.endswith('\n'):
+                    break  # 기록 도중 중단된 마지막 줄은 무시
+                entry = json.loads(line)
+                if isinstance(entry, list):
+                    keywords.append(entry[0])
+                    checksums.append(entry[1])
+                else:
+                    keywords.append(entry)
+                    checksums.append(None)
+        return keywords, checksums
+
+    def _migrate_legacy(self):
+        """기존 keyword_embeddings.pkl(dict)이 있으면 새 형식으로 변환합니다."""
+        if not os.path.exists(self.legacy_path):
+            return
+        try:
+            with open(self.legacy_path, 'rb') as f:
+                legacy = pickle.load(f)
+        except Exception as e:
+            print(f"기존 임베딩 파일 로드 실패: {e}")
+            return
+        if legacy:
+            keywords = list(legacy.keys())
+            self.append(keywords, np.vstack([legacy[kw] for kw in keywords]))
+            print(f"{self.legacy_path}를 {self.matrix_path}로 변환했습니다.")
+
+def normalize_rows(matrix):
+    """행 단위 L2 정규화"""
+    matrix = np.array(matrix, dtype=np.float32, copy=True).reshape(len(matrix), -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+def _row_checksum(row):
+    return zlib.crc32(np.ascontiguousarray(row).tobytes())
+
+def _index_lines(keywords, vectors):
+    return (json.dumps([kw, _row_checksum(row)], ensure_ascii=False) + '\n'
+            for kw, row in zip(keywords, vectors))
+
+def _rows_match(matrix, checksums, n):
+    """처음·끝을 포함한 표본 행의 CRC를 인덱스와 대조 (mmap에서 몇 페이지만 읽음)"""
+    if n == 0:
+        return True
+    for i in np.unique(np.linspace(0, n - 1, VERIFY_SAMPLE_ROWS).astype(int)):
+        if checksums[i] is not None and _row_checksum(matrix[i]) != checksums[i]:
+            return False
+    return True
+
+def _header_bytes(shape, dtype):
+    buf = io.BytesIO()
+    np.lib.format.write_array_header_1_0(buf, {
+        'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)),
+        'fortran_order': False,
+        'shape': tuple(int(x) for x in shape),
+    })
+    return buf.getvalue()
+
+def _read_header(f):
+    version = np.lib.format.read_magic(f)
+    if version == (1, 0):
+        shape, _, dtype = np.lib.format.read_array_header_1_0(f)
+    else:
+        shape, _, dtype = np.lib.format.read_array_header_2_0(f)
+    return shape, np.dtype(dtype), f.tell()
@@ -0,0 +1,198 @@
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# ======================
+# 단계별 소요 시간 계측
+# ======================
+# 추천 파이프라인의 각 단계를 `with stage('이름'):`으로 감싸 두고,
+# 훅(callable(name, seconds))이 설치되어 있을 때만 시간을 잽니다.
+# - record_stages(hook): 현재 컨텍스트(요청/세션 코드 블록)에만 적용되는 훅 (ContextVar)
+# - install_global_hook(hook): 프로세스 전체에 적용되는 훅 (백그라운드 스레드 포함, Prometheus 내보내기용)
+# 훅이 하나도 없으면 stage()는 전역 변수 하나만 확인하고 공유 no-op 객체를 반환합니다.
+
+_context_hook = ContextVar('kbd_stage_hook', default=None)
+_global_hook = None
+_active_hooks = 0  # 설치된 훅 수 (0이면 ContextVar 조회도 생략)
+_active_lock = threading.Lock()
+
+class _NoopStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NOOP = _NoopStage()
+
+def _track(delta):
+    global _active_hooks
+    with _active_lock:
+        _active_hooks += delta
+
+class _StageTimer:
+    __slots__ = ('name', 'hooks', 'start')
+
+    def __init__(self, name, hooks):
+        self.name = name
+        self.hooks = hooks
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        for hook in self.hooks:
+            hook(self.name, elapsed)
+        return False
+
+def stage(name):
+    """단계 하나를 계측하는 컨텍스트 매니저 (훅이 없으면 아무 일도 하지 않음)"""
+    if not _active_hooks:
+        return _NOOP
+    hook = _context_hook.get()
+    if hook is None:
+        if _global_hook is None:
+            return _NOOP
+        return _StageTimer(name, (_global_hook,))
+    if _global_hook is None:
+        return _StageTimer(name, (hook,))
+    return _StageTimer(name, (hook, _global_hook))
+
+@contextmanager
+def record_stages(hook=None):
+    """블록 안에서 실행된 단계의 소요 시간을 hook으로 받습니다. hook을 생략하면 StageTimings를 만들어 반환"""
+    hook = hook if hook is not None else StageTimings()
+    token = _context_hook.set(hook)
+    _track(1)
+    try:
+        yield hook
+    finally:
+        _track(-1)
+        _context_hook.reset(token)
+
+def install_global_hook(hook):
+    """프로세스 전체 훅을 설치합니다. None이면 해제"""
+    global _global_hook
+    if (_global_hook is None) != (hook is None):
+        _track(1 if hook is not None else -1)
+    _global_hook = hook
+
+class StageTimings:
+    """한 번의 요청에서 실행된 단계들의 (이름, 초) 기록"""
+
+    def __init__(self):
+        self.records = []
+
+    def __call__(self, name, seconds):
+        self.records.append((name, seconds))
+
+    def totals(self):
+        """단계 이름별 합계(초), 처음 실행된 순서"""
+        totals = {}
+        for name, seconds in self.records:
+            totals[name] = totals.get(name, 0.0) + seconds
+        return totals
+
+# Prometheus 히스토그램 구간 (초)
+STAGE_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+class StageMetrics:
+    """단계별 누적 횟수·합계·히스토그램 (여러 스레드에서 호출 가능)"""
+
+    def __init__(self, buckets=STAGE_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._count = defaultdict(int)
+        self._sum = defaultdict(float)
+        self._bucket_counts = defaultdict(lambda: [0] * len(self.buckets))
+
+    def __call__(self, name, seconds):
+        with self._lock:
+            self._count[name] += 1
+            self._sum[name] += seconds
+            counts = self._bucket_counts[name]
+            for i, upper in enumerate(self.buckets):
+                if seconds <= upper:
+                    counts[i] += 1
+
+    def to_prometheus(self, metric='kbd_stage_seconds'):
+        """Prometheus 텍스트 형식 (node_exporter textfile collector에서 읽을 수 있음)"""
+        lines = [
+            f"# HELP {metric} Time spent in K-Beauty Direct recommender stages.",
+            f"# TYPE {metric} histogram",
+        ]
+        with self._lock:
+            for name in sorted(self._count):
+                label = name.replace('\\', '\\\\').replace('"', '\\"')
+                for upper, count in zip(self.buckets, self._bucket_counts[name]):
+                    lines.append(f'{metric}_bucket{{stage="{label}",le="{upper}"}} {count}')
+                lines.append(f'{metric}_bucket{{stage="{label}",le="+Inf"}} {self._count[name]}')
+                lines.append(f'{metric}_sum{{stage="{label}"}} {self._sum[name]:.9f}')
+                lines.append(f'{metric}_count{{stage="{label}"}} {self._count[name]}')
+        return '\n'.join(lines) + '\n'
+
+_collectors = []  # to_prometheus()로 메트릭 파일에 함께 쓸 객체 (예: 추천 결과 캐시 카운터)
+
+def register_collector(collector):
+    """Prometheus 파일에 함께 쓸 객체(to_prometheus() 메서드)를 등록합니다."""
+    if collector not in _collectors:
+        _collectors.append(collector)
+
+def write_prometheus(metrics, path):
+    """메트릭을 파일로 씁니다. (임시 파일 후 rename, 수집기가 쓰다 만 파일을 읽지 않도록)"""
+    dirname = os.path.dirname(path) or '.'
+    os.makedirs(dirname, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=dirname, prefix='.' + os.path.basename(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(metrics.to_prometheus())
+            for collector in _collectors:
+                f.write(collector.to_prometheus())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+METRICS_FILE_ENV = 'KBD_METRICS_FILE'
+METRICS_INTERVAL = 15.0  # 파일을 다시 쓰는 주기 (초)
+
+_exporter_lock = threading.Lock()
+_exporter_metrics = None
+
+def start_prometheus_exporter(path, interval=METRICS_INTERVAL):
+    """전역 훅으로 StageMetrics를 설치하고, interval마다 path에 Prometheus 텍스트를 씁니다. (프로세스당 한 번)"""
+    global _exporter_metrics
+    with _exporter_lock:
+        if _exporter_metrics is not None:
+            return _exporter_metrics
+        metrics = StageMetrics()
+        install_global_hook(metrics)
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    write_prometheus(metrics, path)
+                except OSError as e:
+                    print(f"메트릭 파일 쓰기 실패: {e}")
+
+        threading.Thread(target=run, name='metrics-exporter', daemon=True).start()
+        _exporter_metrics = metrics
+        return metrics
+
+def exporter_from_env():
+    """환경 변수 KBD_METRICS_FILE이 있으면 내보내기를 시작합니다. 없으면 None"""
+    path = os.environ.get(METRICS_FILE_ENV)
+    if not path:
+        return None
+    return start_prometheus_exporter(path)
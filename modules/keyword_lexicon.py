@@ -0,0 +1,158 @@
+import json
+import os
+import sys
+import unicodedata
+import numpy as np
+
+# ======================
+# 어휘 기반(lexical) 키워드 매칭
+# ======================
+# 임베딩 모델을 부르기 전에 문자열만으로 해결되는 입력을 처리합니다.
+#   1) 어휘 정확 일치, 그다음 별칭 파일(data/keyword_aliases.json) → 정규화된 별칭 사전 (어휘 키워드는 별칭으로 바꾸지 않음)
+#   2) 공백·하이픈을 뺀 형태 비교 ("클린 뷰티" → "클린뷰티", "anti-aging" → "antiaging")
+#   3) 문자 trigram 역색인으로 후보를 좁힌 뒤 편집 거리로 오타 보정 ("vegn" → "vegan", "클랜징" → "클렌징")
+# 한글은 자모로 분해해 비교하므로 글자 하나의 받침·모음 오타도 편집 거리 1로 잡힙니다.
+
+KEYWORD_ALIASES_PATH = './data/keyword_aliases.json'
+TRIGRAM_MIN_SIMILARITY = 0.3  # 후보로 삼을 trigram Jaccard 유사도 하한
+TRIGRAM_MAX_CANDIDATES = 5    # 편집 거리를 계산할 후보 수
+TRIGRAM_MIN_LENGTH = 4        # 이보다 짧은 입력(자모 기준)은 오타 보정하지 않음
+
+def canonical_form(text):
+    """NFKC 정규화, 소문자, 앞뒤/연속 공백 정리"""
+    return ' '.join(unicodedata.normalize('NFKC', str(text)).lower().split())
+
+def compact_form(text):
+    """공백·하이픈·밑줄·점을 모두 뺀 형태 (띄어쓰기 변형 비교용)"""
+    text = canonical_form(text)
+    for ch in ' -_.·':
+        text = text.replace(ch, '')
+    return text
+
+def load_keyword_aliases(path=KEYWORD_ALIASES_PATH):
+    """별칭 파일({대표 키워드: [별칭, ...]})을 {정규화된 별칭: 대표 키워드} 사전으로 읽습니다."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        groups = json.load(f)
+    aliases = {}
+    for target, names in groups.items():
+        target = canonical_form(target)
+        for name in names:
+            aliases[canonical_form(name)] = target
+    return aliases
+
+def trigrams(text):
+    """패딩한 문자 trigram 집합 (한글은 자모 단위)"""
+    chars = unicodedata.normalize('NFD', text)
+    padded = f"  {chars} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def max_typo_distance(length):
+    """입력 길이(자모 기준)별 허용 편집 거리: 4~7자 1, 8~15자 2, ..."""
+    return 1 + length // 8
+
+def edit_distance(a, b, limit):
+    """인접 문자 바꿈을 포함한 편집 거리 (limit를 넘으면 limit + 1, 대각선 ±limit 띠만 계산)"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    over = limit + 1
+    prev2 = None
+    prev = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        cur = [over] * (len(b) + 1)
+        if i <= limit:
+            cur[0] = i
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            d = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (a[i - 1] != b[j - 1]))
+            if prev2 is not None and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                d = min(d, prev2[j - 2] + 1)
+            cur[j] = min(d, over)
+        if min(cur) > limit:
+            return over
+        prev2, prev = prev, cur
+    return prev[-1]
+
+class TrigramIndex:
+    """어휘 키워드의 문자 trigram 역색인 (trigram → 키워드 번호 배열)"""
+
+    def __init__(self, keywords):
+        self.keywords = list(keywords)
+        postings = {}
+        self.gram_counts = np.zeros(len(self.keywords), dtype=np.int32)
+        for i, kw in enumerate(self.keywords):
+            grams = trigrams(kw)
+            self.gram_counts[i] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def candidates(self, text, min_similarity=TRIGRAM_MIN_SIMILARITY, limit=TRIGRAM_MAX_CANDIDATES):
+        """trigram Jaccard 유사도가 높은 순서의 (키워드 번호, 유사도) 후보"""
+        grams = trigrams(text)
+        lists = [self.postings[g] for g in grams if g in self.postings]
+        if not lists:
+            return []
+
+        ids, overlap = np.unique(np.concatenate(lists), return_counts=True)
+        sims = overlap / (len(grams) + self.gram_counts[ids] - overlap)
+        keep = np.flatnonzero(sims >= min_similarity)
+        top = keep[np.argsort(-sims[keep], kind='stable')[:limit]]  # 동점이면 어휘 순서가 앞선 키워드
+        return [(int(ids[i]), float(sims[i])) for i in top]
+
+    def search(self, text):
+        """편집 거리 기준 이내의 가장 가까운 어휘 키워드. 없으면 None"""
+        query = unicodedata.normalize('NFD', text)
+        limit = max_typo_distance(len(query))
+        best, best_distance = None, limit + 1
+        for i, _ in self.candidates(text):
+            distance = edit_distance(query, unicodedata.normalize('NFD', self.keywords[i]), limit)
+            if distance < best_distance:
+                best, best_distance = self.keywords[i], distance
+                if distance <= 1:  # 더 가까운 후보는 없음 (0은 정확 일치 단계에서 처리됨)
+                    break
+        return best
+
+class KeywordLexicon:
+    """정확 일치 → 별칭 → 띄어쓰기 변형 → trigram 오타 보정 순서로 입력을 어휘 키워드에 매핑합니다."""
+
+    def __init__(self, keywords, aliases=None):
+        self.vocabulary = set(keywords)
+        # 어휘에 있는 키워드는 별칭보다 우선 → 어휘 키워드를 가리던 별칭은 처음부터 제외
+        self.aliases = {alias: target for alias, target in (aliases or {}).items() if alias not in self.vocabulary}
+        # 띄어쓰기 변형: 어휘 자체가 우선, 그다음 별칭
+        self.compact = {}
+        for alias, target in self.aliases.items():
+            self.compact.setdefault(compact_form(alias), target)
+        for kw in keywords:
+            self.compact[compact_form(kw)] = kw
+        self.trigram_index = TrigramIndex(keywords)
+
+    def resolve(self, text):
+        """(어휘 키워드, 단계)를 반환합니다. 어느 단계로도 찾지 못하면 (None, None)"""
+        kw = canonical_form(text)
+        if kw in self.vocabulary:
+            return kw, 'exact'
+        kw = self.aliases.get(kw, kw)
+        if kw in self.vocabulary:
+            return kw, 'alias'
+
+        compact = compact_form(kw)
+        target = self.compact.get(compact)
+        if target is not None and target in self.vocabulary:
+            return target, 'compact'
+
+        if len(unicodedata.normalize('NFD', compact)) >= TRIGRAM_MIN_LENGTH:
+            match = self.trigram_index.search(kw)
+            if match is not None:
+                return match, 'trigram'
+        return None, None
+
+    def nbytes(self):
+        """사전·역색인이 차지하는 대략적인 바이트 수"""
+        total = sum(sys.getsizeof(d) for d in (self.vocabulary, self.aliases, self.compact,
+                                                self.trigram_index.postings))
+        total += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in self.compact.items())
+        total += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in self.aliases.items())
+        total += sum(sys.getsizeof(g) + sys.getsizeof(ids) for g, ids in self.trigram_index.postings.items())
+        return total + self.trigram_index.gram_counts.nbytes
@@ -0,0 +1,103 @@
+import os
+import sqlite3
+import time
+
+# ======================
+# 법률 요약 영구 캐시 (SQLite)
+# ======================
+# 국가별 마지막 요약 결과를 디스크에 보관해 재시작·배포·여러 프로세스 사이에서 공유합니다.
+# - 만료 시각은 저장할 때 호출하는 쪽이 정함 (성공과 실패의 유효 시간을 따로 둠)
+# - 만료된 성공 결과도 지우지 않고 반환 → 호출하는 쪽이 바로 보여주고 백그라운드에서 갱신 (stale-while-revalidate)
+# - 갱신 임대(refresh_until): 여러 프로세스가 같은 국가를 동시에 갱신하지 않도록 한 곳만 갱신
+
+LEGAL_CACHE_PATH = os.environ.get('KBD_LEGAL_CACHE_PATH', './data/legal_cache.sqlite3')
+
+class LegalCacheEntry:
+    """캐시된 요약 한 건"""
+    __slots__ = ('country', 'result', 'ok', 'fetched_at', 'expires_at')
+
+    def __init__(self, country, result, ok, fetched_at, expires_at):
+        self.country = country
+        self.result = result
+        self.ok = bool(ok)
+        self.fetched_at = fetched_at
+        self.expires_at = expires_at
+
+class LegalSummaryCache:
+    """국가 → 마지막 요약 결과 SQLite 저장소 (스레드·프로세스 간 공유, 호출마다 연결)"""
+
+    def __init__(self, path=LEGAL_CACHE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")  # 읽기가 쓰기를 기다리지 않도록
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS legal_summaries ("
+                " country TEXT PRIMARY KEY,"
+                " result TEXT NOT NULL,"
+                " ok INTEGER NOT NULL,"
+                " fetched_at REAL NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " refresh_until REAL NOT NULL DEFAULT 0)"
+            )
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10, isolation_level=None)
+
+    def get(self, country):
+        """저장된 결과 (만료 여부와 관계없이). 없으면 None"""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT result, ok, fetched_at, expires_at FROM legal_summaries WHERE country = ?", (country,)
+            ).fetchone()
+        finally:
+            conn.close()
+        return LegalCacheEntry(country, *row) if row is not None else None
+
+    def put(self, country, result, ok, ttl, now=None):
+        """결과를 ttl초 동안 유효하게 저장합니다. 실패는 이전 성공 결과를 덮어쓰지 않고 다음 재시도 시각만 늦춥니다."""
+        now = time.time() if now is None else now
+        conn = self._connect()
+        try:
+            if ok:
+                conn.execute(
+                    "INSERT INTO legal_summaries (country, result, ok, fetched_at, expires_at, refresh_until)"
+                    " VALUES (?, ?, 1, ?, ?, 0)"
+                    " ON CONFLICT(country) DO UPDATE SET result = excluded.result, ok = 1,"
+                    " fetched_at = excluded.fetched_at, expires_at = excluded.expires_at, refresh_until = 0",
+                    (country, result, now, now + ttl)
+                )
+            else:
+                conn.execute(
+                    "INSERT INTO legal_summaries (country, result, ok, fetched_at, expires_at, refresh_until)"
+                    " VALUES (?, ?, 0, ?, ?, 0)"
+                    " ON CONFLICT(country) DO UPDATE SET"
+                    " result = CASE WHEN ok = 1 THEN result ELSE excluded.result END,"
+                    " fetched_at = CASE WHEN ok = 1 THEN fetched_at ELSE excluded.fetched_at END,"
+                    " expires_at = excluded.expires_at, refresh_until = 0",
+                    (country, result, now, now + ttl)
+                )
+        finally:
+            conn.close()
+        return self.get(country)
+
+    def claim_refresh(self, country, lease, now=None):
+        """만료된 결과의 갱신 권한을 lease초 동안 가져옵니다. 다른 프로세스가 갱신 중이면 False"""
+        now = time.time() if now is None else now
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "UPDATE legal_summaries SET refresh_until = ?"
+                " WHERE country = ? AND refresh_until < ?",
+                (now + lease, country, now)
+            )
+            if cursor.rowcount == 1:
+                return True
+            # 저장된 결과가 없으면(저장 실패 등) 임대할 대상이 없으므로 갱신 허용
+            return conn.execute("SELECT 1 FROM legal_summaries WHERE country = ?", (country,)).fetchone() is None
+        finally:
+            conn.close()
@@ -0,0 +1,259 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from modules.legal_cache import LEGAL_CACHE_PATH, LegalSummaryCache
+
+# ======================
+# 법률 정보 요약 백그라운드 작업
+# ======================
+# n8n 웹훅은 응답까지 수 분이 걸리므로 Streamlit 스크립트 스레드에서 기다리지 않고
+# 크기가 제한된 작업자 풀에서 실행합니다. 페이지는 작업 상태를 주기적으로 확인(polling)합니다.
+# - 같은 국가의 작업은 세션과 관계없이 하나만 실행
+# - 결과는 SQLite(modules/legal_cache.py)에 저장되어 재시작·여러 프로세스 사이에서 재사용
+#   성공은 LEGAL_SUCCESS_TTL, 실패(요청 오류·n8n의 success: false)는 LEGAL_FAILURE_TTL 동안 유효하며,
+#   만료된 성공 결과는 바로 보여주고 백그라운드에서 갱신 (stale-while-revalidate)
+# - HTTP 연결은 작업자들이 하나의 requests.Session(연결 풀)을 공유
+# - 로컬 테스트: scripts/legal_webhook_stub.py를 띄우고 KBD_LEGAL_WEBHOOK_URL을 그 주소로 지정
+
+LEGAL_WEBHOOK_URL = os.environ.get('KBD_LEGAL_WEBHOOK_URL', "https://threej.app.n8n.cloud/webhook/legal-info-webhook")
+LEGAL_TIMEOUT = float(os.environ.get('KBD_LEGAL_TIMEOUT', '300'))         # 요청 하나의 최대 대기 시간 (초)
+LEGAL_MAX_WORKERS = int(os.environ.get('KBD_LEGAL_WORKERS', '4'))         # 동시에 실행하는 웹훅 요청 수
+LEGAL_MAX_PENDING = int(os.environ.get('KBD_LEGAL_MAX_PENDING', '16'))    # 대기 + 실행 중인 작업 수 상한
+LEGAL_SUCCESS_TTL = float(os.environ.get('KBD_LEGAL_SUCCESS_TTL', str(24 * 3600)))  # 성공 결과 유효 시간 (초)
+LEGAL_FAILURE_TTL = float(os.environ.get('KBD_LEGAL_FAILURE_TTL', '300'))           # 실패 결과 유효 시간 (초)
+LEGAL_PREFETCH = os.environ.get('KBD_LEGAL_PREFETCH') == '1'              # 추천 상위 국가의 요약을 미리 요청
+LEGAL_POLL_INTERVAL = 2.0  # 페이지가 작업 상태를 확인하는 주기 (초)
+
+def make_session(pool_size=LEGAL_MAX_WORKERS):
+    """작업자들이 공유하는 연결 풀 세션 (POST는 재시도하지 않음)"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({"Content-Type": "application/json"})
+    return session
+
+def fetch_legal_info(session, country_name, webhook_url=LEGAL_WEBHOOK_URL, timeout=LEGAL_TIMEOUT):
+    """n8n 워크플로우를 호출하여 법률 정보를 가져옵니다. (성공 여부, 요약 또는 오류 문구)"""
+    payload = {"query": {"country": country_name}}
+    response = None
+    try:
+        response = session.post(webhook_url, json=payload, timeout=timeout)
+        response.raise_for_status()
+
+        if not response.text.strip():
+            return False, "오류: n8n에서 빈 응답을 받았습니다. 워크플로우를 확인해주세요."
+
+        data = response.json()
+
+        if data.get('success'):
+            summary = data.get('summary')
+            if not summary:
+                return False, "오류: 응답에 요약 정보가 없습니다."
+            return True, summary
+        else:
+            return False, data.get('message') or "선택한 국가의 법률 정보 데이터가 없습니다."
+
+    except requests.exceptions.Timeout:
+        return False, "오류: 요청 시간이 초과되었습니다. n8n 워크플로우 실행이 너무 오래 걸립니다."
+    except requests.exceptions.ConnectionError:
+        return False, f"오류: n8n 서버에 연결할 수 없습니다. URL: {webhook_url}"
+    except requests.exceptions.HTTPError as e:
+        return False, f"서버 오류: {e.response.status_code} 응답. n8n 워크플로우 에러를 확인하세요."
+    except json.JSONDecodeError:
+        return False, f"오류: n8n 응답을 파싱할 수 없습니다. 응답 내용: {response.text[:200]}"
+    except Exception as e:
+        return False, f"알 수 없는 오류가 발생했습니다: {str(e)}"
+
+class LegalJob:
+    """국가 하나의 법률 요약 작업 상태"""
+
+    def __init__(self, country, result=None, expires_at=None, ok=False):
+        self.country = country
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = self.submitted_at if result is not None else None
+        self.expires_at = expires_at if expires_at is not None else self.submitted_at
+        self.result = result
+        self.ok = ok  # 요약을 받았는지 (False면 result는 오류 문구)
+
+    @classmethod
+    def from_cache(cls, entry):
+        """영구 캐시에 저장된 결과로 끝난 작업을 만듭니다."""
+        job = cls(entry.country, entry.result, entry.expires_at, entry.ok)
+        job.submitted_at = job.finished_at = entry.fetched_at
+        return job
+
+    @property
+    def status(self):
+        """'queued' | 'running' | 'done' | 'failed'"""
+        if self.finished_at is None:
+            return 'running' if self.started_at is not None else 'queued'
+        return 'done' if self.ok else 'failed'
+
+    @property
+    def pending(self):
+        return self.finished_at is None
+
+    def expired(self, now=None):
+        return not self.pending and (time.time() if now is None else now) >= self.expires_at
+
+    def elapsed(self):
+        """요청 후 지난 시간 (끝났으면 걸린 시간, 초)"""
+        return (self.finished_at or time.time()) - self.submitted_at
+
+class LegalJobQueue:
+    """법률 요약 요청을 작업자 풀에서 실행하고 국가별 최신 작업을 보관합니다.
+
+    cache(LegalSummaryCache)가 있으면 결과를 디스크에 저장하고, 메모리에 없거나 만료된 국가는 디스크에서 다시 읽습니다.
+    """
+
+    def __init__(self, webhook_url=LEGAL_WEBHOOK_URL, max_workers=LEGAL_MAX_WORKERS,
+                 max_pending=LEGAL_MAX_PENDING, success_ttl=LEGAL_SUCCESS_TTL,
+                 failure_ttl=LEGAL_FAILURE_TTL, timeout=LEGAL_TIMEOUT, cache=None):
+        self.webhook_url = webhook_url
+        self.max_pending = max_pending
+        self.success_ttl = success_ttl
+        self.failure_ttl = failure_ttl
+        self.timeout = timeout
+        self.cache = cache
+        self.session = make_session(max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='legal-info')
+        self._jobs = {}
+        self._refreshing = {}  # 국가 → 만료된 결과를 대신할 갱신 작업
+        self._lock = threading.Lock()
+
+    def _run(self, job, refresh=False):
+        job.started_at = time.time()
+        ok, result = fetch_legal_info(self.session, job.country, self.webhook_url, self.timeout)
+        ttl = self.success_ttl if ok else self.failure_ttl
+        if self.cache is not None:
+            try:
+                self.cache.put(job.country, result, ok, ttl)
+            except sqlite3.Error as e:
+                print(f"법률 요약 캐시 저장 실패: {e}")
+        # 결과를 먼저 쓰고 끝난 시각을 기록 → pending이 False면 항상 결과가 있음
+        job.result = result
+        job.ok = ok
+        job.expires_at = time.time() + ttl
+        job.finished_at = time.time()
+
+        if refresh:
+            with self._lock:
+                self._refreshing.pop(job.country, None)
+                stale = self._jobs.get(job.country)
+                if ok or stale is None:
+                    self._jobs[job.country] = job
+                else:
+                    # 갱신이 실패하면 이전 성공 결과를 계속 보여주고 실패 유효 시간 뒤에 다시 갱신
+                    stale.expires_at = job.expires_at
+
+    def _load(self, country):
+        if self.cache is None:
+            return None
+        try:
+            entry = self.cache.get(country)
+        except sqlite3.Error as e:
+            print(f"법률 요약 캐시 읽기 실패: {e}")
+            return None
+        return LegalJob.from_cache(entry) if entry is not None else None
+
+    def _refresh(self, country):
+        """만료된 성공 결과를 백그라운드에서 갱신합니다. (다른 프로세스가 갱신 중이면 건너뜀)"""
+        with self._lock:
+            if country in self._refreshing:
+                return
+            if self.cache is not None:
+                try:
+                    if not self.cache.claim_refresh(country, self.timeout + 60):
+                        return
+                except sqlite3.Error as e:
+                    print(f"법률 요약 캐시 갱신 임대 실패: {e}")
+            job = LegalJob(country)
+            self._refreshing[country] = job
+        self._executor.submit(self._run, job, True)
+
+    def refreshing(self, country):
+        """만료된 결과를 보여주면서 백그라운드에서 갱신 중이면 True"""
+        return country in self._refreshing
+
+    def get(self, country):
+        """국가의 최신 작업. 없거나 만료된 실패 결과뿐이면 None
+
+        만료된 성공 결과는 그대로 반환하고 백그라운드 갱신을 시작합니다. (stale-while-revalidate)
+        """
+        now = time.time()
+        with self._lock:
+            job = self._jobs.get(country)
+        if job is not None and not job.expired(now):
+            return job
+
+        # 메모리에 없거나 만료 → 다른 프로세스가 저장(갱신)했을 수 있으므로 디스크 확인
+        cached = self._load(country)
+        if cached is not None:
+            with self._lock:
+                current = self._jobs.get(country)
+                if current is None or current.expired(now):
+                    self._jobs[country] = cached
+                    job = cached
+                else:
+                    job = current
+        if job is None or not job.expired(now):
+            return job
+
+        if job.status == 'done':
+            self._refresh(country)
+            return job
+        return None
+
+    def submit(self, country, force=False):
+        """작업을 요청합니다. 실행 중이거나 보여줄 결과가 있으면 그 작업을 그대로 반환합니다.
+
+        force=True이면 끝난 결과를 무시하고 다시 요청합니다. (다시 시도)
+        대기 중인 작업이 max_pending개를 넘으면 오류 문구가 담긴 작업을 반환합니다.
+        """
+        if not force:
+            job = self.get(country)
+            if job is not None:
+                return job
+        with self._lock:
+            job = self._jobs.get(country)
+            if job is not None and job.pending:
+                return job
+            pending = sum(1 for j in self._jobs.values() if j.pending) + len(self._refreshing)
+            if pending >= self.max_pending:
+                return LegalJob(country, "오류: 요청이 많아 잠시 후 다시 시도해주세요.")
+            job = LegalJob(country)
+            self._jobs[country] = job
+        self._executor.submit(self._run, job)
+        return job
+
+    def prefetch(self, countries):
+        """여러 국가의 요약을 미리 요청합니다. (이미 있거나 실행 중인 국가는 건너뜀)"""
+        return [self.submit(country) for country in countries]
+
+    def stats(self):
+        """상태별 작업 수"""
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            if self._refreshing:
+                counts['refreshing'] = len(self._refreshing)
+            return counts
+
+@st.cache_resource(show_spinner=False)
+def get_legal_queue(webhook_url=LEGAL_WEBHOOK_URL, cache_path=LEGAL_CACHE_PATH):
+    """모든 세션이 공유하는 법률 요약 작업 큐 (프로세스당 하나)"""
+    try:
+        cache = LegalSummaryCache(cache_path)
+    except (sqlite3.Error, OSError) as e:
+        print(f"법률 요약 캐시를 사용할 수 없어 메모리에만 보관합니다: {e}")
+        cache = None
+    return LegalJobQueue(webhook_url, cache=cache)
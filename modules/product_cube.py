@@ -0,0 +1,136 @@
+import os
+import pickle
+import pandas as pd
+import streamlit as st
+from modules.trade_routes import build_routes
+from modules.trade_store import ensure_snapshot, read_snapshot, snapshot_path
+
+# ======================
+# 품목 상세 분석 집계 큐브
+# ======================
+# 품목 상세 분석 페이지가 매 실행마다 원본 시트에서 다시 계산하던 값을
+# (HS코드, 기준연월) 조합마다 미리 계산해 둡니다. 페이지 실행은 딕셔너리 조회만 합니다.
+# - 상위 10개국 표(순위 기준, 좌표 포함) / 그중 수출금액 TOP 5
+# - 품목별 월별 수출금액 합계 (천$)
+# - 최근 5개월 데이터가 모두 있는 국가 중 전월 대비 증감률 TOP 5 + 5개월 추이(스파크라인)
+# - 지도용 서울 → 전체 교역국 대권 경로 (modules/trade_routes.py, float32 열 배열)
+# 큐브는 화장품 수출입 스냅샷(modules/trade_store.py)과 같은 원본 해시를 가지며,
+# 원본이 바뀌면 다음 로딩 때 다시 만듭니다. (python -m scripts.ingest_trade_data에서 미리 생성)
+
+CUBE_SOURCE = 'cosmetic_trade'
+CUBE_FILE = 'product_cube.pkl'
+CUBE_SCHEMA_VERSION = 4
+COORDS_SHEET = 'lat-lon'
+GROWTH_WINDOW = 5  # 증감률 TOP 5를 고를 때 데이터가 모두 있어야 하는 최근 개월 수
+
+TOP10_COLUMNS = ["순위", "국가명", "수출금액 ($)", "수출 점유율", "수출 증감률", "수출금액 (천$)", "위도", "경도"]
+
+class ProductPeriod:
+    """(HS코드, 기준연월) 하나의 집계 결과 (읽기 전용으로 사용)"""
+    __slots__ = ('top10', 'top5', 'growth_top5', 'routes')
+
+    def __init__(self, top10, top5, growth_top5, routes):
+        self.top10 = top10              # 상위 10개국 (TOP10_COLUMNS)
+        self.top5 = top5                # 상위 10개국 중 수출금액 TOP 5 (국가명, 수출금액 (천$))
+        self.growth_top5 = growth_top5  # [(국가명, 증감률(%), 5개월 추이 DataFrame(기준연월, 증감률))]
+        self.routes = routes            # 전체 교역국 경로 (RouteSet)
+
+class ProductCube:
+    """HS코드별 월별 합계와 (HS코드, 기준연월)별 집계"""
+
+    def __init__(self, source_digest, totals, cells):
+        self.schema_version = CUBE_SCHEMA_VERSION
+        self.source_digest = source_digest
+        self.totals = totals  # HS코드 → DataFrame(기준연월, 수출금액 (천$))
+        self.cells = cells    # (HS코드, 기준연월 Timestamp) → ProductPeriod
+
+    def get(self, product_code, period):
+        """집계 결과. 데이터가 없는 조합이면 빈 결과"""
+        cell = self.cells.get((str(product_code), pd.Timestamp(period)))
+        if cell is None:
+            empty = pd.DataFrame(columns=TOP10_COLUMNS)
+            return ProductPeriod(empty, pd.DataFrame(columns=["국가명", "수출금액 (천$)"]), [], build_routes(empty))
+        return cell
+
+def build_product_periods(df, coords):
+    """품목 시트 하나의 기준연월별 집계 (페이지의 기존 계산과 같은 규칙)"""
+    df = df.copy()
+    df["기준연월"] = pd.to_datetime(df["조회기준"])
+    df["수출금액 (천$)"] = df["수출금액 ($)"] / 1000
+    df["증감률"] = df["수출 증감률"] * 100
+    df_sorted = df.sort_values("기준연월")
+
+    cells = {}
+    for period in sorted(df["기준연월"].unique()):
+        period = pd.Timestamp(period)
+        current = df[df["기준연월"] == period]
+        filtered = current.nsmallest(10, "순위")
+        top10 = pd.merge(filtered, coords, on="국가명", how="left")[TOP10_COLUMNS]
+
+        start = period - pd.DateOffset(months=GROWTH_WINDOW - 1)
+        df_recent = df_sorted[(df_sorted["기준연월"] >= start) & (df_sorted["기준연월"] <= period)]
+        counts = df_recent.groupby("국가명")["기준연월"].nunique()
+        df_recent_valid = df_recent[df_recent["국가명"].isin(counts[counts == GROWTH_WINDOW].index)]
+        df_selected = df_recent_valid[df_recent_valid["기준연월"] == period].dropna(subset=["증감률"])
+        growth_top5 = [
+            (row.국가명, float(row.증감률),
+             df_recent_valid.loc[df_recent_valid["국가명"] == row.국가명, ["기준연월", "증감률"]].reset_index(drop=True))
+            for row in df_selected.nlargest(5, "증감률").itertuples()
+        ]
+
+        cells[period] = ProductPeriod(
+            top10.reset_index(drop=True),
+            filtered.nlargest(5, "수출금액 (천$)")[["국가명", "수출금액 (천$)"]].reset_index(drop=True),
+            growth_top5,
+            build_routes(pd.merge(current, coords, on="국가명", how="left")),
+        )
+    totals = df.groupby("기준연월", as_index=False)["수출금액 (천$)"].sum()
+    return totals, cells
+
+def build_product_cube(tables, source_digest):
+    """화장품 수출입 스냅샷(시트 이름 → DataFrame)으로 큐브를 만듭니다. (HS코드 시트 = 숫자 이름)"""
+    coords = tables[COORDS_SHEET]
+    totals, cells = {}, {}
+    for sheet, df in tables.items():
+        if not sheet.isdigit():
+            continue
+        totals[sheet], periods = build_product_periods(df, coords)
+        cells.update({(sheet, period): cell for period, cell in periods.items()})
+    return ProductCube(source_digest, totals, cells)
+
+def _read_cube(path):
+    """저장된 큐브를 읽습니다. 읽을 수 없으면 None (→ 다시 만듦)"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except Exception as e:
+        # 손상된 파일뿐 아니라 다른 pandas/numpy 버전으로 저장된 큐브도
+        # ModuleNotFoundError·AttributeError·TypeError 등을 내므로 모두 오래된 큐브로 취급
+        print(f"제품 큐브 로드 실패, 다시 만듭니다: {e}")
+        return None
+
+def ensure_product_cube(force=False):
+    """최신 큐브를 보장합니다. (스냅샷 해시와 다르거나 없으면 다시 만들어 저장)"""
+    version = ensure_snapshot(CUBE_SOURCE)
+    path = snapshot_path(CUBE_SOURCE, CUBE_FILE)
+    cube = None if force else _read_cube(path)
+    if (cube is not None and getattr(cube, 'schema_version', None) == CUBE_SCHEMA_VERSION
+            and cube.source_digest == version):
+        return cube
+
+    cube = build_product_cube(read_snapshot(CUBE_SOURCE), version)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(cube, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)  # 다른 프로세스는 이전 또는 완성된 새 큐브만 봄
+    return cube
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _load_product_cube(version):
+    return ensure_product_cube()
+
+def load_product_cube():
+    """페이지용: 프로세스 전체가 공유하는 큐브 (읽기 전용, 원본이 바뀌면 새 버전으로 다시 읽음)"""
+    return _load_product_cube(ensure_snapshot(CUBE_SOURCE))
@@ -1,41 +1,141 @@
-import pandas as pd
 import numpy as np
-from sklearn.feature_extraction.text import TfidfTransformer
-from sklearn.metrics.pairwise import cosine_similarity
-from sentence_transformers import SentenceTransformer
+import scipy.sparse as sp
+import openpyxl
 import streamlit as st
 import pickle
 import os
+import hashlib
+import mmap
+import tempfile
+import sys
+import math
+import threading
+import json
+from collections import OrderedDict
+from types import MappingProxyType
 from functools import lru_cache
+from modules.ann_index import IVFIndex, keywords_digest
+from modules.embedding_store import EmbeddingStore, normalize_rows
+from modules.instrumentation import exporter_from_env, register_collector, stage
+from modules.keyword_lexicon import KeywordLexicon, canonical_form, load_keyword_aliases
+from modules.result_cache import ResultCache
+from modules.utils import file_digest
+from modules.embedding_backend import (
+    EMBEDDING_BACKEND, EmbeddingParityError, check_parity, load_model, sample_texts,
+)
 
 # ======================
 # (1) 데이터 로딩 - 캐시 적용
 # ======================
-@st.cache_data
-def load_cosmetic_data():
-    """엑셀 데이터를 로드하고 캐시합니다."""
-    country_dfs = {}
-    countries = ['usa', 'uae', 'vietnam', 'brazil', 'france', 'uk', 
-                'india', 'japan', 'indonesia', 'turkey', 'thailand', 'china']
+COSMETIC_DATA_PATH = './data/Cosmetic_trends_cleaned.xlsx'
+COUNTRY_CONFIG_PATH = './data/countries.json'  # {시트 이름(국가 코드): 화면 표시 이름}
+
+@lru_cache(maxsize=1)
+def load_country_names(config_path=COUNTRY_CONFIG_PATH):
+    """국가(시장) 코드 → 화면 표시 이름. 설정 파일이 없으면 빈 사전"""
+    if not os.path.exists(config_path):
+        return {}
+    with open(config_path, encoding='utf-8') as f:
+        return {str(code).strip().lower(): name for code, name in json.load(f).items()}
+
+def country_display_name(country):
+    """설정 파일에 없는 국가·지역은 코드를 대문자로 표시합니다."""
+    return load_country_names().get(country, country.upper())
+
+def detect_keyword_and_freq_cols(header, first_row):
+    """헤더와 첫 데이터 행으로 키워드 컬럼과 빈도 컬럼의 위치를 찾습니다."""
+    freq_col = None
+    for i, c in enumerate(header):
+        if 'freq' in str(c).lower() or 'frequency' in str(c).lower() or 'count' in str(c).lower():
+            freq_col = i
+            break
+    if freq_col is None and first_row is not None:
+        num_cols = [i for i, v in enumerate(first_row)
+                    if isinstance(v, (int, float)) and not isinstance(v, bool)]
+        if len(num_cols) > 0:
+            freq_col = num_cols[0]
     
-    for country in countries:
+    keyword_col = None
+    for i in range(len(header)):
+        if i != freq_col:
+            keyword_col = i
+            break
+    return keyword_col, freq_col
+
+def iter_cosmetic_rows(source_path=COSMETIC_DATA_PATH, countries=None):
+    """워크북을 한 번만 열어 모든 시트의 (국가, 키워드, 빈도)를 스트리밍합니다.
+
+    countries가 None이면 워크북의 모든 시트를 국가(시장)로 사용합니다.
+    """
+    wb = openpyxl.load_workbook(source_path, read_only=True, data_only=True)
+    try:
+        for country in (wb.sheetnames if countries is None else countries):
+            if country not in wb.sheetnames:
+                st.warning(f"국가 {country} 데이터 로드 실패: 시트가 없습니다.")
+                continue
+            ws = wb[country]
+            ws.reset_dimensions()  # 잘못 기록된 시트 크기 정보 무시
+            rows = ws.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                continue
+            first_row = next(rows, None)
+            kw_idx, f_idx = detect_keyword_and_freq_cols(header, first_row)
+            if kw_idx is None or f_idx is None:
+                continue
+
+            # 읽기 전용 모드는 뒤쪽 빈 셀을 생략한 짧은 행을 반환하므로 첫 데이터 행도 길이를 확인
+            min_len = max(kw_idx, f_idx) + 1
+            for row in ([first_row] if first_row is not None else []):
+                if len(row) >= min_len:
+                    yield country, row[kw_idx], row[f_idx]
+            for row in rows:
+                if len(row) >= min_len:
+                    yield country, row[kw_idx], row[f_idx]
+    finally:
+        wb.close()
+
+def load_cosmetic_data(source_path=COSMETIC_DATA_PATH):
+    """엑셀 데이터를 한 번의 스트리밍으로 로드합니다. (캐시 재빌드 시에만 호출)
+
+    국가 목록은 워크북의 시트 이름에서 찾으며(시트 = 국가/지역), 국가별로 정제된 (keywords, freqs) 배열을 반환합니다.
+    """
+    raw = {}
+    for country, kw, freq in iter_cosmetic_rows(source_path):
+        if kw is None or (isinstance(kw, float) and np.isnan(kw)):
+            continue
         try:
-            df = pd.read_excel('./data/Cosmetic_trends_cleaned.xlsx', sheet_name=country)
-            country_dfs[country] = df
-        except Exception as e:
-            st.warning(f"국가 {country} 데이터 로드 실패: {e}")
+            f = round(float(freq))
+        except (TypeError, ValueError, OverflowError):
             continue
-    
-    return country_dfs
+        if f <= 0:
+            continue
+        keywords, freqs = raw.setdefault(str(country).strip().lower(), ([], []))
+        keywords.append(str(kw).strip().lower())
+        freqs.append(f)
+
+    return {country: (np.array(keywords, dtype=object), np.array(freqs, dtype=float))
+            for country, (keywords, freqs) in raw.items()}
 
 # ======================
 # (2) 캐시 파일 관리
 # ======================
 def save_data(data, filepath):
-    """데이터를 파일로 저장합니다."""
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    with open(filepath, 'wb') as f:
-        pickle.dump(data, f)
+    """데이터를 파일로 저장합니다. (임시 파일에 쓴 뒤 rename하는 원자적 쓰기)"""
+    dirname = os.path.dirname(filepath) or '.'
+    os.makedirs(dirname, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=dirname, prefix='.' + os.path.basename(filepath), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)  # mkstemp의 기본 권한(0600) 대신 일반 파일 권한
+        os.replace(tmp_path, filepath)  # 다른 프로세스는 이전 파일 또는 완성된 새 파일만 보게 됨
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
     print(f"데이터가 {filepath}에 저장되었습니다.")
 
 def load_data(filepath):
@@ -49,170 +149,492 @@ def load_data(filepath):
             return None
     return None
 
+def data_version(idf, tfidf_matrix, countries, keywords):
+    """추천 결과를 좌우하는 데이터(국가·어휘·IDF·TF-IDF 행렬)의 지문 (결과 캐시 무효화용)"""
+    h = hashlib.sha256()
+    h.update(vocabulary_digest(countries).encode('ascii'))
+    h.update(vocabulary_digest(keywords).encode('ascii'))
+    for arr in (idf, tfidf_matrix.data, tfidf_matrix.indices, tfidf_matrix.indptr):
+        h.update(np.ascontiguousarray(arr).tobytes())
+    return h.hexdigest()
+
+def vocabulary_digest(keywords):
+    """키워드 어휘(순서 포함)의 해시를 계산합니다."""
+    return hashlib.sha256('\x1f'.join(keywords).encode('utf-8')).hexdigest()
+
+def sheet_digest(keywords, freqs):
+    """한 국가 시트 내용의 해시를 계산합니다. (시트별 증분 재빌드용)"""
+    h = hashlib.sha256()
+    h.update('\x1f'.join(keywords).encode('utf-8'))
+    h.update(np.ascontiguousarray(freqs, dtype=float).tobytes())
+    return h.hexdigest()
+
 # ======================
 # (3) TF-IDF 전처리
 # ======================
-@st.cache_data
-def prepare_tfidf_data(country_dfs, force_rebuild=False):
-    """TF-IDF 행렬과 관련 데이터를 전처리하고 캐시합니다."""
-    cache_file = './data/tfidf_data.pkl'
-    
-    # 캐시된 파일이 있고 강제 재빌드가 아니면 로드
-    if not force_rebuild:
-        cached_data = load_data(cache_file)
-        if cached_data is not None:
-            return cached_data['tfidf_transformer'], cached_data['tfidf_matrix'], cached_data['counts_df']
-    
-    def detect_keyword_and_freq_cols(df):
-        freq_col = None
-        for c in df.columns:
-            if 'freq' in str(c).lower() or 'frequency' in str(c).lower() or 'count' in str(c).lower():
-                freq_col = c
-                break
-        if freq_col is None:
-            num_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-            if len(num_cols) > 0:
-                freq_col = num_cols[0]
-        
-        keyword_col = None
-        for c in df.columns:
-            if c != freq_col:
-                keyword_col = c
-                break
-        return keyword_col, freq_col
-
-    # 국가별 키워드-빈도 dict 생성
-    country_keyword_counts = {}
-    for cname, df in country_dfs.items():
-        kw_col, f_col = detect_keyword_and_freq_cols(df)
-        tmp = {}
-        for _, row in df.iterrows():
-            kw = row[kw_col]
-            freq = row[f_col]
-            if pd.isna(kw):
-                continue
-            kw = str(kw).strip().lower()
-            try:
-                f = int(round(float(freq)))
-            except:
-                continue
-            if f <= 0:
-                continue
-            tmp[kw] = tmp.get(kw, 0) + f
-        country_keyword_counts[cname] = tmp
+def sheet_keyword_counts(keywords, freqs):
+    """한 국가 시트의 키워드별 빈도 합계를 계산합니다. (정렬된 keywords, counts) 배열 반환"""
+    if len(keywords) == 0:
+        return np.array([], dtype=object), np.array([], dtype=float)
+    # 같은 키워드의 빈도는 unique + bincount로 합산
+    unique_keywords, inverse = np.unique(np.asarray(keywords, dtype=str), return_inverse=True)
+    counts = np.bincount(inverse.ravel(), weights=freqs, minlength=len(unique_keywords))
+    return unique_keywords.astype(object), counts
 
-    # 국가 × 키워드 행렬 생성
-    all_keywords = sorted({kw for d in country_keyword_counts.values() for kw in d.keys()})
-    counts_df = pd.DataFrame(0, index=sorted(country_keyword_counts.keys()), 
-                           columns=all_keywords, dtype=float)
-    
-    for cname, kwdict in country_keyword_counts.items():
-        for kw, cnt in kwdict.items():
-            counts_df.loc[cname, kw] = cnt
+def assemble_counts_matrix(sheet_counts):
+    """국가별 (keywords, counts)를 국가 × 키워드 희소 CSR 행렬로 합칩니다."""
+    countries = sorted(sheet_counts.keys())
+    # 어휘 인덱스 (정렬된 키워드 목록)
+    keywords = sorted({kw for kws, _ in sheet_counts.values() for kw in kws})
+    keyword_to_idx = {kw: idx for idx, kw in enumerate(keywords)}
+
+    indptr = [0]
+    indices = []
+    data = []
+    for cname in countries:
+        kws, cnts = sheet_counts[cname]
+        indices.append(np.fromiter((keyword_to_idx[kw] for kw in kws), dtype=np.int32, count=len(kws)))
+        data.append(np.asarray(cnts, dtype=float))
+        indptr.append(indptr[-1] + len(kws))
+
+    counts = sp.csr_matrix(
+        (np.concatenate(data) if data else np.array([], dtype=float),
+         np.concatenate(indices) if indices else np.array([], dtype=np.int32),
+         np.array(indptr)),
+        shape=(len(countries), len(keywords))
+    )
+    counts.sort_indices()
+    return counts, countries, keywords
+
+def l2_normalize_rows(matrix):
+    """희소 행렬의 각 행을 L2 정규화합니다. (영벡터 행은 그대로)"""
+    matrix = sp.csr_matrix(matrix, dtype=float, copy=True)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    matrix.data /= np.repeat(norms, np.diff(matrix.indptr))
+    return matrix
 
-    # TF-IDF 변환
-    tfidf_transformer = TfidfTransformer(norm='l2', use_idf=True, smooth_idf=True)
-    tfidf_matrix = tfidf_transformer.fit_transform(counts_df.values)
+def fit_idf(counts_matrix):
+    """smooth IDF 가중치를 계산합니다. idf = ln((1 + n) / (1 + df)) + 1"""
+    n_docs = counts_matrix.shape[0]
+    df = np.bincount(counts_matrix.indices, minlength=counts_matrix.shape[1])
+    return np.log((1 + n_docs) / (1 + df)) + 1.0
+
+def tfidf_transform(counts_matrix, idf):
+    """빈도 행렬에 IDF를 곱하고 행 단위 L2 정규화합니다."""
+    return l2_normalize_rows(sp.csr_matrix(counts_matrix).multiply(idf))
+
+def build_keyword_country_table(idf, tfidf_matrix):
+    """키워드 → 국가별 IDF 가중 기여도 표 (키워드 × 국가 CSR, 값 = idf[j]·tfidf[c, j])
+
+    쿼리 빈도 x에 대해 국가 c의 코사인 점수는 Σ_j x[j]·idf[j]·tfidf[c, j] / ||x∘idf|| 이므로,
+    쿼리에 든 키워드 행만 더하고 한 번 나누면 기존 계산과 같은 점수가 나옵니다.
+    """
+    return sp.csr_matrix(tfidf_matrix.multiply(np.asarray(idf).reshape(1, -1))).T.tocsr()
+
+TFIDF_CACHE_FILE = './data/tfidf_data.pkl'
+TFIDF_SCHEMA_VERSION = 4  # 캐시 구조가 바뀌면 올려서 기존 캐시를 무효화
+
+def prepare_tfidf_data(source_path=COSMETIC_DATA_PATH, force_rebuild=False):
+    """TF-IDF 행렬과 관련 데이터를 전처리하고 캐시합니다. (원본 파일 해시 기준)"""
+    with stage('init.tfidf.hash_source'):
+        source_digest = file_digest(source_path)
+    return _prepare_tfidf_data(source_path, source_digest, force_rebuild)
+
+def _prepare_tfidf_data(source_path, source_digest, force_rebuild=False):
+    with stage('init.tfidf.load_cache'):
+        cached_data = load_data(TFIDF_CACHE_FILE)
+    if cached_data is not None and cached_data.get('schema_version') != TFIDF_SCHEMA_VERSION:
+        cached_data = None  # 이전 형식 캐시는 재사용하지 않음
+
+    # 원본 해시와 스키마 버전이 같고 강제 재빌드가 아니면 그대로 사용
+    if (not force_rebuild and cached_data is not None
+            and cached_data['source_digest'] == source_digest):
+        return (cached_data['idf'], cached_data['tfidf_matrix'],
+                cached_data['counts_matrix'], cached_data['countries'],
+                cached_data['keywords'])
+
+    # 모든 시트를 다시 읽되, 내용(해시)이 같은 시트는 이전 키워드 집계를 재사용
+    # (엑셀 파싱과 국가 × 키워드 행렬·IDF 계산은 항상 전체를 다시 수행)
+    with stage('init.tfidf.read_excel'):
+        country_rows = load_cosmetic_data(source_path)
+    previous_digests = {} if (cached_data is None or force_rebuild) else cached_data['sheet_digests']
+    previous_counts = {} if (cached_data is None or force_rebuild) else cached_data['sheet_counts']
+    sheet_digests = {}
+    sheet_counts = {}
+    for cname, (keywords, freqs) in country_rows.items():
+        digest = sheet_digest(keywords, freqs)
+        sheet_digests[cname] = digest
+        if previous_digests.get(cname) == digest:
+            sheet_counts[cname] = previous_counts[cname]
+        else:
+            sheet_counts[cname] = sheet_keyword_counts(keywords, freqs)
+
+    # 국가 × 키워드 희소 행렬 생성 후 TF-IDF 변환
+    with stage('init.tfidf.fit'):
+        counts_matrix, countries, keywords = assemble_counts_matrix(sheet_counts)
+        idf = fit_idf(counts_matrix)
+        tfidf_matrix = tfidf_transform(counts_matrix, idf)
     
     # 결과 저장
-    save_data({
-        'tfidf_transformer': tfidf_transformer,
-        'tfidf_matrix': tfidf_matrix,
-        'counts_df': counts_df
-    }, cache_file)
+    with stage('init.tfidf.save_cache'):
+        save_data({
+            'schema_version': TFIDF_SCHEMA_VERSION,
+            'source_digest': source_digest,
+            'sheet_digests': sheet_digests,
+            'sheet_counts': sheet_counts,
+            'idf': idf,
+            'tfidf_matrix': tfidf_matrix,
+            'counts_matrix': counts_matrix,
+            'countries': countries,
+            'keywords': keywords
+        }, TFIDF_CACHE_FILE)
     
-    return tfidf_transformer, tfidf_matrix, counts_df
+    return idf, tfidf_matrix, counts_matrix, countries, keywords
 
 # ======================
-# (4) 임베딩 모델 - 지연 로딩
+# (4) 임베딩 모델 - 백그라운드 지연 로딩
 # ======================
-@st.cache_resource  # 모델은 cache_resource 사용
-def load_embedding_model():
-    """임베딩 모델을 로드합니다. (지연 로딩)"""
-    try:
-        model = SentenceTransformer("paraphrase-multilingual-MiniLM-L12-v2")
-        # print("임베딩 모델 로드 완료")
-        return model
-    except Exception as e:
-        st.error(f"임베딩 모델 로드 실패: {e}")
-        return None
+def load_embedding_model(backend=EMBEDDING_BACKEND):
+    """임베딩 모델을 로드합니다. (SemanticBackend가 프로세스당 한 번만 호출)"""
+    model = load_model(backend)
+    model.kbd_backend = backend  # 쿼리 임베딩 캐시를 백엔드별로 구분하기 위한 표시
+    return model
+
+def backend_path(path, backend=EMBEDDING_BACKEND):
+    """백엔드별 캐시 파일 경로 (기준 torch 백엔드는 기존 경로 그대로 사용)"""
+    if backend == 'torch':
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{backend}{ext}"
 
-@st.cache_data
-def prepare_embeddings(_model, keywords):
-    """키워드 임베딩을 생성하고 캐시합니다."""
+EMBEDDING_STORE_PREFIX = './data/keyword_embeddings'
+EMBEDDING_STORE_DTYPE = np.float32  # 디스크 절약이 필요하면 np.float16
+
+def prepare_embeddings(_model, keywords, backend=EMBEDDING_BACKEND):
+    """키워드 임베딩을 준비합니다. (정규화 행렬, 키워드 목록)을 반환합니다."""
     if _model is None:
-        return {}
-    
-    cache_file = './data/keyword_embeddings.pkl'
-    
-    # 캐시된 임베딩 로드 시도
-    cached_embeddings = load_data(cache_file)
-    if cached_embeddings is not None:
-        # 새로운 키워드가 있는지 확인
-        missing_keywords = [kw for kw in keywords if kw not in cached_embeddings]
-        if not missing_keywords:
-            # print("캐시된 임베딩 사용")
-            return {kw: cached_embeddings[kw] for kw in keywords}
-        
-        # 새로운 키워드만 임베딩 계산
-        print(f"새로운 키워드 {len(missing_keywords)}개 임베딩 계산 중...")
-        new_embeddings = {kw: _model.encode(kw) for kw in missing_keywords}
-        
-        # 기존 임베딩과 합치기
-        all_embeddings = {**cached_embeddings, **new_embeddings}
-        
-        # 업데이트된 임베딩 저장
-        save_data(all_embeddings, cache_file)
-        
-        return {kw: all_embeddings[kw] for kw in keywords}
-    
-    # 첫 실행: 모든 임베딩 계산
-    # print(f"모든 키워드 {len(keywords)}개 임베딩 계산 중...")
-    embeddings = {kw: _model.encode(kw) for kw in keywords}
-    
-    # 임베딩 저장
-    save_data(embeddings, cache_file)
-    
+        return np.zeros((0, 0), dtype=np.float32), []
+
+    # 백엔드마다 임베딩 값이 조금씩 다르므로 저장소를 따로 둠
+    store = EmbeddingStore(backend_path(EMBEDDING_STORE_PREFIX, backend), dtype=EMBEDDING_STORE_DTYPE)
+    matrix, stored_keywords = store.load()
+    keywords = list(keywords)
+
+    if stored_keywords != keywords:
+        # 저장소에 없는 키워드만 배치로 임베딩
+        stored = set(stored_keywords)
+        missing_keywords = [kw for kw in keywords if kw not in stored]
+        vectors = None
+        if missing_keywords:
+            print(f"새로운 키워드 {len(missing_keywords)}개 임베딩 계산 중...")
+            vectors = _model.encode(missing_keywords, batch_size=64)
+
+        if stored_keywords == keywords[:len(stored_keywords)]:
+            store.append(missing_keywords, vectors)  # 어휘 끝에 키워드만 추가됨 → 파일 끝에 행 추가
+        else:
+            # 어휘 순서가 바뀌었거나 키워드가 빠짐 → 저장소를 어휘 순서로 한 번 재작성(없어진 키워드 제거)
+            print("키워드 임베딩 저장소를 현재 어휘 순서로 재작성 중...")
+            row_of = {kw: i for i, kw in enumerate(stored_keywords)}
+            in_store = np.array([kw in row_of for kw in keywords], dtype=bool)
+            dim = matrix.shape[1] if matrix is not None else np.asarray(vectors).shape[1]
+            merged = np.empty((len(keywords), dim), dtype=np.float32)
+            merged[in_store] = matrix[[row_of[kw] for kw in keywords if kw in row_of]]
+            if vectors is not None:
+                merged[~in_store] = vectors  # missing_keywords는 어휘 순서
+            store.rewrite(keywords, merged)
+        matrix, stored_keywords = store.load()
+
+    if stored_keywords == keywords:
+        embedding_matrix = matrix  # 어휘와 저장소가 일치하면 mmap 그대로 사용 (zero-copy)
+    else:
+        # 다른 어휘의 프로세스가 그사이 저장소를 재작성한 경우에만 복사본 사용 (저장소에 있는 키워드만)
+        row_of = {kw: i for i, kw in enumerate(stored_keywords)}
+        keywords = [kw for kw in keywords if kw in row_of]
+        embedding_matrix = matrix[[row_of[kw] for kw in keywords]]
+
+    if embedding_matrix.dtype != np.float32:
+        embedding_matrix = embedding_matrix.astype(np.float32)  # float16 저장 시 연산용 변환
+    return embedding_matrix, keywords
+
+ANN_INDEX_FILE = './data/keyword_ann.npz'
+ANN_MIN_KEYWORDS = 50000  # 이 수 이상이면 IVF 인덱스 사용 (None이면 사용 안 함)
+ANN_N_PROBE = 8           # 검색할 군집 수 (클수록 재현율↑ 지연↑, scripts/bench_ann.py로 측정)
+
+def prepare_ann_index(_embedding_matrix, embedding_keywords, backend=EMBEDDING_BACKEND):
+    """임베딩 fallback용 IVF 인덱스를 불러오거나 생성합니다. 어휘가 작으면 None"""
+    if ANN_MIN_KEYWORDS is None or len(embedding_keywords) < ANN_MIN_KEYWORDS:
+        return None
+
+    index_file = backend_path(ANN_INDEX_FILE, backend)
+    digest = keywords_digest(embedding_keywords, _embedding_matrix.shape[1])
+    index = IVFIndex.load(index_file)
+    if index is not None and index.keywords_digest == digest:
+        return index
+
+    print(f"ANN 인덱스 생성 중... (키워드 {len(embedding_keywords)}개)")
+    index = IVFIndex.build(_embedding_matrix, keywords_digest=digest)
+    index.save(index_file)
+    return index
+
+def verify_backend_parity(model, keywords, backend=EMBEDDING_BACKEND):
+    """기준(torch) 임베딩과 비교해 model의 임베딩 일치도를 검사합니다.
+
+    표본 키워드의 기준 임베딩은 torch 저장소에서 읽고, 없는 키워드는 torch 모델로 계산해 저장소에 추가합니다.
+    (처음 켜는 CPU 서버도 검사를 거침) 일치도가 기준에 못 미치거나 검사할 수 없으면 EmbeddingParityError를 발생시킵니다.
+    """
+    if backend == 'torch':
+        return None
+    texts = sample_texts(keywords)
+    store = EmbeddingStore(EMBEDDING_STORE_PREFIX, dtype=EMBEDDING_STORE_DTYPE)
+    matrix, stored_keywords = store.load()
+    row_of = {kw: i for i, kw in enumerate(stored_keywords)}
+    missing = [kw for kw in texts if kw not in row_of]
+    if missing:
+        print(f"기준 임베딩 {len(missing)}개를 torch 모델로 계산합니다. ({backend} 일치도 검사)")
+        try:
+            reference_model = load_embedding_model('torch')
+        except Exception as e:
+            raise EmbeddingParityError(f"기준 torch 모델을 불러올 수 없어 {backend} 일치도를 검사하지 못했습니다: {e}") from e
+        store.append(missing, reference_model.encode(missing, batch_size=64))
+        matrix, stored_keywords = store.load()
+        row_of = {kw: i for i, kw in enumerate(stored_keywords)}
+
+    sims = check_parity(model, texts, matrix[[row_of[kw] for kw in texts]])
+    print(f"{backend} 임베딩 일치도: 평균 코사인 {sims.mean():.4f}, 최소 {sims.min():.4f}")
+    return sims
+
+class SemanticBackend:
+    """임베딩 모델·키워드 임베딩·ANN 인덱스를 백그라운드 스레드에서 준비합니다.
+
+    준비가 끝나기 전에는 snapshot()이 모델 없이 반환되어,
+    추천은 별칭 사전과 어휘 정확 일치만으로 동작합니다.
+    """
+
+    def __init__(self, keywords, backend=EMBEDDING_BACKEND):
+        self.keywords = list(keywords)
+        self.backend = backend
+        self.error = None
+        self._ready = threading.Event()
+        self._state = (None, np.zeros((0, 0), dtype=np.float32), [], None)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._warm_up, name='semantic-warmup', daemon=True)
+                self._thread.start()
+        return self
+
+    def _warm_up(self):
+        try:
+            # 백그라운드 스레드라 요청별(ContextVar) 훅에는 잡히지 않고 전역 훅에만 기록됨
+            with stage('warmup.load_model'):
+                model = load_embedding_model(self.backend)
+            try:
+                with stage('warmup.parity_check'):
+                    verify_backend_parity(model, self.keywords, self.backend)
+            except EmbeddingParityError as e:
+                # 양자화 모델이 기준과 어긋나거나 검사할 수 없으면 원본 fp32 모델로 되돌림
+                print(f"{e} → torch 백엔드로 전환합니다.")
+                self.backend = 'torch'
+                with stage('warmup.load_model'):
+                    model = load_embedding_model(self.backend)
+            with stage('warmup.embeddings'):
+                embedding_matrix, embedding_keywords = prepare_embeddings(model, self.keywords, self.backend)
+            with stage('warmup.ann_index'):
+                ann_index = prepare_ann_index(embedding_matrix, embedding_keywords, self.backend)
+            # 튜플 한 번의 대입으로 교체 → 읽는 쪽은 항상 완전한 상태만 보게 됨
+            self._state = (model, embedding_matrix, embedding_keywords, ann_index)
+        except Exception as e:
+            self.error = e
+            print(f"임베딩 모델 로드 실패: {e}")
+        finally:
+            self._ready.set()
+
+    @property
+    def ready(self):
+        """의미 기반 매칭을 사용할 수 있으면 True"""
+        return self._ready.is_set() and self.error is None
+
+    @property
+    def warming_up(self):
+        return not self._ready.is_set()
+
+    def wait(self, timeout=None):
+        return self._ready.wait(timeout)
+
+    def snapshot(self):
+        """(model, embedding_matrix, embedding_keywords, ann_index)"""
+        return self._state
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def get_semantic_backend(vocab_digest, _keywords, backend=EMBEDDING_BACKEND):
+    """어휘·백엔드별로 프로세스 전체에서 하나의 SemanticBackend를 공유하고 warm-up을 시작합니다.
+
+    어휘가 바뀌면 이전 백엔드(모델·임베딩)는 캐시에서 내보냅니다. (max_entries=1)
+    """
+    return SemanticBackend(_keywords, backend).start()
+
+class QueryEmbeddingCache:
+    """(백엔드, 쿼리 문자열) → 임베딩 LRU 캐시 (메모리 사용량 기준으로 크기 제한)"""
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, text):
+        with self._lock:
+            vec = self._entries.get(text)
+            if vec is not None:
+                self._entries.move_to_end(text)
+            return vec
+
+    def put(self, text, vec):
+        vec = np.asarray(vec, dtype=np.float32)
+        if vec.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(text, None)
+            if old is not None:
+                self.nbytes -= old.nbytes
+            self._entries[text] = vec
+            self.nbytes += vec.nbytes
+            # 가장 오래 사용되지 않은 항목부터 제거
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+query_embedding_cache = QueryEmbeddingCache()
+
+def encode_queries(model, texts):
+    """쿼리 문자열들을 임베딩합니다. 캐시에 없는 것만 한 번의 배치 encode로 계산합니다."""
+    backend = getattr(model, 'kbd_backend', EMBEDDING_BACKEND)
+    embeddings = {}
+    missing = []
+    for text in dict.fromkeys(texts):
+        vec = query_embedding_cache.get((backend, text))
+        if vec is None:
+            missing.append(text)
+        else:
+            embeddings[text] = vec
+
+    if missing:
+        vecs = np.asarray(model.encode(missing), dtype=np.float32).reshape(len(missing), -1)
+        for text, vec in zip(missing, vecs):
+            query_embedding_cache.put((backend, text), vec)
+            embeddings[text] = vec
+
     return embeddings
 
 # ======================
 # (5) 다국어 매핑
 # ======================
+@lru_cache(maxsize=1)
+def keyword_aliases():
+    """별칭 파일(data/keyword_aliases.json)을 정규화된 별칭 사전으로 읽습니다. (프로세스당 한 번)"""
+    return load_keyword_aliases()
+
 @lru_cache(maxsize=1000)  # 자주 사용되는 키워드 캐싱
-def normalize_keyword(kw):
-    """키워드를 정규화합니다."""
-    keyword_aliases = {
-        "비건": "vegan",
-        "ヴィーガン": "vegan",
-        "纯素": "vegan",
-        "채식": "vegan",
-        "ヴィーガンライフ": "vegan",
-        "유기농": "organic",
-        "オーガニック": "organic",
-        "유해성분무첨가": "clean beauty"
-    }
-    kw = str(kw).strip().lower()
-    return keyword_aliases.get(kw, kw)
+def _canonical_keyword(kw):
+    return canonical_form(kw)
+
+def normalize_keyword(kw, vocabulary=None):
+    """키워드를 정규화합니다. (NFKC·소문자·공백 정리 후 별칭 적용, vocabulary에 있는 키워드는 별칭보다 우선)"""
+    kw = _canonical_keyword(kw)
+    if vocabulary is not None and kw in vocabulary:
+        return kw
+    return keyword_aliases().get(kw, kw)
 
-def map_or_embed(input_kw, model, keyword_embeddings, counts_df, threshold=0.6):
+def build_keyword_lexicon(keywords):
+    """별칭·띄어쓰기 변형·trigram 오타 보정용 어휘 매처를 만듭니다."""
+    return KeywordLexicon(keywords, keyword_aliases())
+
+def build_embedding_matrix(keyword_embeddings, keywords):
+    """키워드 임베딩을 L2 정규화된 하나의 행렬로 묶습니다."""
+    embedding_keywords = [kw for kw in keywords if kw in keyword_embeddings]
+    if not embedding_keywords:
+        return np.zeros((0, 0), dtype=np.float32), []
+
+    matrix = normalize_rows(np.vstack([keyword_embeddings[kw] for kw in embedding_keywords]))
+    return matrix, embedding_keywords
+
+def nearest_keywords(vec, embedding_matrix, embedding_keywords, top_k=1, ann_index=None):
+    """정규화된 임베딩 행렬에서 코사인 유사도가 가장 높은 키워드 top_k개를 찾습니다."""
+    if len(embedding_keywords) == 0:
+        return []
+
+    query = np.asarray(vec, dtype=np.float32).ravel()
+    norm = np.linalg.norm(query)
+    if norm == 0:
+        return []
+
+    # ANN 인덱스가 있으면 가까운 군집만 탐색
+    if ann_index is not None:
+        rows, sims = ann_index.search(embedding_matrix, query / norm, top_k=top_k, n_probe=ANN_N_PROBE)
+        return [(embedding_keywords[i], float(sim)) for i, sim in zip(rows, sims)]
+
+    # 행렬-벡터 곱 한 번으로 전체 어휘와의 코사인 유사도 계산
+    sims = embedding_matrix @ (query / norm)
+    top_k = min(top_k, len(sims))
+    if top_k < len(sims):
+        top_idx = np.argpartition(-sims, top_k - 1)[:top_k]
+    else:
+        top_idx = np.arange(len(sims))
+    top_idx = top_idx[np.argsort(-sims[top_idx])]
+    return [(embedding_keywords[i], float(sims[i])) for i in top_idx]
+
+def map_or_embed(input_kw, model, embedding_matrix, embedding_keywords, keyword_to_idx, threshold=0.6,
+                 ann_index=None, lexicon=None):
     """키워드를 매핑하거나 임베딩으로 유사도를 계산합니다."""
+    return map_keywords([input_kw], model, embedding_matrix, embedding_keywords,
+                        keyword_to_idx, threshold, ann_index, lexicon)[0]
+
+def map_keywords(input_keywords, model, embedding_matrix, embedding_keywords, keyword_to_idx, threshold=0.6,
+                 ann_index=None, lexicon=None):
+    """여러 키워드를 한 번에 매핑합니다.
+
+    정확 일치/별칭 → (lexicon이 있으면) 띄어쓰기 변형·오타 보정 → 임베딩 순서로 시도하며,
+    앞 단계에서 찾지 못한 키워드만 배치로 임베딩합니다.
+    """
+    with stage('map.lexical'):
+        normalized = [normalize_keyword(kw, keyword_to_idx) for kw in input_keywords]
+        if lexicon is not None:
+            mapped = [lexicon.resolve(kw)[0] for kw in normalized]
+        else:
+            mapped = [kw if kw in keyword_to_idx else None for kw in normalized]
+
     if model is None:  # 임베딩 모델이 없으면 기본 매핑만
-        norm_kw = normalize_keyword(input_kw)
-        return norm_kw if norm_kw in counts_df.columns else None
-    
-    norm_kw = normalize_keyword(input_kw)
-    if norm_kw in counts_df.columns:
-        return norm_kw
-
-    vec = model.encode(norm_kw)
-    sims = {kw: cosine_similarity([vec], [emb])[0][0] 
-            for kw, emb in keyword_embeddings.items()}
-    best_kw, best_score = max(sims.items(), key=lambda x: x[1])
-    
-    if best_score >= threshold:
-        return best_kw
-    else:
-        return None
+        return mapped
+
+    unmapped = [kw for kw, m in zip(normalized, mapped) if m is None]
+    if not unmapped:
+        return mapped
+
+    # 미매핑 키워드 전체를 한 번의 encode 호출로 처리
+    with stage('map.encode'):
+        query_vecs = encode_queries(model, unmapped)
+    with stage('map.similarity_search'):
+        for i, (norm_kw, m) in enumerate(zip(normalized, mapped)):
+            if m is not None:
+                continue
+            best = nearest_keywords(query_vecs[norm_kw], embedding_matrix, embedding_keywords,
+                                    top_k=1, ann_index=ann_index)
+            if best and best[0][1] >= threshold:
+                mapped[i] = best[0][0]
+
+    return mapped
 
 # ======================
 # (6) 최적화된 추천 함수들 (클래스 대신 함수 사용)
@@ -230,98 +652,380 @@ def create_input_vector(mapped_keywords, keyword_to_idx, total_keywords):
             input_vec[idx] += 1.0
     return input_vec
 
-def recommend_countries_fast(input_keywords, tfidf_transformer, tfidf_matrix, 
-                           counts_df, model, keyword_embeddings, 
-                           keyword_to_idx=None, top_n=3, return_scores=False):
-    """최적화된 국가 추천 함수"""
+def score_countries_dense(mapped_keywords, keyword_to_idx, idf, tfidf_matrix, total_keywords):
+    """어휘 길이의 입력 벡터를 만들어 TF-IDF 변환 후 코사인 유사도를 계산합니다. (기준 경로)"""
+    with stage('score.tfidf_transform'):
+        input_vec = create_input_vector(mapped_keywords, keyword_to_idx, total_keywords)
+        input_tfidf = tfidf_transform(input_vec.reshape(1, -1), idf)
+    # 두 행렬 모두 L2 정규화되어 있으므로 내적이 곧 코사인 유사도
+    with stage('score.cosine_similarity'):
+        return (input_tfidf @ tfidf_matrix.T).toarray().ravel()
+
+def score_countries_sparse(mapped_keywords, keyword_to_idx, idf, keyword_country_table):
+    """쿼리 키워드가 나타나는 국가만의 (국가 인덱스, 점수)를 반환합니다. (국가 인덱스 오름차순)
+
+    기여도 표에서 쿼리 키워드 행만 모아 국가별로 더하고 ||x∘idf||로 나눕니다.
+    비용은 주로 모은 행의 nnz에 비례하고(국가별 합계는 bincount 한 번), 나타나지 않는 국가의 점수는 0입니다.
+    """
+    table = keyword_country_table
+    counts = {}
+    for kw in mapped_keywords:
+        j = keyword_to_idx.get(kw)
+        if j is not None:
+            counts[j] = counts.get(j, 0) + 1
+    if not counts:
+        return np.empty(0, dtype=np.intp), np.empty(0)
+
+    idx = sorted(counts)
+    norm = math.sqrt(sum((counts[j] * idf[j]) ** 2 for j in idx))
+    indptr = table.indptr
+    cols = np.concatenate([table.indices[indptr[j]:indptr[j + 1]] for j in idx])
+    weights = np.concatenate([counts[j] * table.data[indptr[j]:indptr[j + 1]] for j in idx])
+    # 키워드 순서대로 더하므로 score_countries_dense와 같은 값 (기여도는 모두 양수라 0이 아니면 나타난 국가)
+    totals = np.bincount(cols, weights=weights)
+    country_idx = np.flatnonzero(totals)
+    return country_idx, totals[country_idx] / norm
+
+def score_countries(mapped_keywords, keyword_to_idx, idf, keyword_country_table):
+    """score_countries_sparse 결과를 국가 수 길이의 배열로 펼칩니다. (score_countries_dense와 같은 값)"""
+    scores = np.zeros(keyword_country_table.shape[1])
+    country_idx, values = score_countries_sparse(mapped_keywords, keyword_to_idx, idf, keyword_country_table)
+    scores[country_idx] = values
+    return scores
+
+def top_n_sparse(country_idx, scores, n_countries, top_n):
+    """희소 점수(국가 인덱스 오름차순)에서 점수가 높은 순서대로 top_n개의 (국가 인덱스, 점수)를 반환합니다.
+
+    np.argpartition으로 k번째 점수를 찾고 그 이상인 후보만 정렬하며, 동점은 앞선 국가가 먼저 옵니다.
+    점수가 있는 국가가 top_n보다 적으면 나머지는 점수 0인 국가를 인덱스 순서로 채웁니다.
+    (전체 국가를 안정 정렬한 것과 같은 순위)
+    """
+    k = min(top_n, n_countries)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp), np.empty(0)
+
+    if len(scores) > k:
+        kth = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        candidates = np.flatnonzero(scores >= kth)
+    else:
+        candidates = np.arange(len(scores))
+    order = candidates[np.argsort(-scores[candidates], kind='stable')[:k]]
+    top_idx, top_scores = country_idx[order], scores[order]
+
+    missing = k - len(top_idx)
+    if missing > 0:
+        zeros = np.setdiff1d(np.arange(len(country_idx) + missing), country_idx)[:missing]
+        top_idx = np.concatenate([top_idx, zeros])
+        top_scores = np.concatenate([top_scores, np.zeros(missing)])
+    return top_idx, top_scores
+
+def recommend_countries_fast(input_keywords, idf, tfidf_matrix, 
+                           countries, keywords, model, embedding_matrix, embedding_keywords,
+                           keyword_to_idx=None, top_n=3, return_scores=False, ann_index=None,
+                           keyword_country_table=None, lexicon=None):
+    """최적화된 국가 추천 함수
+
+    keyword_country_table이 있으면 매핑된 키워드 행만 더하는 빠른 경로를 사용합니다.
+    """
     
     # 키워드 매핑이 없으면 생성
     if keyword_to_idx is None:
-        keyword_to_idx = create_keyword_mapping(counts_df.columns.tolist())
+        keyword_to_idx = create_keyword_mapping(keywords)
     
-    # 키워드 매핑
-    mapped_keywords = []
-    for kw in input_keywords:
-        mapped_kw = map_or_embed(kw, model, keyword_embeddings, counts_df)
-        if mapped_kw:
-            mapped_keywords.append(mapped_kw)
+    # 키워드 매핑 (미매핑 키워드는 배치 임베딩)
+    mapped_keywords = [kw for kw in map_keywords(input_keywords, model, embedding_matrix,
+                                                 embedding_keywords, keyword_to_idx,
+                                                 ann_index=ann_index, lexicon=lexicon) if kw]
 
     if not mapped_keywords:
         return []
 
-    # 입력 벡터 생성
-    input_vec = create_input_vector(mapped_keywords, keyword_to_idx, len(counts_df.columns))
-    
-    # TF-IDF 변환 (이미 fit된 transformer 사용)
-    input_tfidf = tfidf_transformer.transform(input_vec.reshape(1, -1))
-    
-    # 코사인 유사도 계산 (사전 계산된 tfidf_matrix와 비교)
-    sims = cosine_similarity(input_tfidf, tfidf_matrix).flatten()
-    
-    # 결과 정렬
-    countries = counts_df.index.tolist()
-    ranked = sorted(zip(countries, sims), key=lambda x: x[1], reverse=True)
+    # 코사인 유사도 계산 (점수가 0이 아닌 국가만)
+    if keyword_country_table is not None:
+        with stage('score.keyword_table'):
+            country_idx, sims = score_countries_sparse(mapped_keywords, keyword_to_idx, idf,
+                                                       keyword_country_table)
+    else:
+        dense = score_countries_dense(mapped_keywords, keyword_to_idx, idf, tfidf_matrix, len(keywords))
+        country_idx = np.flatnonzero(dense)
+        sims = dense[country_idx]
+
+    # 전체 정렬 없이 상위 top_n개만 선택 (동점은 국가 순서 유지 → 안정 정렬과 같은 순위)
+    with stage('rank'):
+        top_idx, top_scores = top_n_sparse(country_idx, sims, len(countries), top_n)
 
     if return_scores:
-        return ranked[:top_n]
+        return [(countries[i], score) for i, score in zip(top_idx, top_scores)]
     else:
-        return [r[0] for r in ranked[:top_n]]
+        return [countries[i] for i in top_idx]
 
 # 기존 함수와 호환성을 위한 래퍼 함수
 def recommend_countries(input_keywords, tfidf_transformer, tfidf_matrix, 
                        counts_df, model, keyword_embeddings, top_n=3, return_scores=False):
     """기존 API와 호환되는 추천 함수"""
-    return recommend_countries_fast(input_keywords, tfidf_transformer, tfidf_matrix, 
-                                   counts_df, model, keyword_embeddings, 
+    idf = getattr(tfidf_transformer, 'idf_', tfidf_transformer)  # sklearn TfidfTransformer도 허용
+    embedding_matrix, embedding_keywords = build_embedding_matrix(
+        keyword_embeddings, counts_df.columns.tolist()
+    )
+    return recommend_countries_fast(input_keywords, idf, tfidf_matrix, 
+                                   counts_df.index.tolist(), counts_df.columns.tolist(),
+                                   model, embedding_matrix, embedding_keywords,
                                    None, top_n, return_scores)
 
 # ======================
 # (7) 통합 초기화 함수 - pickle 가능하도록 수정
 # ======================
-def initialize_recommender_system(force_rebuild=False):
-    """추천 시스템을 초기화합니다. (pickle 가능한 버전)"""
-    # 데이터 로딩
-    country_dfs = load_cosmetic_data()
-    
-    # TF-IDF 준비 (캐시 활용)
-    tfidf_transformer, tfidf_matrix, counts_df = prepare_tfidf_data(
-        country_dfs, force_rebuild=force_rebuild
-    )
+def initialize_recommender_system(force_rebuild=False, wait_for_model=True):
+    """추천 시스템을 초기화합니다.
+
+    임베딩 모델은 백그라운드 스레드에서 로드됩니다. wait_for_model=False이면
+    모델을 기다리지 않고 바로 반환하며, 준비 전까지는 정확 일치 매칭만 사용합니다.
+    """
+    # TF-IDF 준비 (원본이 바뀌지 않았으면 엑셀을 읽지 않고 캐시 사용)
+    with stage('init.tfidf'):
+        idf, tfidf_matrix, counts_matrix, countries, keywords = prepare_tfidf_data(
+            COSMETIC_DATA_PATH, force_rebuild=force_rebuild
+        )
     
-    # 임베딩 모델 및 키워드 임베딩 준비
-    model = load_embedding_model()
-    keyword_embeddings = prepare_embeddings(model, counts_df.columns.tolist())
+    # 임베딩 모델, 키워드 임베딩, ANN 인덱스는 백그라운드에서 준비
+    with stage('init.semantic_backend'):
+        semantic = get_semantic_backend(vocabulary_digest(keywords), keywords)
+    if wait_for_model:
+        with stage('init.wait_for_model'):
+            semantic.wait()
     
     # 키워드 매핑 생성 (성능 향상용)
-    keyword_to_idx = create_keyword_mapping(counts_df.columns.tolist())
+    with stage('init.keyword_mapping'):
+        keyword_to_idx = create_keyword_mapping(keywords)
+    with stage('init.keyword_table'):
+        keyword_country_table = build_keyword_country_table(idf, tfidf_matrix)
+    with stage('init.lexicon'):
+        lexicon = build_keyword_lexicon(keywords)
+    with stage('init.data_version'):
+        version = data_version(idf, tfidf_matrix, countries, keywords)
     
     return {
-        'tfidf_transformer': tfidf_transformer,
+        'idf': idf,
         'tfidf_matrix': tfidf_matrix,
-        'counts_df': counts_df,
-        'model': model,
-        'keyword_embeddings': keyword_embeddings,
+        'keyword_country_table': keyword_country_table,
+        'counts_matrix': counts_matrix,
+        'semantic': semantic,
         'keyword_to_idx': keyword_to_idx,  # 클래스 대신 매핑 딕셔너리
-        'countries': counts_df.index.tolist(),
-        'keywords': counts_df.columns.tolist()
+        'lexicon': lexicon,
+        'countries': countries,
+        'keywords': keywords,
+        'data_version': version  # 결과 캐시는 이 값이 바뀌면 비워짐
     }
 
+def _freeze(value):
+    """배열/희소 행렬/사전/리스트를 읽기 전용으로 만듭니다."""
+    if sp.issparse(value):
+        for arr in (value.data, value.indices, value.indptr):
+            arr.flags.writeable = False
+    elif isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, dict):
+        return MappingProxyType(value)
+    elif isinstance(value, list):
+        return tuple(value)
+    return value
+
+@st.cache_resource(show_spinner=False, max_entries=1)  # 원본이 바뀌면 이전 추천 시스템은 캐시에서 내보냄
+def _shared_recommender(source_stat):
+    recommender_data = initialize_recommender_system(wait_for_model=False)
+    return MappingProxyType({key: _freeze(value) for key, value in recommender_data.items()})
+
+def get_shared_recommender():
+    """모든 세션이 공유하는 읽기 전용 추천 시스템을 반환합니다. (프로세스당 하나)
+
+    원본 엑셀이 바뀌면(수정 시각·크기 기준) 새로 만들고, 내용 해시 검사는 prepare_tfidf_data가 담당합니다.
+    """
+    exporter_from_env()  # KBD_METRICS_FILE이 설정되어 있으면 단계별 메트릭 내보내기 (프로세스당 한 번)
+    stat = os.stat(COSMETIC_DATA_PATH)
+    return _shared_recommender((stat.st_mtime_ns, stat.st_size))
+
+def _nbytes(value):
+    """객체가 차지하는 대략적인 바이트 수"""
+    if sp.issparse(value):
+        return value.data.nbytes + value.indices.nbytes + value.indptr.nbytes
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (dict, MappingProxyType)):
+        return sys.getsizeof(dict(value)) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(sys.getsizeof(v) for v in value)
+    if isinstance(value, KeywordLexicon):
+        return value.nbytes()
+    return sys.getsizeof(value)
+
+def _is_mmap(arr):
+    while arr is not None:
+        if isinstance(arr, mmap.mmap):
+            return True
+        arr = getattr(arr, 'base', None)
+    return False
+
+def memory_report(recommender_data):
+    """추천 시스템 구성 요소별 메모리 사용량(바이트)을 반환합니다.
+
+    mmap 임베딩 행렬은 프로세스 간에 공유되는 페이지 캐시이므로 'shared_mmap'으로 따로 집계합니다.
+    """
+    report = {}
+    for key, value in recommender_data.items():
+        if key != 'semantic':
+            report[key] = _nbytes(value)
+
+    model, embedding_matrix, embedding_keywords, ann_index = recommender_data['semantic'].snapshot()
+    if _is_mmap(embedding_matrix):
+        report['embedding_matrix (shared_mmap)'] = embedding_matrix.nbytes
+    else:
+        report['embedding_matrix'] = embedding_matrix.nbytes
+    report['embedding_keywords'] = _nbytes(embedding_keywords)
+    if ann_index is not None:
+        report['ann_index'] = sum(_nbytes(a) for a in (ann_index.centroids, ann_index.list_ids, ann_index.list_offsets))
+    if model is not None and hasattr(model, 'parameters'):
+        report['model_parameters'] = sum(p.numel() * p.element_size() for p in model.parameters())
+    report['query_embedding_cache'] = query_embedding_cache.nbytes
+    return report
+
 # ======================
 # (8) 빠른 추천을 위한 헬퍼 함수
 # ======================
+def is_semantic_ready(recommender_data):
+    """임베딩 기반(의미) 매칭을 사용할 수 있는지 반환합니다."""
+    return recommender_data['semantic'].ready
+
+# 모든 세션이 공유하는 추천 결과 캐시 (KBD_METRICS_FILE이 있으면 적중/실패 횟수도 내보냄)
+result_cache = ResultCache()
+register_collector(result_cache)
+
+def result_cache_key(input_keywords, top_n, semantic, vocabulary=None):
+    """정규화한 키워드의 중복 포함 집합 + top_n + 의미 매칭 상태
+
+    키워드는 서로 독립적으로 매핑되고 점수는 빈도만 보므로, 순서만 다른 입력은 같은 결과를 냅니다.
+    """
+    keywords = tuple(sorted(normalize_keyword(kw, vocabulary) for kw in input_keywords))
+    return keywords, top_n, semantic.backend, semantic.ready
+
 def fast_recommend(recommender_data, input_keywords, top_n=3, return_scores=False):
-    """빠른 추천을 위한 헬퍼 함수"""
-    return recommend_countries_fast(
-        input_keywords,
-        recommender_data['tfidf_transformer'],
-        recommender_data['tfidf_matrix'],
-        recommender_data['counts_df'],
-        recommender_data['model'],
-        recommender_data['keyword_embeddings'],
-        recommender_data['keyword_to_idx'],  # 미리 생성된 매핑 사용
-        top_n,
-        return_scores
-    )
+    """빠른 추천을 위한 헬퍼 함수 (모델 준비 전에는 정확 일치 매칭만 사용)
+
+    결과는 result_cache에 저장되어, 같은 키워드 조합은 데이터 버전이 바뀌거나 만료될 때까지 다시 계산하지 않습니다.
+    """
+    if not result_cache.enabled:
+        return _recommend(recommender_data, input_keywords, top_n, return_scores)
+
+    input_keywords = list(input_keywords)
+    version = recommender_data['data_version']
+    with stage('result_cache.lookup'):
+        key = result_cache_key(input_keywords, top_n, recommender_data['semantic'], recommender_data['keyword_to_idx'])
+        ranked = result_cache.get(version, key)
+    if ranked is None:
+        ranked = tuple(_recommend(recommender_data, input_keywords, top_n, return_scores=True))
+        result_cache.put(version, key, ranked)
+
+    if return_scores:
+        return list(ranked)
+    return [country for country, _ in ranked]
+
+def _recommend(recommender_data, input_keywords, top_n, return_scores):
+    model, embedding_matrix, embedding_keywords, ann_index = recommender_data['semantic'].snapshot()
+    with stage('recommend'):
+        return recommend_countries_fast(
+            input_keywords,
+            recommender_data['idf'],
+            recommender_data['tfidf_matrix'],
+            recommender_data['countries'],
+            recommender_data['keywords'],
+            model,
+            embedding_matrix,
+            embedding_keywords,
+            recommender_data['keyword_to_idx'],  # 미리 생성된 매핑 사용
+            top_n,
+            return_scores,
+            ann_index=ann_index,
+            keyword_country_table=recommender_data['keyword_country_table'],
+            lexicon=recommender_data['lexicon']
+        )
+
+RANK_CHUNK_ROWS = 1024  # 배치 순위 계산 때 한 번에 펼치는 점수 행 수 (메모리 = 행 수 × 국가 수)
+
+def top_n_indices(scores, top_n):
+    """각 행에서 점수가 높은 순서대로 top_n개의 열 인덱스를 반환합니다. (argpartition 사용)
+
+    동점은 앞선 인덱스가 먼저 오므로 안정 정렬(sorted)과 같은 순위가 나옵니다.
+    """
+    scores = np.atleast_2d(scores)
+    n_rows, n_cols = scores.shape
+    k = min(top_n, n_cols)
+    if k <= 0:
+        return np.empty((n_rows, 0), dtype=np.intp)
+
+    if k < n_cols:
+        # 전체 정렬 없이 각 행의 k번째 점수를 찾고, 그보다 큰 항목 + 경계 동점 중 앞선 항목을 선택
+        kth = np.argpartition(-scores, k - 1, axis=1)[:, k - 1:k]
+        kth_val = np.take_along_axis(scores, kth, axis=1)
+        greater = scores > kth_val
+        equal = scores == kth_val
+        needed = k - greater.sum(axis=1, keepdims=True)
+        selected = greater | (equal & (np.cumsum(equal, axis=1) <= needed))
+        candidates = np.nonzero(selected)[1].reshape(n_rows, k)
+    else:
+        candidates = np.broadcast_to(np.arange(k), (n_rows, k)).copy()
+
+    # 후보 k개만 정렬
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(candidates, order, axis=1)
+
+def fast_recommend_many(recommender_data, list_of_queries, top_n=3, return_scores=False):
+    """여러 키워드 목록을 한 번에 추천합니다. (희소 행렬 곱 한 번으로 전체 점수 계산, 점수 행렬도 희소 유지)"""
+    keyword_to_idx = recommender_data['keyword_to_idx']
+    countries = recommender_data['countries']
+    queries = [list(q) for q in list_of_queries]
+
+    # 전체 쿼리의 키워드를 한 번에 매핑 (미매핑 키워드는 한 번의 배치 encode)
+    model, embedding_matrix, embedding_keywords, ann_index = recommender_data['semantic'].snapshot()
+    flat_keywords = [kw for q in queries for kw in q]
+    flat_mapped = map_keywords(flat_keywords, model, embedding_matrix, embedding_keywords,
+                               keyword_to_idx, ann_index=ann_index, lexicon=recommender_data['lexicon'])
+
+    # 쿼리 × 키워드 빈도 희소 행렬 생성
+    with stage('batch.query_matrix'):
+        rows, cols = [], []
+        pos = 0
+        for qi, q in enumerate(queries):
+            for kw in flat_mapped[pos:pos + len(q)]:
+                if kw:
+                    rows.append(qi)
+                    cols.append(keyword_to_idx[kw])
+            pos += len(q)
+        query_counts = sp.csr_matrix(
+            (np.ones(len(rows)), (rows, cols)),
+            shape=(len(queries), len(recommender_data['keywords']))
+        )
+
+    # TF-IDF 변환 후 코사인 유사도 (두 행렬 모두 L2 정규화되어 있으므로 내적 한 번)
+    with stage('batch.score'):
+        query_tfidf = tfidf_transform(query_counts, recommender_data['idf'])
+        scores = sp.csr_matrix(query_tfidf @ recommender_data['tfidf_matrix'].T)
+
+    has_keywords = np.diff(query_counts.indptr) > 0
+    results = []
+    for chunk_start in range(0, len(queries), RANK_CHUNK_ROWS):
+        # 희소 점수 행렬에서 행 묶음만 펼쳐 argpartition (국가 수가 많아도 메모리는 묶음 크기로 제한)
+        with stage('batch.rank'):
+            chunk = scores[chunk_start:chunk_start + RANK_CHUNK_ROWS].toarray()
+            top_idx = top_n_indices(chunk, top_n)
+
+        for offset, row in enumerate(top_idx):
+            qi = chunk_start + offset
+            if not has_keywords[qi]:
+                results.append([])
+            elif return_scores:
+                results.append([(countries[j], chunk[offset, j]) for j in row])
+            else:
+                results.append([countries[j] for j in row])
+    return results
 
 # ======================
 # (9) 사용 예시
@@ -343,4 +1047,5 @@ def example_usage():
 def rebuild_tfidf_cache():
     """TF-IDF 캐시를 강제로 재빌드합니다."""
     system = initialize_recommender_system(force_rebuild=True)
+    _shared_recommender.clear()  # 다음 요청부터 모든 세션이 새 데이터를 공유
     return system
\ No newline at end of file
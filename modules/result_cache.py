@@ -0,0 +1,109 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# ======================
+# 추천 결과 캐시 (LRU + TTL)
+# ======================
+# 같은 키워드 조합이 여러 사용자에게서 반복해서 들어오므로, 프로세스 전체가 공유하는
+# 결과 캐시를 fast_recommend 앞에 둡니다.
+# - 크기 제한: 가장 오래 사용되지 않은 항목부터 제거 (LRU)
+# - 만료: 저장 후 ttl초가 지나면 다시 계산 (TTL)
+# - 버전: 데이터 버전(TF-IDF·어휘 지문)이 바뀌면 전체를 비움
+# 환경 변수 KBD_RESULT_CACHE_SIZE=0이면 캐시를 사용하지 않습니다.
+
+RESULT_CACHE_SIZE = int(os.environ.get('KBD_RESULT_CACHE_SIZE', '4096'))     # 최대 항목 수
+RESULT_CACHE_TTL = float(os.environ.get('KBD_RESULT_CACHE_TTL', '600'))      # 초
+
+class ResultCache:
+    """버전이 붙은 LRU + TTL 캐시 (여러 스레드에서 호출 가능)"""
+
+    def __init__(self, max_entries=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.version = None
+        self._entries = OrderedDict()  # key → (만료 시각, 값)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def _check_version(self, version):
+        # 호출하는 쪽이 잠금을 잡고 있어야 함
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.version = version
+
+    def get(self, version, key):
+        """캐시된 값을 반환합니다. 없거나 만료되었으면 None"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if self.clock() >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, version, key, value):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """적중/실패 횟수와 현재 크기"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'expirations': self.expirations,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+            }
+
+    def to_prometheus(self, metric='kbd_result_cache'):
+        """Prometheus 텍스트 형식의 카운터·게이지"""
+        stats = self.stats()
+        lines = []
+        for name in ('hits', 'misses', 'expirations', 'evictions', 'invalidations'):
+            lines.append(f"# TYPE {metric}_{name}_total counter")
+            lines.append(f"{metric}_{name}_total {stats[name]}")
+        lines.append(f"# TYPE {metric}_entries gauge")
+        lines.append(f"{metric}_entries {stats['size']}")
+        return '\n'.join(lines) + '\n'
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,107 @@
+import numpy as np
+
+# ======================
+# 수출 경로 (서울 → 교역국 대권 항로)
+# ======================
+# 품목 상세 분석 지도의 경로 레이어 데이터입니다. 교역국 전체의 대권(great-circle) 경로를
+# 한 번의 NumPy 배열 연산으로 계산하고, 선 굵기·색은 수출금액(로그 척도)에 비례시킵니다.
+# 결과(RouteSet)는 deck.gl 바이너리 경로 형식처럼 전체 경로의 좌표를 이어 붙인 float32 배열 + 경로 시작 위치라서
+# 집계 큐브(modules/product_cube.py)에 함께 저장됩니다. 점 간격은 중심각 ARC_STEP_DEG 이하라 가까운 나라는 점이 적고,
+# 화면에는 좌표를 소수 첫째 자리(약 10km)로 줄인 평면 좌표 배열(XY)의 PathLayer 데이터로 보냅니다.
+# 경도는 [-180, 180]이며 날짜 변경선을 넘는 구간은 PathLayer(wrap_longitude=True)가 나눠 그립니다.
+# 중심각이 큰 경로(예: 서울 → 남미 북부)는 북극 근처를 지나므로 지도에서는 고위도에서 크게 꺾여 보입니다.
+
+SEOUL_LAT, SEOUL_LON = 37.5665, 126.9780
+ARC_STEP_DEG = 5.0                        # 경로 위 점 사이의 최대 중심각 (도)
+ROUTE_WIDTH_RANGE = (1.0, 8.0)            # 선 굵기 (픽셀)
+ROUTE_COLOR_LOW = (160, 205, 255, 110)    # 수출금액이 가장 작은 경로 (RGBA)
+ROUTE_COLOR_HIGH = (0, 70, 200, 235)      # 수출금액이 가장 큰 경로
+COORD_DECIMALS = 1                        # 기본 확대(1.8)에서 1픽셀 ≈ 0.3°
+MERCATOR_MAX_LAT = 85.05                  # 웹 메르카토르 지도에 그릴 수 있는 최대 위도 (극 근처를 지나는 경로는 이 위도로 자름)
+
+def _unit_vectors(lats, lons):
+    lat, lon = np.radians(lats), np.radians(lons)
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+def great_circle_paths(dest_lats, dest_lons, origin_lat=SEOUL_LAT, origin_lon=SEOUL_LON, step_deg=ARC_STEP_DEG):
+    """출발지 → 목적지들의 대권 경로. (좌표 float32 (점 개수, [경도, 위도]), 경로 시작 위치 int64 (n + 1,))
+
+    구면 선형 보간(slerp)으로 모든 경로의 점을 한 번에 계산합니다. 경로마다 점 개수는 중심각에 비례하고
+    (최소 2개), 경도는 [-180, 180] 범위라 끝점이 지도에 보이는 세계 위에 있습니다.
+    날짜 변경선을 넘는 구간(예: 서울 → 미주)은 PathLayer의 wrap_longitude가 나눠서 그립니다.
+    """
+    dest = _unit_vectors(np.asarray(dest_lats, dtype=np.float64), np.asarray(dest_lons, dtype=np.float64))
+    origin = _unit_vectors(origin_lat, origin_lon)
+    omega = np.arccos(np.clip(dest @ origin, -1.0, 1.0))                   # 중심각 (n,)
+    counts = np.maximum(2, np.ceil(np.degrees(omega) / step_deg).astype(np.int64) + 1)
+    starts = np.concatenate([[0], np.cumsum(counts)])
+
+    route = np.repeat(np.arange(len(counts)), counts)                      # 점마다 경로 번호
+    t = (np.arange(starts[-1]) - starts[route]) / (counts[route] - 1)
+    omega = omega[route]
+    sin_omega = np.sin(omega)
+    near = sin_omega < 1e-9  # 출발지와 같은 위치 → 선형 보간
+    safe = np.where(near, 1.0, sin_omega)
+    w0 = np.where(near, 1.0 - t, np.sin((1.0 - t) * omega) / safe)
+    w1 = np.where(near, t, np.sin(t * omega) / safe)
+    points = w0[:, None] * origin + w1[:, None] * dest[route]              # (점 개수, 3)
+
+    lat = np.degrees(np.arctan2(points[:, 2], np.hypot(points[:, 0], points[:, 1])))
+    lon = np.degrees(np.arctan2(points[:, 1], points[:, 0]))               # [-180, 180]
+    return np.stack([lon, lat], axis=-1).astype(np.float32), starts
+
+def value_styles(values):
+    """수출금액 → (선 굵기 float32 (n,), RGBA uint8 (n, 4)). 로그 척도로 최소~최대를 0~1에 대응"""
+    scaled = np.log1p(np.asarray(values, dtype=np.float64))
+    span = scaled.max() - scaled.min() if len(scaled) else 0.0
+    level = (scaled - scaled.min()) / span if span > 0 else np.ones_like(scaled)
+    low_w, high_w = ROUTE_WIDTH_RANGE
+    widths = (low_w + level * (high_w - low_w)).astype(np.float32)
+    low, high = np.array(ROUTE_COLOR_LOW, dtype=np.float64), np.array(ROUTE_COLOR_HIGH, dtype=np.float64)
+    colors = np.rint(low + level[:, None] * (high - low)).astype(np.uint8)
+    return widths, colors
+
+class RouteSet:
+    """교역국별 경로 열 배열 (수출금액 오름차순 → 큰 경로가 위에 그려짐)"""
+    __slots__ = ('countries', 'values', 'coords', 'starts', 'widths', 'colors')
+
+    def __init__(self, countries, values, coords, starts, widths, colors):
+        self.countries = countries  # 국가명 list
+        self.values = values        # 수출금액 ($) int64 (n,)
+        self.coords = coords        # 전체 경로 좌표 float32 (점 개수, 2)
+        self.starts = starts        # 경로 i = coords[starts[i]:starts[i + 1]], int64 (n + 1,)
+        self.widths = widths        # float32 (n,)
+        self.colors = colors        # uint8 (n, 4)
+
+    def __len__(self):
+        return len(self.countries)
+
+    def path(self, i):
+        """경로 i의 좌표 (점 개수, [경도, 위도])"""
+        return self.coords[self.starts[i]:self.starts[i + 1]]
+
+    def layer_data(self):
+        """pydeck PathLayer용 행 목록. 경로는 평면 [x0, y0, x1, y1, ...] 배열 (position_format "XY")
+
+        좌표를 COORD_DECIMALS 자리로 반올림하고 키를 최소로 해 JSON 크기를 줄입니다.
+        """
+        coords = self.coords.astype(np.float64)
+        coords[:, 1] = np.clip(coords[:, 1], -MERCATOR_MAX_LAT, MERCATOR_MAX_LAT)
+        flat = np.round(coords, COORD_DECIMALS).ravel().tolist()
+        widths = np.round(self.widths.astype(np.float64), 1).tolist()
+        bounds = (2 * self.starts).tolist()
+        return [
+            {"country": country, "export_value_str": f"{value:,.0f}",
+             "path": flat[begin:end], "width": width, "color": color}
+            for country, value, begin, end, width, color
+            in zip(self.countries, self.values.tolist(), bounds[:-1], bounds[1:], widths, self.colors.tolist())
+        ]
+
+def build_routes(partners):
+    """교역국 표(국가명, 수출금액 ($), 위도, 경도) → RouteSet. 좌표가 없거나 수출이 없는 국가는 제외"""
+    partners = partners.dropna(subset=["위도", "경도"])
+    partners = partners[partners["수출금액 ($)"] > 0].sort_values("수출금액 ($)", kind="stable")
+    values = partners["수출금액 ($)"].to_numpy(dtype=np.int64)
+    widths, colors = value_styles(values)
+    coords, starts = great_circle_paths(partners["위도"].to_numpy(), partners["경도"].to_numpy())
+    return RouteSet(partners["국가명"].tolist(), values, coords, starts, widths, colors)
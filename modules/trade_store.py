@@ -0,0 +1,163 @@
+import json
+import os
+import tempfile
+import threading
+import pandas as pd
+import streamlit as st
+from modules.utils import file_digest
+
+# ======================
+# 무역 통계 스냅샷 저장소
+# ======================
+# 화면용 무역 통계 엑셀(.xlsx)을 시트별 Arrow IPC(Feather) 파일로 변환해 두고 페이지는 스냅샷만 읽습니다.
+# - 변환: 통합 문서를 한 번만 열어 모든 시트를 읽고, 열 타입(정수·실수·날짜·문자열)을 그대로 저장
+# - 원본이 바뀌면(크기·수정 시각 → SHA-256 확인) 다음 로딩 때 자동으로 다시 변환
+# - 시트 파일과 manifest.json 모두 임시 파일에 쓴 뒤 원자적으로 교체 → 여러 프로세스가 동시에 변환해도
+#   읽는 쪽은 이전 또는 완성된 새 스냅샷만 봄
+# - 배포 시 미리 변환: python -m scripts.ingest_trade_data
+
+SNAPSHOT_DIR = os.environ.get('KBD_SNAPSHOT_DIR', './data/snapshots')
+SNAPSHOT_SCHEMA_VERSION = 1  # 스냅샷 구조가 바뀌면 올려서 다시 변환
+
+# 스냅샷 이름 → 원본 통합 문서
+TRADE_WORKBOOKS = {
+    'cosmetic_trade': './data/화장품 수출입.xlsx',             # 품목(HS코드)별 국가 수출입 + 좌표(lat-lon)
+    'trade_3304': './data/한국무역통계포털 3304 수출입.xlsx',  # 국가별 분기 수출입 (시트 = 국가)
+    'country_info': './data/국가 정보.xlsx',                  # Trade Indicator, KPI
+}
+
+_ingest_lock = threading.Lock()
+
+def snapshot_path(name, *parts):
+    return os.path.join(SNAPSHOT_DIR, name, *parts)
+
+def read_manifest(name):
+    """스냅샷 목록(manifest.json). 없거나 형식이 다르면 None"""
+    try:
+        with open(snapshot_path(name, 'manifest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get('schema_version') == SNAPSHOT_SCHEMA_VERSION else None
+
+def _write_manifest(name, manifest):
+    path = snapshot_path(name, 'manifest.json')
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.manifest', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def _write_feather(df, path):
+    """임시 파일에 쓴 뒤 os.replace로 교체 (다른 프로세스가 같은 원본을 동시에 변환해도
+    이미 공개된 manifest로 이 파일을 읽는 쪽은 이전 또는 완성된 파일만 봄)"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.' + os.path.basename(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            df.reset_index(drop=True).to_feather(f, compression='uncompressed')
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def _source_stat(source):
+    info = os.stat(source)
+    return {'size': info.st_size, 'mtime_ns': info.st_mtime_ns}
+
+def is_fresh(name, manifest=None):
+    """스냅샷이 원본과 같은 내용에서 만들어졌는지 (원본이 없으면 있는 스냅샷을 그대로 사용)"""
+    manifest = manifest if manifest is not None else read_manifest(name)
+    if manifest is None:
+        return False
+    source = TRADE_WORKBOOKS[name]
+    if not os.path.exists(source):
+        return True
+    stat = _source_stat(source)
+    if stat == manifest['source_stat']:
+        return True
+    # 수정 시각만 바뀐 경우(git checkout 등)는 내용 해시로 확인하고 stat만 갱신
+    if file_digest(source) == manifest['source_digest']:
+        manifest['source_stat'] = stat
+        _write_manifest(name, manifest)
+        return True
+    return False
+
+def read_workbook(source):
+    """통합 문서를 한 번 열어 모든 시트를 {시트 이름: DataFrame}(시트 순서)으로 읽습니다."""
+    with pd.ExcelFile(source) as xls:
+        return {str(sheet): xls.parse(sheet) for sheet in xls.sheet_names}
+
+def ingest_workbook(name, force=False):
+    """원본 통합 문서를 시트별 Feather 파일로 변환합니다. 이미 최신이면 건너뜁니다. manifest 반환"""
+    with _ingest_lock:
+        manifest = read_manifest(name)
+        if not force and is_fresh(name, manifest):
+            return manifest
+
+        source = TRADE_WORKBOOKS[name]
+        stat = _source_stat(source)
+        digest = file_digest(source)
+        tables = read_workbook(source)
+
+        os.makedirs(snapshot_path(name), exist_ok=True)
+        sheets = []
+        for i, (sheet, df) in enumerate(tables.items()):
+            filename = f"{digest[:12]}-{i:02d}.feather"  # 원본 내용별 파일명 → 읽는 중인 이전 스냅샷을 덮어쓰지 않음
+            _write_feather(df, snapshot_path(name, filename))
+            sheets.append({'sheet': sheet, 'file': filename, 'rows': len(df),
+                           'columns': {str(col): str(dtype) for col, dtype in df.dtypes.items()}})
+
+        manifest = {
+            'schema_version': SNAPSHOT_SCHEMA_VERSION,
+            'source': os.path.basename(source),
+            'source_digest': digest,
+            'source_stat': stat,
+            'sheets': sheets,
+        }
+        _write_manifest(name, manifest)
+
+        # 새 manifest에 없는 이전 스냅샷 파일 정리
+        current = {entry['file'] for entry in sheets}
+        for filename in os.listdir(snapshot_path(name)):
+            if filename.endswith('.feather') and filename not in current:
+                try:
+                    os.remove(snapshot_path(name, filename))
+                except OSError:
+                    pass
+        return manifest
+
+def ensure_snapshot(name):
+    """최신 스냅샷을 보장하고 그 버전(원본 해시)을 반환합니다. (원본이 바뀌었으면 다시 변환)"""
+    manifest = read_manifest(name)
+    if not is_fresh(name, manifest):
+        manifest = ingest_workbook(name)
+    return manifest['source_digest']
+
+def read_snapshot(name):
+    """스냅샷을 {시트 이름: DataFrame}(시트 순서)으로 읽습니다. 스냅샷이 없으면 먼저 변환"""
+    for attempt in range(2):
+        manifest = read_manifest(name)
+        if manifest is None:
+            manifest = ingest_workbook(name)
+        try:
+            return {entry['sheet']: pd.read_feather(snapshot_path(name, entry['file']))
+                    for entry in manifest['sheets']}
+        except FileNotFoundError:
+            # 읽는 사이 다른 프로세스가 새 스냅샷으로 교체 → manifest를 다시 읽음
+            if attempt:
+                raise
+
+@st.cache_data(show_spinner=False)
+def _load_tables(name, version):
+    return read_snapshot(name)
+
+def load_tables(name):
+    """페이지용: 스냅샷의 모든 시트 (프로세스 캐시, 원본이 바뀌면 새 버전으로 다시 읽음)"""
+    return _load_tables(name, ensure_snapshot(name))
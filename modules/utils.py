@@ -1,40 +1,96 @@
+from functools import lru_cache
 from pathlib import Path
 import base64
+import hashlib
 import streamlit as st
 
 # 루트 경로 = modules의 상위 폴더(K-Beauty Direct)
 BASE_DIR = Path(__file__).resolve().parent.parent
-ASSETS_DIR = BASE_DIR / "assets"
+FONT_DIR = BASE_DIR / "static" / "fonts"
 
-def font_to_base64(filename: str) -> str:
-    path = ASSETS_DIR / filename   # 여기서는 "JalnanGothicTTF.ttf" 만 넣기
-    with open(path, "rb") as f:
-        return base64.b64encode(f.read()).decode("utf-8")
+# ======================
+# 파일
+# ======================
+def file_digest(filepath):
+    """파일 내용의 SHA-256 해시를 계산합니다."""
+    h = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
 
-def inject_fonts():
-    jalnan_gothic_font = font_to_base64("JalnanGothicTTF.ttf")
+# ======================
+# 폰트
+# ======================
+# server.enableStaticServing(.streamlit/config.toml)이 켜져 있으면 폰트는 theme.fontFaces로
+# app/static/fonts/에서 내려받고 브라우저가 캐시하므로, 스크립트는 글꼴 지정 CSS만 보냅니다.
+# 꺼져 있으면 예전처럼 base64 @font-face를 넣되, 인코딩은 프로세스당 한 번만 합니다.
+# 이때도 원본 TTF(대체) + 서브셋(unicodeRange) 두 face를 모두 넣어 서브셋 밖의 글자가 다른 폰트로 바뀌지 않게 합니다.
+# 서브셋(JalnanGothic-subset.woff2)은 python -m scripts.subset_fonts로 만듭니다.
 
-    st.markdown(f"""
-        <style>
-        @font-face {{
-            font-family: 'JalnanGothic';
-            src: url(data:font/ttf;base64,{jalnan_gothic_font}) format('truetype');
-            font-weight: 400;
-        }}
+FONT_FAMILY = "JalnanGothic"
+FONT_FILE = "JalnanGothicTTF.ttf"
+SUBSET_FONT_FILE = "JalnanGothic-subset.woff2"
 
-        main, [role="main"], div[role="main"], section[data-testid="stAppViewContainer"], .block-container {{
+FONT_RULES = """
+        main, [role="main"], div[role="main"], section[data-testid="stAppViewContainer"], .block-container {
             font-family: 'JalnanGothic', sans-serif !important;
-        }}
+        }
 
-        h1, h2, h3, h4, h5, h6, p {{
+        h1, h2, h3, h4, h5, h6, p {
             font-family: 'JalnanGothic', sans-serif !important;
-        }}
+        }
 
         /* 사이드바 아이콘만 Source Sans Pro 적용 */
-        section[data-testid="stSidebar"] [data-testid="stSidebarNav"] svg, 
-        section[data-testid="stSidebar"] [data-testid="stSidebarNav"] span {{
+        section[data-testid="stSidebar"] [data-testid="stSidebarNav"] svg,
+        section[data-testid="stSidebar"] [data-testid="stSidebarNav"] span {
             font-family: 'Source Sans Pro', sans-serif !important;
+        }
+"""
+
+@lru_cache(maxsize=None)
+def font_to_base64(filename: str) -> str:
+    path = FONT_DIR / filename
+    with open(path, "rb") as f:
+        return base64.b64encode(f.read()).decode("utf-8")
+
+def subset_unicode_range() -> str:
+    """config.toml의 theme.fontFaces(scripts/subset_fonts.py가 생성)에 적힌 서브셋의 unicodeRange"""
+    for face in st.get_option("theme.fontFaces") or []:
+        if str(face.get("url", "")).endswith(SUBSET_FONT_FILE):
+            return face.get("unicodeRange") or ""
+    return ""
+
+def base64_font_face(filename: str, fmt: str, unicode_range: str = "") -> str:
+    mime = "ttf" if fmt == "truetype" else fmt
+    range_rule = f"\n            unicode-range: {unicode_range};" if unicode_range else ""
+    return f"""
+        @font-face {{
+            font-family: '{FONT_FAMILY}';
+            src: url(data:font/{mime};base64,{font_to_base64(filename)}) format('{fmt}');
+            font-weight: 400;{range_rule}
         }}
+"""
 
-        </style>
-    """, unsafe_allow_html=True)
+@lru_cache(maxsize=None)
+def inline_font_face() -> str:
+    """static 제공이 꺼져 있을 때 쓰는 base64 @font-face (원본 TTF + 서브셋)
+
+    같은 family의 @font-face는 나중에 선언된 것이 먼저 검사되므로 원본(대체)을 먼저, 서브셋을 나중에 둡니다.
+    서브셋의 unicodeRange를 알 수 없으면 서브셋이 원본을 가리므로 원본만 넣습니다.
+    """
+    faces = ""
+    if (FONT_DIR / FONT_FILE).exists():
+        faces += base64_font_face(FONT_FILE, "truetype")
+    unicode_range = subset_unicode_range()
+    if (FONT_DIR / SUBSET_FONT_FILE).exists() and (unicode_range or not faces):
+        faces += base64_font_face(SUBSET_FONT_FILE, "woff2", unicode_range)
+    return faces
+
+@lru_cache(maxsize=4)
+def font_css(static_serving: bool) -> str:
+    font_face = "" if static_serving else inline_font_face()
+    return f"<style>{font_face}{FONT_RULES}</style>"
+
+def inject_fonts():
+    st.markdown(font_css(bool(st.get_option("server.enableStaticServing"))), unsafe_allow_html=True)
@@ -1,10 +1,12 @@
 import streamlit as st
-import pandas as pd
 import os
+import time
 import plotly.express as px
 import plotly.graph_objects as go
-import requests
-import json
+from plotly.subplots import make_subplots
+from modules.country_pages import COUNTRY_ISO_CODES, detail_countries
+from modules.legal_jobs import LEGAL_POLL_INTERVAL, get_legal_queue
+from modules.trade_store import ensure_snapshot, load_tables
 from modules.utils import inject_fonts
 
 inject_fonts() # 폰트 설정
@@ -13,97 +15,50 @@ st.set_page_config(page_title="국가 상세 분석", layout="wide")
 
 st.title("🌎 국가별 상세 분석")
 
-@st.cache_data
-def load_excel(path):
-    trade_df = pd.read_excel(path, sheet_name="Trade Indicator")
-    kpi_df = pd.read_excel(path, sheet_name="KPI")
-    return trade_df, kpi_df
-
-# n8n 웹훅 호출
-@st.cache_data(ttl=3600, show_spinner=False)
-def get_legal_info(country_name):
-    """n8n 워크플로우를 호출하여 법률 정보를 가져오는 함수"""
-    webhook_url = "https://threej.app.n8n.cloud/webhook/legal-info-webhook"
-    payload = {"query": {"country": country_name}}
-
-    try:
-        with st.spinner(f'{country_name}의 최근 화장품 수출 관련 법률 정보를 분석 중입니다... (최대 10분 소요됩니다)'):
-            response = requests.post(
-                webhook_url,
-                json=payload,
-                headers={"Content-Type": "application/json"},
-                timeout=300 
-            )
-            response.raise_for_status()  
-
-            if not response.text.strip():
-                return "오류: n8n에서 빈 응답을 받았습니다. 워크플로우를 확인해주세요."
-
-            data = response.json()
-
-            if data.get('success'):
-                return data.get('summary', '오류: 응답에 요약 정보가 없습니다.')
-            else:
-                return data.get('message', "선택한 국가의 법률 정보 데이터가 없습니다.")
-
-    except requests.exceptions.Timeout:
-        return "오류: 요청 시간이 초과되었습니다. n8n 워크플로우 실행이 너무 오래 걸립니다."
-    except requests.exceptions.ConnectionError:
-        return f"오류: n8n 서버에 연결할 수 없습니다. URL: {webhook_url}"
-    except requests.exceptions.HTTPError as e:
-        return f"서버 오류: {e.response.status_code} 응답. n8n 워크플로우 에러를 확인하세요."
-    except json.JSONDecodeError:
-        return f"오류: n8n 응답을 파싱할 수 없습니다. 응답 내용: {response.text[:200]}"
-    except Exception as e:
-        return f"알 수 없는 오류가 발생했습니다: {str(e)}"
-    
-trade_df, kpi_df = load_excel("data/국가 정보.xlsx")
-
-countries = ["미국", "베트남", "브라질", "영국", "인도", "인도네시아",
-             "일본", "중국", "태국", "튀르키예", "프랑스", "UAE"]
+kpi_df = load_tables("country_info")["KPI"]  # data/국가 정보.xlsx 스냅샷 (Trade Indicator 시트는 아래 그림 캐시에서 사용)
+
+countries = detail_countries()  # KPI 시트에 있는 국가
 
 selected_country_name = st.session_state.get("selected_country", "미국")
 
 selected_country = st.selectbox(
     "국가 선택",
     options=countries,
-    index=countries.index(selected_country_name)
+    index=countries.index(selected_country_name) if selected_country_name in countries else 0
     # key="selected_country"                    
 )
 
-# 국가가 변경시 정보 초기화
+# 국가가 변경시 선택 국가 갱신 (법률 요약은 국가별 작업으로 보관되므로 따로 초기화하지 않음)
 if st.session_state.get("selected_country") != selected_country:
     st.session_state.selected_country = selected_country
-    if 'legal_info' in st.session_state:
-        del st.session_state.legal_info
-    if 'legal_info_loaded' in st.session_state:
-        del st.session_state.legal_info_loaded
-
-country_code_map = {
-    "미국": "US", "베트남": "VN", "브라질": "BR", "영국": "GB",
-    "인도": "IN", "인도네시아": "ID", "일본": "JP", "중국": "CN",
-    "태국": "TH", "튀르키예": "TR", "프랑스": "FR", "UAE": "AE"
-}
+
+country_code = COUNTRY_ISO_CODES.get(selected_country)
 
 img_path = os.path.join("data", "img", f"{selected_country}.jpg")
-img = f"https://www.kotra.or.kr/bigdata/resources/images/nation/{country_code_map[selected_country]}.jpg"
-url = f'https://www.kotra.or.kr/bigdata/marketAnalysis#search/{country_code_map[selected_country]}'
+img = f"https://www.kotra.or.kr/bigdata/resources/images/nation/{country_code}.jpg"
+url = f'https://www.kotra.or.kr/bigdata/marketAnalysis#search/{country_code}'
 
 # 국기, KPI 카드
 col1, col2, col3 = st.columns([0.6, 2.2, 1.2])  
 
 with col1:
-    st.markdown(
-        f"""
-        <div style="text-align:center; margin-top:10px;">
-            <a href="{url}" target="_blank">
-                <img src="{img}" width="180px" style="margin:10px 20px 5px 20px; padding:10px;">
-            </a>
-            <div style="color:#555555;font-family:'JalnanGothic'">{selected_country} ({country_code_map[selected_country]})</div>
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
+    if country_code is not None:
+        st.markdown(
+            f"""
+            <div style="text-align:center; margin-top:10px;">
+                <a href="{url}" target="_blank">
+                    <img src="{img}" width="180px" style="margin:10px 20px 5px 20px; padding:10px;">
+                </a>
+                <div style="color:#555555;font-family:'JalnanGothic'">{selected_country} ({country_code})</div>
+            </div>
+            """,
+            unsafe_allow_html=True
+        )
+    else:  # ISO 코드가 등록되지 않은 국가는 국기 없이 이름만 표시
+        st.markdown(
+            f"""<div style="text-align:center; margin-top:10px; color:#555555;font-family:'JalnanGothic'">{selected_country}</div>""",
+            unsafe_allow_html=True
+        )
 
 
 with col3:
@@ -161,57 +116,73 @@ product_options = {
 }
 default_index = 0
 
+def gauge_color(val):
+    if val <= 3:
+        return "#FFA8A8"  # 연한 빨강 (파스텔)
+    elif val <= 7:
+        return "#FFF29A"  # 연한 노랑
+    return "#A8E6CF"  # 연한 초록
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def indicator_figures(country, hscode, version):
+    """(레이더 차트, 지표 게이지 묶음) 그림 dict. 데이터가 없으면 None
+
+    국가·HS코드·데이터 버전마다 한 번만 만들고, 세션마다 복사본을 받도록 Figure 대신 dict로 캐시합니다.
+    """
+    trade_df = load_tables("country_info")["Trade Indicator"]
+    row = trade_df[(trade_df["국가"] == country) & (trade_df["HSCODE"] == hscode)]
+    if row.empty:
+        return None
+    radar_data = row.melt(id_vars=["국가", "HSCODE"],var_name="지표",value_name="값")
+
+    radar = px.line_polar(radar_data, r="값", theta="지표", line_close=True, hover_name="지표", hover_data={"값": True}, color_discrete_sequence=["#D6B3FF"])
+    radar.update_traces(fill="toself")
+    radar.update_layout(
+        polar=dict(radialaxis=dict(visible=True, range=[0, 10])),
+        dragmode=False,  # 확대/이동 비활성화
+        font=dict(family="JalnanGothic")
+    )
+
+    # 지표 게이지를 3열 subplot 그림 하나로 (지표마다 차트를 따로 보내지 않도록)
+    n_rows = -(-len(radar_data) // 3)
+    gauges = make_subplots(
+        rows=n_rows, cols=3,
+        specs=[[{"type": "indicator"}] * 3 for _ in range(n_rows)],
+        subplot_titles=list(radar_data["지표"]),
+        vertical_spacing=0.25,
+    )
+    for k, (label, val) in enumerate(zip(radar_data["지표"], radar_data["값"])):
+        gauges.add_trace(go.Indicator(
+            mode="gauge+number",
+            value=val,
+            number={'valueformat': '.1f', 'font': {'color': '#111111'}},
+            title=None,
+            gauge={
+                'axis': {'range': [0, 10], 'dtick': 11},
+                'bar': {'color': gauge_color(val), 'thickness': 1},
+                'bordercolor': "#D3D3D3"
+            }
+        ), row=k // 3 + 1, col=k % 3 + 1)
+    gauges.update_annotations(font=dict(size=20, color="#31333F"), yshift=10)
+    gauges.update_layout(height=220 * n_rows, margin=dict(t=40, b=0, l=20, r=20), font=dict(family="JalnanGothic"))
+    return radar.to_dict(), gauges.to_dict()
+
 col1, col2 = st.columns([1.5, 3]) 
 with col1:
     dropdown_options = list(product_options.keys())
     selected_product = st.selectbox("제품 선택", dropdown_options, index=0)
     selected_hscode = product_options[selected_product]
     # selected_hscode = st.selectbox("HS CODE 선택", available_hscodes, index=default_index)
-    row = trade_df[(trade_df["국가"] == selected_country) & (trade_df["HSCODE"] == selected_hscode)]
-    if not row.empty:
-        radar_data = row.melt(id_vars=["국가", "HSCODE"],var_name="지표",value_name="값")
-        fig = px.line_polar(radar_data, r="값", theta="지표", line_close=True, hover_name="지표", hover_data={"값": True}, color_discrete_sequence=["#D6B3FF"])
-        fig.update_traces(fill="toself")
-        fig.update_layout(
-            polar=dict(radialaxis=dict(visible=True, range=[0, 10])),
-            dragmode=False,  # 확대/이동 비활성화
-            font=dict(family="JalnanGothic")
-        )
-        st.plotly_chart(fig, use_container_width=True)
+    figures = indicator_figures(selected_country, selected_hscode, ensure_snapshot("country_info"))
+    if figures is not None:
+        st.plotly_chart(figures[0], use_container_width=True)
     else:
         st.warning("선택한 국가와 HS CODE 데이터가 없습니다.")
 
 with col2:
     st.markdown("-----")
-    if not row.empty:
-        radar_data = row.melt(id_vars=["국가", "HSCODE"],var_name="지표",value_name="값")
-
-        for i in range(0, len(radar_data), 3):
-            cols = st.columns([1, 1, 1])
-            for j, (_, r) in enumerate(radar_data.iloc[i:i+3].iterrows()):
-                with cols[j]:
-                    st.markdown(f'#### {r["지표"]}') 
-                    val = r["값"]
-                    if val <= 3:
-                        bar_color = "#FFA8A8"  # 연한 빨강 (파스텔)
-                    elif val <= 7:
-                        bar_color = "#FFF29A"  # 연한 노랑
-                    else:
-                        bar_color = "#A8E6CF"  # 연한 초록
-                    fig = go.Figure(go.Indicator(
-                        mode="gauge+number",
-                        value=r["값"],
-                        number={'valueformat': '.1f', 'font': {'color': '#111111'}},
-                        title=None,
-                        gauge={
-                            'axis': {'range': [0, 10], 'dtick': 11},
-                            'bar': {'color': bar_color, 'thickness': 1},            
-                            'bordercolor': "#D3D3D3"
-                        }
-                    ))
-                    fig.update_layout(height=150, width=270, margin=dict(t=0, b=0, l=0, r=0), font=dict(family="JalnanGothic"))
-                    st.plotly_chart(fig, use_container_width=False, key=f'gauge_{i}_{j}')
-                
+    if figures is not None:
+        st.plotly_chart(figures[1], use_container_width=True, key="indicator_gauges")
     else:
         st.warning("선택한 국가와 HS CODE 데이터가 없습니다.")
 
@@ -220,41 +191,45 @@ st.markdown("---")
 
 st.title("⚖️ 화장품 수출 관련 법률 정보")
 
-# 현재 국가와 이전에 검색한 국가가 다르면 초기화
-if 'legal_info_country' not in st.session_state or st.session_state.legal_info_country != selected_country:
-    st.session_state.legal_info_loaded = False
-    st.session_state.legal_info = ""
-    st.session_state.legal_info_country = selected_country
-
-# if 'legal_info_loaded' not in st.session_state:
-#     st.session_state.legal_info_loaded = False
-#     st.session_state.legal_info = ""
+# 법률 요약은 백그라운드 작업으로 실행 (스크립트 스레드는 기다리지 않고, 아래 영역만 주기적으로 상태 확인)
+legal_queue = get_legal_queue()
+legal_job = legal_queue.get(selected_country)
 
 if st.button("📖 법률 요약하기", key="get_legal_summary", type="primary"):
-    summary = get_legal_info(selected_country)
-    st.session_state.legal_info = summary
-    st.session_state.legal_info_loaded = True
-    st.session_state.legal_info_country = selected_country  # 검색한 국가 저장
-    st.rerun() 
-
-if not st.session_state.legal_info_loaded:
-    st.info(f"'{selected_country}' 국가의 화장품 수출 관련 법률 정보를 분석하려면 위의 '법률 요약하기' 버튼을 클릭하세요.")
-else:
-    result = st.session_state.legal_info
-
-    is_error = isinstance(result, str) and result.startswith(("오류:", "서버 오류", "네트워크 오류", "알 수 없는 오류", "요청 시간이 초과", "법률 정보 처리 실패", "선택한 국가의"))
-    
-    if is_error:
-        st.error(result)
+    legal_job = legal_queue.submit(selected_country)
+
+def show_legal_job(job, was_pending):
+    # job은 작업자 스레드가 직접 갱신하는 객체이므로 다시 실행될 때마다 최신 상태를 보여줌
+    country = job.country
+    if job.pending:
+        state = "대기 중" if job.status == 'queued' else "분석 중"
+        st.info(f"⏳ {country}의 최근 화장품 수출 관련 법률 정보를 {state}입니다... "
+                f"({job.elapsed():.0f}초 경과, 최대 10분 소요됩니다. 다른 화면을 보셔도 작업은 계속됩니다.)")
+        return
+    if was_pending:
+        st.rerun()  # 작업이 끝났으면 전체를 다시 그려 상태 확인을 멈춤
+
+    if job.status == 'failed':
+        st.error(job.result)
         if st.button("🔄 다시 시도", key="retry_legal_info"):
-            get_legal_info.clear()
-            st.session_state.legal_info_loaded = False
-            st.session_state.legal_info = ""
-            # 국가는 그대로 유지 (현재 국가로 다시 시도하는 것이므로)
+            legal_queue.submit(country, force=True)
             st.rerun()
     else:
+        fetched = time.strftime('%Y-%m-%d %H:%M', time.localtime(job.finished_at))
+        if legal_queue.refreshing(country):
+            st.caption(f"🔄 {fetched} 기준 결과입니다. 최신 정보로 갱신 중이며, 다음 방문 때 반영됩니다.")
+        else:
+            st.caption(f"{fetched} 기준")
         st.markdown("---")
-        st.markdown(result, unsafe_allow_html=True)
+        st.markdown(job.result, unsafe_allow_html=True)
+
+if legal_job is None:
+    st.info(f"'{selected_country}' 국가의 화장품 수출 관련 법률 정보를 분석하려면 위의 '법률 요약하기' 버튼을 클릭하세요.")
+else:
+    # 작업이 끝나기 전까지만 LEGAL_POLL_INTERVAL초마다 이 영역을 다시 실행
+    st.fragment(run_every=LEGAL_POLL_INTERVAL if legal_job.pending else None)(show_legal_job)(
+        legal_job, legal_job.pending
+    )
 
 
 st.markdown(
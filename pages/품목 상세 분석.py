@@ -2,6 +2,8 @@ import streamlit as st
 import pandas as pd
 import pydeck as pdk
 import altair as alt
+from modules.chart_specs import vega_lite_spec
+from modules.product_cube import load_product_cube
 from modules.utils import inject_fonts
 
 inject_fonts() # 폰트 설정
@@ -20,18 +22,8 @@ product_name = product_options[product_code]
 
 st.title(f"📊 화장품 품목 상세 분석")
 
-# 캐시된 데이터 로딩 함수
-@st.cache_data
-def load_excel(file_path: str):
-    xls = pd.ExcelFile(file_path)
-    data_dict = {}
-    for sheet in xls.sheet_names:
-        data_dict[sheet] = pd.read_excel(file_path, sheet_name=sheet)
-    return data_dict
-
-excel_file = "data/화장품 수출입.xlsx"
-data = load_excel(excel_file)
-country_coords = data["lat-lon"]
+# 캐시된 집계 큐브 로딩 (data/화장품 수출입.xlsx에서 (품목, 기준연월)별로 미리 계산)
+cube = load_product_cube()
 
 # 조회 기준 설정
 available_periods = pd.date_range(start="2025-01-01", end="2025-07-01", freq="MS")  
@@ -97,40 +89,26 @@ if needs_rerun:
     st.rerun()
     st.stop()  # 이후 코드 실행 방지
 
-df = data[str(product_code)]
-df["기준연월"] = pd.to_datetime(df["조회기준"])
-df["수출금액 (천$)"] = df["수출금액 ($)"]/1000
-
-# 데이터 필터링 (상위 10개)
-filtered = df[df["기준연월"] == selected_period].nsmallest(10, "순위")
-
-# 좌표 join
-merged = pd.merge(filtered, country_coords, on="국가명", how="left")
-
-# Path Map 그리기 (서울 ↔ 국가)
-SEOUL_LAT, SEOUL_LON = 37.5665, 126.9780
+# 선택한 품목·기준연월의 집계 (상위 10개국, TOP 5, 증감률 TOP 5, 교역국 경로)
+summary = cube.get(product_code, selected_period)
 
-# PathLayer
-path_data = []
-for _, row in merged.iterrows():
-    path_data.append({
-        "country": row["국가명"],
-        "export_value": row["수출금액 ($)"],
-        "export_value_str": f"{row['수출금액 ($)']:,.0f}",
-        "path": [
-            [SEOUL_LON, SEOUL_LAT],   # 출발 (서울)
-            [row["경도"], row["위도"]]  # 도착 (국가)
-        ]
-    })
+# Path Map 그리기 (서울 → 전체 교역국 대권 경로, 큐브에서 미리 계산)
+@st.cache_data(show_spinner=False)
+def route_layer_data(product_code: str, period, version: str):
+    # 선 굵기·색은 수출금액(로그 척도)에 비례, 수출금액이 큰 경로가 위에 그려짐
+    return load_product_cube().get(product_code, period).routes.layer_data()
 
 path_layer = pdk.Layer(
     "PathLayer",
-    data=path_data,
+    id="trade-routes",  # 고정 id → 선택을 바꿔도 deck.gl이 같은 레이어의 데이터만 갱신
+    data=route_layer_data(product_code, selected_period, cube.source_digest),
     get_path="path",
-    get_color=[0, 128, 255],
-    get_width=15,
-    width_scale=20,
-    width_min_pixels=2,
+    position_format=pdk.types.String("XY"),  # 경로 = 평면 [경도, 위도, 경도, 위도, ...] 배열
+    wrap_longitude=True,  # 경도는 [-180, 180] → 날짜 변경선을 넘는 구간(서울 → 미주)은 나눠서 그림
+    get_color="color",
+    get_width="width",
+    width_units=pdk.types.String("pixels"),
+    cap_rounded=True,
     pickable=True
 )
 
@@ -151,91 +129,65 @@ st.pydeck_chart(pdk.Deck(
     tooltip={"text": "국가: {country}\n수출금액 ($): {export_value_str}"}
 ))
 
-# 1. 한국 → 전세계 수출금액 추이
-df_total = df.groupby("기준연월", as_index=False)["수출금액 (천$)"].sum()
-
-chart1 = (
-    alt.Chart(df_total)
-    .mark_area(color="steelblue", opacity=0.4)
-    .encode(
-        x=alt.X("yearmonth(기준연월):T", title="기간", axis=alt.Axis(format="%Y년 %m월")),
-        y=alt.Y("sum(수출금액 (천$)):Q", title="수출금액 (천$)", axis=alt.Axis(format="~s"), 
-                scale=alt.Scale(domain=[df_total["수출금액 (천$)"].min() - 2000, df_total["수출금액 (천$)"].max() + 2000])),
-        tooltip=["기준연월:T", "수출금액 (천$):Q"]
-    )
-    .properties(width=400, height=400)
-    .configure_axis(
-        labelFont="JalnanGothic",
-        titleFont="JalnanGothic"
-    )
-    .configure_legend(
-        labelFont="JalnanGothic",
-        titleFont="JalnanGothic"
-    )
-    .configure_title(
-        font="JalnanGothic"
-    )
-)
-
-# 2. 교역지역 TOP 5
-df_top5 = filtered.nlargest(5, "수출금액 (천$)")
-
-bar_chart = (
-    alt.Chart(df_top5)
-    .mark_bar(color="orange")
-    .encode(
-        x=alt.X("수출금액 (천$):Q", axis=alt.Axis(format="~s"), title="수출금액 (천$)"),
-        y=alt.Y("국가명:N", sort="-x", title="국가"),
-        tooltip=["국가명", "수출금액 (천$)"]
-    ).properties(width=400, height=400)
-    .configure_axis(
-        labelFont="JalnanGothic",
-        titleFont="JalnanGothic"
-    )
-    .configure_legend(
-        labelFont="JalnanGothic",
-        titleFont="JalnanGothic"
+# 차트 스펙은 (품목, 기준연월, 데이터 버전)마다 한 번만 만들고 이후 실행은 캐시된 Vega-Lite 스펙을 그림
+@st.cache_data(show_spinner=False)
+def total_chart_spec(product_code: str, version: str):
+    # 1. 한국 → 전세계 수출금액 추이
+    df_total = load_product_cube().totals[product_code]
+
+    chart1 = (
+        alt.Chart(df_total)
+        .mark_area(color="steelblue", opacity=0.4)
+        .encode(
+            x=alt.X("yearmonth(기준연월):T", title="기간", axis=alt.Axis(format="%Y년 %m월")),
+            y=alt.Y("sum(수출금액 (천$)):Q", title="수출금액 (천$)", axis=alt.Axis(format="~s"), 
+                    scale=alt.Scale(domain=[df_total["수출금액 (천$)"].min() - 2000, df_total["수출금액 (천$)"].max() + 2000])),
+            tooltip=["기준연월:T", "수출금액 (천$):Q"]
+        )
+        .properties(width=400, height=400)
+        .configure_axis(
+            labelFont="JalnanGothic",
+            titleFont="JalnanGothic"
+        )
+        .configure_legend(
+            labelFont="JalnanGothic",
+            titleFont="JalnanGothic"
+        )
+        .configure_title(
+            font="JalnanGothic"
+        )
     )
-    .configure_title(
-        font="JalnanGothic"
+    return vega_lite_spec(chart1)
+
+@st.cache_data(show_spinner=False)
+def period_chart_specs(product_code: str, period, version: str):
+    summary = load_product_cube().get(product_code, period)
+
+    # 2. 교역지역 TOP 5
+    bar_chart = (
+        alt.Chart(summary.top5)
+        .mark_bar(color="orange")
+        .encode(
+            x=alt.X("수출금액 (천$):Q", axis=alt.Axis(format="~s"), title="수출금액 (천$)"),
+            y=alt.Y("국가명:N", sort="-x", title="국가"),
+            tooltip=["국가명", "수출금액 (천$)"]
+        ).properties(width=400, height=400)
+        .configure_axis(
+            labelFont="JalnanGothic",
+            titleFont="JalnanGothic"
+        )
+        .configure_legend(
+            labelFont="JalnanGothic",
+            titleFont="JalnanGothic"
+        )
+        .configure_title(
+            font="JalnanGothic"
+        )
     )
-)
-
-col1, col2, col3 = st.columns(3)
-
-with col1:
-    st.markdown("### 한국 → 전세계 수출금액 추이")
-    st.altair_chart(chart1, use_container_width=True)
-
-with col2:
-    st.markdown("### 교역 지역 TOP 5")
-    st.altair_chart(bar_chart, use_container_width=True)
-
-with col3:
-    st.markdown("### 전월 대비 교역 증가 TOP 5")
-    st.markdown(" ")
-
-    df_sorted = df.sort_values("기준연월")
-    df_sorted['증감률'] = df_sorted['수출 증감률']*100
-
-    period_range = pd.date_range(start=selected_period - pd.DateOffset(months=4), end=selected_period, freq="MS")
-
-    df_recent = df_sorted[(df_sorted["기준연월"] >= period_range.min()) & (df_sorted["기준연월"] <= period_range.max())]
-
-    # 최근 5개월 동안 데이터가 모두 있는 국가만 필터링
-    valid_countries = df_recent.groupby("국가명")["기준연월"].nunique().loc[lambda x: x == 5].index
-
-    df_recent_valid = df_recent[df_recent["국가명"].isin(valid_countries)]
-    df_selected = df_recent_valid[df_recent_valid["기준연월"] == selected_period].dropna(subset=["증감률"])
-    df_growth_top5 = df_selected.nlargest(5, "증감률")
-
-    # 국가별 반복 출력
-    for _, row in enumerate(df_growth_top5.itertuples(), start=1):
-        country = row.국가명
-        latest_growth = row.증감률
-
-        df_country = df_recent_valid[df_recent_valid["국가명"] == country]
 
+    # 3. 전월 대비 교역 증가 TOP 5 (국가별 최근 5개월 증감률 추이)
+    growth_specs = []
+    for country, latest_growth, df_country in summary.growth_top5:
         chart = (
             alt.Chart(df_country)
             .mark_line(point=True)
@@ -255,17 +207,38 @@ with col3:
                 labels=False   # 레이블 제거
             )
         )
+        growth_specs.append((country, latest_growth, vega_lite_spec(chart)))
+    return vega_lite_spec(bar_chart), growth_specs
+
+total_spec = total_chart_spec(product_code, cube.source_digest)
+bar_spec, growth_specs = period_chart_specs(product_code, selected_period, cube.source_digest)
+
+col1, col2, col3 = st.columns(3)
+
+with col1:
+    st.markdown("### 한국 → 전세계 수출금액 추이")
+    st.vega_lite_chart(spec=total_spec, use_container_width=True)
+
+with col2:
+    st.markdown("### 교역 지역 TOP 5")
+    st.vega_lite_chart(spec=bar_spec, use_container_width=True)
+
+with col3:
+    st.markdown("### 전월 대비 교역 증가 TOP 5")
+    st.markdown(" ")
 
+    # 국가별 반복 출력 (최근 5개월 데이터가 모두 있는 국가 중 증감률 TOP 5, 큐브에서 미리 계산)
+    for country, latest_growth, spark_spec in growth_specs:
         col1, col2, col3, col4 = st.columns([0.5, 2, 2, 1.5])
         with col1:
             st.markdown(" ")
         with col2:
             st.markdown(f"**{country}**")
         with col3:
-            st.altair_chart(chart, use_container_width=True)
+            st.vega_lite_chart(spec=spark_spec, use_container_width=True)
         with col4:
             st.markdown(f"{latest_growth:.2f}%")            
 
 # 데이터 표
 st.subheader(f"📑 {product_options[product_code]} 상위 10개국 ({selected_period.strftime('%Y년 %m월')})")
-st.dataframe(filtered[["순위", "국가명", "수출금액 ($)", "수출 점유율", "수출 증감률"]], hide_index=True)
+st.dataframe(summary.top10[["순위", "국가명", "수출금액 ($)", "수출 점유율", "수출 증감률"]], hide_index=True)
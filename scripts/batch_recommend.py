@@ -0,0 +1,88 @@
+"""키워드 목록 파일을 읽어 국가 추천 결과를 일괄 계산합니다.
+
+사용법 (프로젝트 루트에서 실행):
+    python -m scripts.batch_recommend queries.csv results.csv --top-n 5
+    python -m scripts.batch_recommend queries.jsonl results.jsonl
+
+입력 형식
+- CSV: `keywords` 컬럼(쉼표로 구분된 키워드)과 선택적인 `id` 컬럼
+- JSONL: 한 줄에 {"id": ..., "keywords": ["vegan", "organic"]} 또는 "vegan, organic"
+
+출력 형식 (확장자로 결정)
+- CSV: id, rank, country, score
+- JSONL: {"id": ..., "recommendations": [{"country": ..., "score": ...}, ...]}
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from modules.recommender import initialize_recommender_system, fast_recommend_many
+
+def split_keywords(value):
+    if isinstance(value, list):
+        return [str(kw).strip() for kw in value if str(kw).strip()]
+    return [kw.strip() for kw in str(value or '').split(',') if kw.strip()]
+
+def read_queries(path):
+    """(id, keywords) 목록을 읽습니다."""
+    queries = []
+    if path.endswith('.jsonl'):
+        with open(path, encoding='utf-8') as f:
+            for i, line in enumerate(f):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                queries.append((record.get('id', i), split_keywords(record.get('keywords'))))
+    else:
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            for i, row in enumerate(csv.DictReader(f)):
+                queries.append((row.get('id') or i, split_keywords(row.get('keywords'))))
+    return queries
+
+def write_results(path, ids, results):
+    if path.endswith('.jsonl'):
+        with open(path, 'w', encoding='utf-8') as f:
+            for qid, ranked in zip(ids, results):
+                record = {
+                    'id': qid,
+                    'recommendations': [{'country': c, 'score': round(float(s), 6)} for c, s in ranked],
+                }
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    else:
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['id', 'rank', 'country', 'score'])
+            for qid, ranked in zip(ids, results):
+                for rank, (country, score) in enumerate(ranked, start=1):
+                    writer.writerow([qid, rank, country, f"{float(score):.6f}"])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="키워드 목록 파일로 국가 추천을 일괄 계산합니다.")
+    parser.add_argument('input', help="입력 파일 (.csv 또는 .jsonl)")
+    parser.add_argument('output', help="출력 파일 (.csv 또는 .jsonl)")
+    parser.add_argument('--top-n', type=int, default=3, help="쿼리별 추천 국가 수 (기본 3)")
+    parser.add_argument('--chunk-size', type=int, default=10000, help="한 번에 점수를 계산할 쿼리 수")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input):
+        parser.error(f"입력 파일을 찾을 수 없습니다: {args.input}")
+
+    start = time.perf_counter()
+    system = initialize_recommender_system()
+    queries = read_queries(args.input)
+    print(f"초기화 완료 ({time.perf_counter() - start:.1f}초), 쿼리 {len(queries)}개", file=sys.stderr)
+
+    start = time.perf_counter()
+    ids = [qid for qid, _ in queries]
+    results = []
+    for i in range(0, len(queries), args.chunk_size):
+        chunk = [keywords for _, keywords in queries[i:i + args.chunk_size]]
+        results.extend(fast_recommend_many(system, chunk, top_n=args.top_n, return_scores=True))
+    write_results(args.output, ids, results)
+    print(f"추천 완료 ({time.perf_counter() - start:.2f}초) → {args.output}", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
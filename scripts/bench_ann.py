@@ -0,0 +1,87 @@
+"""임베딩 fallback의 ANN(IVF) 검색과 전체 탐색을 비교합니다. (재현율 vs 지연 시간)
+
+사용법 (프로젝트 루트에서 실행):
+    python -m scripts.bench_ann                          # 저장된 키워드 임베딩 사용
+    python -m scripts.bench_ann --synthetic 200000       # 임의로 생성한 20만 개 키워드
+    python -m scripts.bench_ann --n-probe 1 4 8 16 32 --top-k 5
+
+쿼리는 어휘 임베딩에 잡음을 더해 만들며(오타·유사어 입력을 흉내),
+정확 탐색 결과 대비 recall@k와 쿼리당 지연 시간(p50/p99)을 출력합니다.
+임베딩이 같은 키워드가 여럿일 수 있으므로, 정확 탐색의 k번째 유사도 이상인 결과를 적중으로 셉니다.
+"""
+import argparse
+import time
+import numpy as np
+
+from modules.ann_index import IVFIndex
+from modules.embedding_store import EmbeddingStore, normalize_rows
+from modules.recommender import EMBEDDING_STORE_PREFIX
+
+def synthetic_embeddings(n, dim, n_topics, rng):
+    """주제(군집) 구조가 있는 임의 임베딩"""
+    topics = normalize_rows(rng.standard_normal((n_topics, dim)))
+    assign = rng.integers(0, n_topics, n)
+    spread = rng.standard_normal((n, dim)).astype(np.float32) * (2.0 / np.sqrt(dim))
+    return normalize_rows(topics[assign] + spread)
+
+def exact_search(matrix, query, top_k):
+    """정확 탐색의 top_k 유사도 (내림차순)"""
+    sims = matrix @ query
+    top = -np.partition(-sims, top_k - 1)[:top_k]
+    return np.sort(top)[::-1]
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q) * 1000)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="IVF 근사 검색의 재현율과 지연 시간을 측정합니다.")
+    parser.add_argument('--synthetic', type=int, default=None, help="임의 임베딩 개수 (생략하면 저장소 사용)")
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--top-k', type=int, default=1)
+    parser.add_argument('--n-lists', type=int, default=None, help="군집 수 (기본: 4·√N)")
+    parser.add_argument('--n-probe', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument('--noise', type=float, default=0.5, help="쿼리에 더할 잡음 크기")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    if args.synthetic:
+        matrix = synthetic_embeddings(args.synthetic, args.dim, max(1, args.synthetic // 200), rng)
+    else:
+        matrix, _ = EmbeddingStore(EMBEDDING_STORE_PREFIX).load()
+        if matrix is None:
+            parser.error("저장된 임베딩이 없습니다. 앱을 한 번 실행하거나 --synthetic 옵션을 사용하세요.")
+        matrix = np.asarray(matrix, dtype=np.float32)
+    n, dim = matrix.shape
+
+    start = time.perf_counter()
+    index = IVFIndex.build(matrix, n_lists=args.n_lists, seed=args.seed)
+    print(f"키워드 {n}개 × {dim}차원, 군집 {index.n_lists}개, 인덱스 생성 {time.perf_counter() - start:.2f}초")
+
+    picks = rng.choice(n, args.queries, replace=n < args.queries)
+    queries = normalize_rows(matrix[picks] + args.noise * rng.standard_normal((args.queries, dim)).astype(np.float32) / np.sqrt(dim))
+
+    exact_times = []
+    exact_results = []
+    for q in queries:
+        t = time.perf_counter()
+        exact_results.append(exact_search(matrix, q, args.top_k))
+        exact_times.append(time.perf_counter() - t)
+    print(f"{'방식':<14}{'recall@' + str(args.top_k):>10}{'p50(ms)':>10}{'p99(ms)':>10}")
+    print(f"{'exact':<14}{1.0:>10.3f}{percentile_ms(exact_times, 50):>10.3f}{percentile_ms(exact_times, 99):>10.3f}")
+
+    for n_probe in args.n_probe:
+        times = []
+        hits = 0
+        for q, expected in zip(queries, exact_results):
+            t = time.perf_counter()
+            _, sims = index.search(matrix, q, top_k=args.top_k, n_probe=n_probe)
+            times.append(time.perf_counter() - t)
+            hits += int(np.sum(sims >= expected[-1] - 1e-6))
+        recall = hits / (len(queries) * args.top_k)
+        label = f"ivf n_probe={n_probe}"
+        print(f"{label:<14}{recall:>10.3f}{percentile_ms(times, 50):>10.3f}{percentile_ms(times, 99):>10.3f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,326 @@
+"""추천 시스템 성능 벤치마크. 결과를 JSON으로 저장해 커밋 사이의 성능 변화를 비교합니다.
+
+사용법 (프로젝트 루트에서 실행):
+    python -m scripts.benchmark --output bench/before.json
+    python -m scripts.benchmark --output bench/after.json --baseline bench/before.json
+    python -m scripts.benchmark --source data/synthetic/cosmetic_x10.xlsx --model --output bench/x10.json
+    python -m scripts.benchmark --compare bench/before.json bench/after.json
+
+측정 항목 (--only로 선택)
+- import   : 새 프로세스에서 modules.recommender import 시간
+- init     : initialize_recommender_system (TF-IDF 캐시 없음 = cold / 있음 = warm)
+- warmup   : 임베딩 모델 로드 + 키워드 임베딩 준비 (저장소 없음 = cold / 있음 = warm, --model 필요)
+- recommend: fast_recommend 지연 시간 (별칭 / 정확 일치 / 오타 보정 / 임베딩 경로, 결과 캐시 끔),
+             결과 캐시 적중 시 지연 시간, fast_recommend_many
+- excel    : data/*.xlsx 워크북 로드 시간
+
+캐시 파일은 임시 디렉터리에 만들므로 data/의 캐시는 건드리지 않습니다.
+합성 데이터는 scripts/make_synthetic_data.py로 만듭니다.
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import openpyxl
+import pandas as pd
+
+import modules.recommender as recommender
+from modules.recommender import (
+    SemanticBackend, fast_recommend, fast_recommend_many, initialize_recommender_system,
+    iter_cosmetic_rows, keyword_aliases,
+)
+
+SUITES = ('import', 'init', 'warmup', 'recommend', 'excel')
+REGRESSION_TOLERANCE = 0.2   # p50이 20% 넘게 느려지면 회귀로 표시
+REGRESSION_MIN_MS = 0.05     # 이보다 작은 절대 차이는 측정 잡음으로 무시
+
+def summarize(samples):
+    """초 단위 측정값 → ms 단위 요약"""
+    ms = np.asarray(samples, dtype=float) * 1000
+    return {
+        'n': int(len(ms)),
+        'p50_ms': round(float(np.percentile(ms, 50)), 4),
+        'p99_ms': round(float(np.percentile(ms, 99)), 4),
+        'mean_ms': round(float(ms.mean()), 4),
+        'min_ms': round(float(ms.min()), 4),
+    }
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def sheet_names(path):
+    wb = openpyxl.load_workbook(path, read_only=True)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+def use_workspace(source, workdir):
+    """추천 시스템의 원본·캐시 경로를 벤치마크용으로 바꿉니다."""
+    recommender.COSMETIC_DATA_PATH = source
+    recommender.TFIDF_CACHE_FILE = os.path.join(workdir, 'tfidf_data.pkl')
+    recommender.EMBEDDING_STORE_PREFIX = os.path.join(workdir, 'keyword_embeddings')
+    recommender.ANN_INDEX_FILE = os.path.join(workdir, 'keyword_ann.npz')
+
+def disable_model():
+    """--model 없이 실행할 때 백그라운드 모델 로드가 측정에 섞이지 않도록 막습니다."""
+    def no_model(*args, **kwargs):
+        raise RuntimeError("벤치마크에서 임베딩 모델 비활성화 (--model로 사용)")
+    recommender.load_embedding_model = no_model
+
+def bench_import(repeat):
+    code = ("import time; start = time.perf_counter(); import modules.recommender; "
+            "print(time.perf_counter() - start)")
+    samples = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                             cwd=os.getcwd())
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return {'import_time': summarize(samples)}
+
+def bench_init(repeat):
+    # 어휘별 SemanticBackend는 프로세스에 캐시되므로 먼저 한 번 만들어 두고 TF-IDF 준비만 측정
+    initialize_recommender_system(wait_for_model=True)
+
+    def cold():
+        os.remove(recommender.TFIDF_CACHE_FILE)
+        initialize_recommender_system(wait_for_model=False)
+
+    warm = lambda: initialize_recommender_system(wait_for_model=False)
+    return {
+        'init_cold_cache': summarize(timed(cold, repeat)),
+        'init_warm_cache': summarize(timed(warm, repeat)),
+    }
+
+def bench_warmup(keywords, repeat):
+    def cold():
+        for path in glob.glob(recommender.EMBEDDING_STORE_PREFIX + '*') + glob.glob(recommender.ANN_INDEX_FILE):
+            os.remove(path)
+        warm()
+
+    def warm():
+        backend = SemanticBackend(keywords).start()
+        backend.wait()
+        if backend.error is not None:
+            raise backend.error
+
+    return {
+        'warmup_cold_store': summarize(timed(cold, max(1, repeat // 2))),
+        'warmup_warm_store': summarize(timed(warm, repeat)),
+    }
+
+def make_queries(recommender_data, n, rng):
+    """경로별 쿼리 목록 (각 쿼리는 키워드 리스트)"""
+    keywords = list(recommender_data['keywords'])
+    vocabulary = set(keywords)
+    lexicon = recommender_data['lexicon']
+
+    aliases = [alias for alias, target in keyword_aliases().items() if target in vocabulary and alias not in vocabulary]
+    exact = [[keywords[i] for i in rng.integers(0, len(keywords), rng.integers(1, 4))] for _ in range(n)]
+
+    typos = []
+    for i in rng.permutation(len(keywords)):
+        kw = keywords[i]
+        if len(kw) < 5:
+            continue
+        cut = int(rng.integers(1, len(kw) - 1))
+        typo = kw[:cut] + kw[cut + 1:]
+        if typo not in vocabulary and lexicon.resolve(typo)[1] == 'trigram':
+            typos.append([typo])
+        if len(typos) == n:
+            break
+
+    # 어휘 매칭에 걸리지 않는 임의 문자열 → 매번 모델 encode
+    embedding = []
+    while len(embedding) < n:
+        text = ''.join(rng.choice(list('qxzjvwkyfh'), int(rng.integers(6, 11))))
+        if lexicon.resolve(text)[0] is None:
+            embedding.append([text])
+
+    return {
+        'alias': [[aliases[i] for i in rng.integers(0, len(aliases), rng.integers(1, 4))] for _ in range(n)]
+                 if aliases else [],
+        'exact': exact,
+        'typo': typos,
+        'embedding': embedding,
+    }
+
+def bench_recommend(recommender_data, n_queries, rng):
+    results = {}
+    queries = make_queries(recommender_data, n_queries, rng)
+    # 경로별 측정은 결과 캐시 없이 (예열·반복 쿼리가 캐시 적중으로 측정되지 않도록)
+    cache_size = recommender.result_cache.max_entries
+    recommender.result_cache.max_entries = 0
+    for path, path_queries in queries.items():
+        if path == 'embedding' and not recommender_data['semantic'].ready:
+            results['recommend_embedding'] = {'skipped': "임베딩 모델 없음 (--model로 측정)"}
+            continue
+        if not path_queries:
+            continue
+        if path != 'embedding':
+            for q in path_queries[:10]:  # 지연 초기화·CPU 캐시 예열
+                fast_recommend(recommender_data, q)
+        samples = []
+        for q in path_queries:
+            start = time.perf_counter()
+            fast_recommend(recommender_data, q)
+            samples.append(time.perf_counter() - start)
+        results[f'recommend_{path}'] = summarize(samples)
+
+        if path == 'embedding':
+            # 같은 쿼리를 다시 넣으면 쿼리 임베딩 캐시 적중
+            samples = []
+            for q in path_queries:
+                start = time.perf_counter()
+                fast_recommend(recommender_data, q)
+                samples.append(time.perf_counter() - start)
+            results['recommend_embedding_cached'] = summarize(samples)
+
+    # 같은 키워드 조합이 다시 들어온 경우 (결과 캐시 적중)
+    recommender.result_cache.max_entries = cache_size
+    recommender.result_cache.clear()
+    for q in queries['exact']:
+        fast_recommend(recommender_data, q)
+    samples = []
+    for q in queries['exact']:
+        start = time.perf_counter()
+        fast_recommend(recommender_data, list(reversed(q)))  # 순서만 다른 입력도 같은 항목
+        samples.append(time.perf_counter() - start)
+    results['recommend_result_cache_hit'] = summarize(samples)
+
+    batch = queries['exact'] * max(1, 1000 // max(1, len(queries['exact'])))
+    samples = timed(lambda: fast_recommend_many(recommender_data, batch), 3)
+    results['recommend_many_per_query'] = summarize([s / len(batch) for s in samples])
+    return results
+
+def bench_excel(source, repeat):
+    results = {}
+    for path in sorted({os.path.abspath(p) for p in glob.glob('./data/*.xlsx')} | {source}):
+        name = os.path.basename(path)
+        results[f'excel_load[{name}]'] = summarize(timed(lambda: pd.read_excel(path, sheet_name=None), repeat))
+    countries = sheet_names(source)
+    results[f'excel_stream[{os.path.basename(source)}]'] = summarize(
+        timed(lambda: sum(1 for _ in iter_cosmetic_rows(source, countries)), repeat)
+    )
+    return results
+
+def metadata(source):
+    def git(*args):
+        try:
+            return subprocess.run(['git', *args], capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    return {
+        'commit': git('rev-parse', '--short', 'HEAD'),
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'source': os.path.basename(source),
+        'source_bytes': os.path.getsize(source),
+    }
+
+def compare(baseline, current, tolerance=REGRESSION_TOLERANCE):
+    """두 결과의 p50을 비교해 표를 출력하고, 회귀가 있으면 True를 반환합니다."""
+    old, new = baseline['results'], current['results']
+    if baseline['meta'].get('source') != current['meta'].get('source'):
+        print(f"주의: 원본 데이터가 다릅니다 ({baseline['meta'].get('source')} → {current['meta'].get('source')})")
+    print(f"{'항목':<40}{'이전 p50':>12}{'현재 p50':>12}{'비율':>8}")
+    regressed = False
+    for name in sorted(set(old) & set(new)):
+        a, b = old[name].get('p50_ms'), new[name].get('p50_ms')
+        if a is None or b is None:
+            continue
+        ratio = b / a if a else float('inf')
+        flag = ''
+        if ratio > 1 + tolerance and b - a > REGRESSION_MIN_MS:
+            flag = '  ← 회귀'
+            regressed = True
+        elif ratio < 1 - tolerance and a - b > REGRESSION_MIN_MS:
+            flag = '  개선'
+        print(f"{name:<40}{a:>12.3f}{b:>12.3f}{ratio:>8.2f}{flag}")
+    for name in sorted(set(new) - set(old)):
+        print(f"{name:<40}{'-':>12}{new[name].get('p50_ms', '-')!s:>12}   (새 항목)")
+    return regressed
+
+def print_results(results):
+    print(f"{'항목':<40}{'p50(ms)':>12}{'p99(ms)':>12}{'n':>6}")
+    for name, stats in results.items():
+        if 'skipped' in stats:
+            print(f"{name:<40}  건너뜀: {stats['skipped']}")
+        else:
+            print(f"{name:<40}{stats['p50_ms']:>12.3f}{stats['p99_ms']:>12.3f}{stats['n']:>6}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="추천 시스템 성능 벤치마크")
+    parser.add_argument('--source', default=recommender.COSMETIC_DATA_PATH, help="키워드 워크북 (합성 데이터 가능)")
+    parser.add_argument('--only', nargs='+', choices=SUITES, default=None, help="실행할 항목")
+    parser.add_argument('--repeat', type=int, default=5, help="import/init/excel 반복 횟수")
+    parser.add_argument('--queries', type=int, default=300, help="추천 경로별 쿼리 수")
+    parser.add_argument('--model', action='store_true', help="임베딩 모델을 로드해 warmup·임베딩 경로도 측정")
+    parser.add_argument('--output', default=None, help="결과 JSON 경로")
+    parser.add_argument('--baseline', default=None, help="비교할 이전 결과 JSON")
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'), help="실행 없이 두 결과만 비교")
+    parser.add_argument('--tolerance', type=float, default=REGRESSION_TOLERANCE)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0], encoding='utf-8') as f_old, open(args.compare[1], encoding='utf-8') as f_new:
+            return 1 if compare(json.load(f_old), json.load(f_new), args.tolerance) else 0
+
+    suites = args.only or [s for s in SUITES if s != 'warmup' or args.model]
+    source = os.path.abspath(args.source)
+    rng = np.random.default_rng(args.seed)
+    results = {}
+
+    if 'import' in suites:
+        results.update(bench_import(args.repeat))
+
+    workdir = tempfile.mkdtemp(prefix='kbd-bench-')
+    try:
+        use_workspace(source, workdir)
+        if not args.model:
+            disable_model()
+        if 'init' in suites:
+            results.update(bench_init(args.repeat))
+        if 'warmup' in suites or 'recommend' in suites:
+            recommender_data = initialize_recommender_system(wait_for_model=True)
+            if 'warmup' in suites:
+                results.update(bench_warmup(recommender_data['keywords'], args.repeat))
+            if 'recommend' in suites:
+                results.update(bench_recommend(recommender_data, args.queries, rng))
+        if 'excel' in suites:
+            results.update(bench_excel(source, args.repeat))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {'meta': metadata(source), 'results': results}
+    print_results(results)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장 → {args.output}")
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            print()
+            return 1 if compare(json.load(f), report, args.tolerance) else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
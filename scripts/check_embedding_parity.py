@@ -0,0 +1,82 @@
+"""int8 양자화 임베딩 백엔드가 기준 fp32(torch) 모델과 일치하는지 검사합니다.
+
+사용법 (프로젝트 루트에서 실행):
+    python -m scripts.check_embedding_parity
+    python -m scripts.check_embedding_parity --backend onnx-int8 --threshold 0.98 --sample 1000
+
+어휘 키워드 표본과 예시 쿼리를 두 모델로 임베딩해
+- 행별 코사인 일치도 (평균/최소/하위 1%)
+- 어휘 안에서 가장 가까운 키워드(top-1)가 같은 비율
+- 배치 encode / 단일 쿼리 encode 지연 시간
+을 출력하고, 평균 또는 하위 1% 코사인이 기준 미만이면 종료 코드 1로 끝납니다. (CI·배포 전 검사용)
+"""
+import argparse
+import sys
+import time
+import numpy as np
+
+from modules.embedding_backend import (
+    EMBEDDING_BACKENDS, PARITY_TAIL_PERCENTILE, PARITY_TAIL_THRESHOLD, PARITY_THRESHOLD, EmbeddingParityError, check_parity, embedding_agreement, sample_texts,
+)
+from modules.embedding_store import normalize_rows
+from modules.recommender import load_embedding_model, prepare_tfidf_data
+
+EXAMPLE_QUERIES = [
+    "비건", "유기농 스킨케어", "ヴィーガン", "オーガニック", "纯素", "clean beauty",
+    "hydrating serum", "sun cream", "미백 크림", "anti aging", "cica", "saumon",
+]
+
+def time_encode(model, texts, repeat=3):
+    """배치 encode 1회와 단일 쿼리 encode 1회의 최소 소요 시간(초)"""
+    batch = min(_elapsed(lambda: model.encode(texts, batch_size=64)) for _ in range(repeat))
+    single = min(_elapsed(lambda: model.encode(texts[0])) for _ in range(repeat * 5))
+    return batch, single
+
+def _elapsed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="양자화 임베딩 백엔드의 기준 모델 일치도 검사")
+    parser.add_argument('--backend', default='onnx-int8', choices=[b for b in EMBEDDING_BACKENDS if b != 'torch'])
+    parser.add_argument('--threshold', type=float, default=PARITY_THRESHOLD, help="평균 코사인 기준값")
+    parser.add_argument('--tail-threshold', type=float, default=PARITY_TAIL_THRESHOLD,
+                        help=f"하위 {PARITY_TAIL_PERCENTILE}% 코사인 기준값")
+    parser.add_argument('--sample', type=int, default=1000, help="검사할 어휘 키워드 수")
+    args = parser.parse_args(argv)
+
+    _, _, _, _, keywords = prepare_tfidf_data()
+    vocab = sample_texts(keywords, args.sample)
+    texts = vocab + EXAMPLE_QUERIES
+
+    reference_model = load_embedding_model('torch')
+    candidate_model = load_embedding_model(args.backend)
+    reference = np.asarray(reference_model.encode(texts, batch_size=64), dtype=np.float32)
+    candidate = np.asarray(candidate_model.encode(texts, batch_size=64), dtype=np.float32)
+
+    sims = embedding_agreement(reference, candidate)
+    print(f"표본 {len(texts)}개 코사인 일치도: 평균 {sims.mean():.4f}, 최소 {sims.min():.4f}, "
+          f"하위 1% {np.percentile(sims, 1):.4f}")
+
+    # 예시 쿼리를 어휘에 매핑했을 때 최근접 키워드가 같은지 (매핑 결과가 바뀌는지)
+    n = len(vocab)
+    ref_top = np.argmax(normalize_rows(reference[n:]) @ normalize_rows(reference[:n]).T, axis=1)
+    cand_top = np.argmax(normalize_rows(candidate[n:]) @ normalize_rows(candidate[:n]).T, axis=1)
+    print(f"예시 쿼리 top-1 키워드 일치: {np.mean(ref_top == cand_top):.0%} ({len(EXAMPLE_QUERIES)}개)")
+
+    for name, model in (('torch', reference_model), (args.backend, candidate_model)):
+        batch, single = time_encode(model, vocab[:256])
+        print(f"{name:<10} 배치 encode {min(256, len(vocab))}개 {batch * 1000:8.1f}ms, 단일 쿼리 {single * 1000:6.2f}ms")
+
+    try:
+        check_parity(candidate_model, texts, reference, threshold=args.threshold, tail_threshold=args.tail_threshold)
+    except EmbeddingParityError as e:
+        print(f"실패: {e}", file=sys.stderr)
+        return 1
+    print(f"통과: 평균 코사인 {sims.mean():.4f} ≥ 기준 {args.threshold:.4f}, "
+          f"하위 {PARITY_TAIL_PERCENTILE}% {np.percentile(sims, PARITY_TAIL_PERCENTILE):.4f} ≥ 기준 {args.tail_threshold:.4f}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
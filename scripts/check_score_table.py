@@ -0,0 +1,80 @@
+"""기여도 표(keyword_country_table) 경로가 기존 TF-IDF 경로와 같은 추천을 내는지 검사합니다.
+
+사용법 (프로젝트 루트에서 실행):
+    python -m scripts.check_score_table --queries 5000
+
+어휘에서 임의로 뽑은 키워드 1~max개(중복 포함)로 쿼리를 만들어
+- 두 경로의 전체 국가 순위가 모두 같은지, 점수 차이의 최댓값
+- 쿼리당 지연 시간(p50/p99)과 할당량(tracemalloc 최대치)
+을 출력하고, 순위가 하나라도 다르면 종료 코드 1로 끝납니다.
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+from modules.recommender import (
+    build_keyword_country_table, create_keyword_mapping, prepare_tfidf_data,
+    score_countries, score_countries_dense,
+)
+
+def ranking(countries, scores):
+    """recommend_countries_fast와 같은 방식의 전체 순위 (동점은 국가 순서 유지)"""
+    return [c for c, _ in sorted(zip(countries, scores), key=lambda x: x[1], reverse=True)]
+
+def profile(fn, queries):
+    """쿼리별 소요 시간(초) 목록과 한 번 호출의 최대 할당 바이트"""
+    times = []
+    for q in queries:
+        start = time.perf_counter()
+        fn(q)
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn(queries[0])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return times, peak
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="기여도 표 경로와 기존 경로의 추천 일치 검사")
+    parser.add_argument('--queries', type=int, default=5000)
+    parser.add_argument('--max-keywords', type=int, default=6)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    idf, tfidf_matrix, _, countries, keywords = prepare_tfidf_data()
+    keyword_to_idx = create_keyword_mapping(keywords)
+    table = build_keyword_country_table(idf, tfidf_matrix)
+
+    rng = np.random.default_rng(args.seed)
+    queries = [
+        [keywords[i] for i in rng.integers(0, len(keywords), rng.integers(1, args.max_keywords + 1))]
+        for _ in range(args.queries)
+    ]
+
+    def dense(q):
+        return score_countries_dense(q, keyword_to_idx, idf, tfidf_matrix, len(keywords))
+
+    def fast(q):
+        return score_countries(q, keyword_to_idx, idf, table)
+
+    mismatches = 0
+    max_diff = 0.0
+    for q in queries:
+        expected, actual = dense(q), fast(q)
+        max_diff = max(max_diff, float(np.max(np.abs(expected - actual))))
+        if ranking(countries, expected) != ranking(countries, actual):
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"순위 불일치: {q}\n  기존 {ranking(countries, expected)}\n  표   {ranking(countries, actual)}")
+
+    print(f"쿼리 {len(queries)}개: 순위 불일치 {mismatches}개, 점수 차이 최대 {max_diff:.2e}")
+    print(f"{'경로':<12}{'p50(µs)':>10}{'p99(µs)':>10}{'할당(B)':>12}")
+    for name, fn in (('dense', dense), ('table', fast)):
+        times, peak = profile(fn, queries)
+        print(f"{name:<12}{np.percentile(times, 50) * 1e6:>10.1f}{np.percentile(times, 99) * 1e6:>10.1f}{peak:>12,}")
+    return 1 if mismatches else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
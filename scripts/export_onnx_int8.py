@@ -0,0 +1,34 @@
+"""임베딩 모델을 ONNX로 내보내고 int8 동적 양자화합니다.
+
+허브 모델 저장소에 양자화 파일이 없거나 CPU에 맞는 설정으로 직접 만들고 싶을 때 사용합니다.
+사용법 (프로젝트 루트에서 실행):
+    python -m scripts.export_onnx_int8 --config avx512_vnni --output ./models/minilm-onnx
+
+생성 후 아래처럼 지정하면 앱이 내보낸 모델을 사용합니다.
+    KBD_EMBEDDING_BACKEND=onnx-int8
+    KBD_EMBEDDING_MODEL=./models/minilm-onnx
+    KBD_ONNX_INT8_FILE=onnx/model_qint8_avx512_vnni.onnx
+이어서 python -m scripts.check_embedding_parity 로 기준 모델과의 일치도를 확인하세요.
+"""
+import argparse
+
+from modules.embedding_backend import EMBEDDING_MODEL_NAME
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="임베딩 모델 ONNX int8 내보내기")
+    parser.add_argument('--model', default=EMBEDDING_MODEL_NAME)
+    parser.add_argument('--config', default='avx2', choices=['arm64', 'avx2', 'avx512', 'avx512_vnni'],
+                        help="대상 CPU 명령어 집합에 맞춘 양자화 설정")
+    parser.add_argument('--output', default='./models/minilm-onnx', help="저장할 디렉터리")
+    args = parser.parse_args(argv)
+
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    # fp32 ONNX로 변환해 저장한 뒤, 같은 디렉터리에 양자화 파일(onnx/model_q*int8_<config>.onnx)을 추가
+    model = SentenceTransformer(args.model, backend='onnx')
+    model.save_pretrained(args.output)
+    export_dynamic_quantized_onnx_model(model, args.config, args.output)
+    print(f"내보내기 완료 → {args.output}/onnx/")
+
+if __name__ == '__main__':
+    main()
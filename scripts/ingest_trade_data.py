@@ -0,0 +1,149 @@
+"""무역 통계 엑셀을 시트별 Feather 스냅샷(data/snapshots/)으로 변환하고 품목 집계 큐브를 만듭니다.
+
+사용법 (프로젝트 루트에서 실행):
+    python -m scripts.ingest_trade_data            # 원본이 바뀐 통합 문서만 변환
+    python -m scripts.ingest_trade_data --force    # 모두 다시 변환
+    python -m scripts.ingest_trade_data --check    # 스냅샷·큐브가 원본 엑셀로 계산한 값과 같은지 검사 (다르면 종료 코드 1)
+
+페이지는 스냅샷이 없거나 원본보다 오래되었으면 처음 로딩할 때 스스로 변환하므로,
+이 명령은 배포 시 첫 요청의 변환 시간을 없애기 위한 것입니다.
+"""
+import argparse
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+from modules.product_cube import CUBE_SOURCE, ensure_product_cube
+from modules.trade_routes import SEOUL_LAT, SEOUL_LON
+from modules.trade_store import (
+    TRADE_WORKBOOKS, ensure_snapshot, ingest_workbook, read_snapshot, read_workbook,
+)
+
+def timed(fn, *args, repeat=5):
+    """(결과, 가장 빠른 실행 시간(ms))"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+def reference_period(data, product_code, selected_period):
+    """품목 상세 분석 페이지가 큐브 도입 전에 매 실행마다 하던 계산 (비교 기준)"""
+    df = data[str(product_code)].copy()
+    df["기준연월"] = pd.to_datetime(df["조회기준"])
+    df["수출금액 (천$)"] = df["수출금액 ($)"]/1000
+    filtered = df[df["기준연월"] == selected_period].nsmallest(10, "순위")
+    merged = pd.merge(filtered, data["lat-lon"], on="국가명", how="left")
+    df_total = df.groupby("기준연월", as_index=False)["수출금액 (천$)"].sum()
+    df_top5 = filtered.nlargest(5, "수출금액 (천$)")
+
+    df_sorted = df.sort_values("기준연월")
+    df_sorted['증감률'] = df_sorted['수출 증감률']*100
+    period_range = pd.date_range(start=selected_period - pd.DateOffset(months=4), end=selected_period, freq="MS")
+    df_recent = df_sorted[(df_sorted["기준연월"] >= period_range.min()) & (df_sorted["기준연월"] <= period_range.max())]
+    valid_countries = df_recent.groupby("국가명")["기준연월"].nunique().loc[lambda x: x == 5].index
+    df_recent_valid = df_recent[df_recent["국가명"].isin(valid_countries)]
+    df_selected = df_recent_valid[df_recent_valid["기준연월"] == selected_period].dropna(subset=["증감률"])
+    growth = [(row.국가명, row.증감률, df_recent_valid[df_recent_valid["국가명"] == row.국가명])
+              for row in df_selected.nlargest(5, "증감률").itertuples()]
+    return merged, df_total, df_top5, growth
+
+def check_routes(data, product_code, period, routes):
+    """지도 경로가 좌표·수출금액이 있는 모든 교역국을 서울에서 각 국가까지 잇는지"""
+    df = data[str(product_code)]
+    partners = pd.merge(df[pd.to_datetime(df["조회기준"]) == period], data["lat-lon"], on="국가명", how="left")
+    partners = partners[(partners["수출금액 ($)"] > 0) & partners["위도"].notna()].set_index("국가명")
+    if sorted(routes.countries) != sorted(partners.index):
+        return [f"경로 국가 {len(routes)}개 != 교역국 {len(partners)}개"]
+    if len(routes) == 0:
+        return []
+    if np.abs(routes.coords[:, 0]).max() > 180:
+        return ["경로 경도가 [-180, 180] 밖에 있습니다. (지도에 보이지 않는 세계 위)"]
+    first, last = routes.coords[routes.starts[:-1]], routes.coords[routes.starts[1:] - 1].astype(np.float64)
+    expected = partners.loc[routes.countries, ["경도", "위도"]].to_numpy()
+    lon_error = np.abs((last[:, 0] - expected[:, 0] + 180.0) % 360.0 - 180.0)  # 경도 ±180은 같은 위치
+    start_error = np.abs(first - np.array([SEOUL_LON, SEOUL_LAT], dtype=np.float32)).max()
+    if lon_error.max() > 1e-3 or np.abs(last[:, 1] - expected[:, 1]).max() > 1e-3 or start_error > 1e-3:
+        return ["경로의 시작점(서울) 또는 끝점(교역국 좌표)이 다릅니다."]
+    inner = np.ones(len(routes.coords) - 1, dtype=bool)
+    inner[routes.starts[1:-1] - 1] = False  # 경로 경계는 제외
+    step = np.abs((np.diff(routes.coords[:, 0].astype(np.float64)) + 180.0) % 360.0 - 180.0)  # 날짜 변경선을 넘는 구간은 짧은 쪽
+    if step[inner].max() >= 180:  # 극 근처를 지나는 경로는 경도가 크게 바뀔 수 있음
+        return ["경로 점 사이 경도 간격이 너무 큽니다."]
+    if np.any(np.diff(routes.values) < 0):
+        return ["경로가 수출금액 오름차순이 아닙니다."]
+    return []
+
+def check_cube(data, cube):
+    """모든 (품목, 기준연월)의 큐브 값이 기존 계산과 같은지 검사하고 실패 목록을 반환합니다."""
+    failures = []
+    keys = sorted(cube.cells)
+    reference_ms = lookup_ms = 0.0
+    for product_code, period in keys:
+        (merged, df_total, df_top5, growth), ms = timed(reference_period, data, product_code, period, repeat=1)
+        reference_ms += ms
+        cell, ms = timed(cube.get, product_code, period, repeat=1)
+        lookup_ms += ms
+        label = f"{product_code}/{period:%Y-%m}"
+        try:
+            pd.testing.assert_frame_equal(cell.top10, merged[cell.top10.columns].reset_index(drop=True))
+            pd.testing.assert_frame_equal(cube.totals[product_code], df_total)
+            pd.testing.assert_frame_equal(cell.top5, df_top5[cell.top5.columns].reset_index(drop=True))
+        except AssertionError as e:
+            failures.append(f"{label}: {str(e).splitlines()[0]}")
+        if [(c, g) for c, g, _ in cell.growth_top5] != [(c, g) for c, g, _ in growth]:
+            failures.append(f"{label}: 증감률 TOP 5 {[c for c, _, _ in cell.growth_top5]} != {[c for c, _, _ in growth]}")
+        elif any(not sparkline.equals(expected[["기준연월", "증감률"]].reset_index(drop=True))
+                 for (_, _, sparkline), (_, _, expected) in zip(cell.growth_top5, growth)):
+            failures.append(f"{label}: 증감률 추이 데이터가 다릅니다.")
+        failures.extend(f"{label}: {message}" for message in check_routes(data, product_code, period, cell.routes))
+    print(f"품목 집계 큐브: {len(keys)}개 조합 - 기존 계산 {reference_ms / len(keys):.1f}ms "
+          f"→ 큐브 조회 {lookup_ms * 1000 / len(keys):.1f}µs (조합당)")
+    return failures
+
+def check():
+    failures = []
+    for name, source in TRADE_WORKBOOKS.items():
+        ensure_snapshot(name)
+        expected, excel_ms = timed(read_workbook, source, repeat=1)
+        actual, snapshot_ms = timed(read_snapshot, name)
+        if list(actual) != list(expected):
+            failures.append(f"{name}: 시트 목록 {list(actual)} != {list(expected)}")
+        for sheet, df in expected.items():
+            try:
+                pd.testing.assert_frame_equal(actual[sheet], df)
+            except (KeyError, AssertionError) as e:
+                failures.append(f"{name}/{sheet}: {str(e).splitlines()[0]}")
+        rows = sum(len(df) for df in expected.values())
+        print(f"{name}: 시트 {len(expected)}개, {rows}행 - 엑셀 {excel_ms:.0f}ms → 스냅샷 {snapshot_ms:.1f}ms")
+        if name == CUBE_SOURCE:
+            failures.extend(check_cube(expected, ensure_product_cube()))
+    for message in failures:
+        print(f"실패: {message}")
+    return 1 if failures else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="무역 통계 엑셀 → Feather 스냅샷 변환")
+    parser.add_argument('--force', action='store_true', help="원본이 바뀌지 않았어도 다시 변환")
+    parser.add_argument('--check', action='store_true', help="스냅샷·큐브와 원본 엑셀 비교만 실행")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        return check()
+
+    for name in TRADE_WORKBOOKS:
+        start = time.perf_counter()
+        manifest = ingest_workbook(name, force=args.force)
+        elapsed = time.perf_counter() - start
+        rows = sum(entry['rows'] for entry in manifest['sheets'])
+        print(f"{name}: {manifest['source']} → 시트 {len(manifest['sheets'])}개, {rows}행 ({elapsed:.2f}초)")
+
+    start = time.perf_counter()
+    cube = ensure_product_cube(force=args.force)
+    print(f"품목 집계 큐브: (품목, 기준연월) {len(cube.cells)}개 ({time.perf_counter() - start:.2f}초)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
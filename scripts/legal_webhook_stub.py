@@ -0,0 +1,175 @@
+"""법률 정보 n8n 웹훅을 흉내 내는 로컬 테스트 서버.
+
+사용법 (프로젝트 루트에서 실행):
+    python -m scripts.legal_webhook_stub --port 8765 --delay 5
+    KBD_LEGAL_WEBHOOK_URL=http://127.0.0.1:8765/webhook/legal-info-webhook streamlit run K-Beauty-Direct.py
+
+    python -m scripts.legal_webhook_stub --check   # 작업 큐·영구 캐시를 이 서버에 연결해 동작 검사 (실패 시 종료 코드 1)
+
+- 요청 본문 {"query": {"country": ...}}에 대해 --delay초 뒤 {"success": true, "summary": ...}를 응답합니다.
+- --fail-rate 비율의 요청은 500 오류, --no-data-country 국가는 {"success": false, "message": ...}로 응답합니다.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from modules.legal_cache import LegalSummaryCache
+from modules.legal_jobs import LegalJobQueue
+
+WEBHOOK_PATH = '/webhook/legal-info-webhook'
+
+def make_handler(delay, fail_rate, no_data_countries, stats):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != WEBHOOK_PATH:
+                self.send_error(404)
+                return
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            country = json.loads(body or b'{}').get('query', {}).get('country', '')
+
+            with stats['lock']:
+                stats['requests'] += 1
+                stats['active'] += 1
+                stats['max_active'] = max(stats['max_active'], stats['active'])
+            try:
+                time.sleep(delay)
+                if random.random() < fail_rate:
+                    self.send_error(500)
+                    return
+                if country in no_data_countries:
+                    # 오류 문구 형식과 관계없이 success: false는 실패로 저장되어야 함
+                    data = {"success": False, "message": f"{country}: 워크플로우가 법률 문서를 찾지 못했습니다."}
+                else:
+                    data = {"success": True,
+                            "summary": f"### {country} 화장품 수출 관련 법률 요약 (테스트)\n- 성분 표시 규정\n- 통관 서류"}
+                payload = json.dumps(data, ensure_ascii=False).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+            finally:
+                with stats['lock']:
+                    stats['active'] -= 1
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+def serve(port=8765, delay=5.0, fail_rate=0.0, no_data_countries=()):
+    """백그라운드 스레드에서 서버를 시작하고 (서버, 요청 통계)를 반환합니다."""
+    stats = {'lock': threading.Lock(), 'requests': 0, 'active': 0, 'max_active': 0}
+    server = ThreadingHTTPServer(('127.0.0.1', port),
+                                 make_handler(delay, fail_rate, set(no_data_countries), stats))
+    threading.Thread(target=server.serve_forever, name='legal-webhook-stub', daemon=True).start()
+    return server, stats
+
+def wait_for(jobs):
+    while any(job.pending for job in jobs):
+        time.sleep(0.02)
+
+def check(delay):
+    """작업자 수 제한, 국가별 중복 제거, 오류 응답 처리, 스크립트 스레드 비차단,
+    영구 캐시 재사용(새 프로세스 가정), 성공/실패 유효 시간, stale-while-revalidate를 검사합니다."""
+    server, stats = serve(port=0, delay=delay, no_data_countries=['중국'])
+    url = f"http://127.0.0.1:{server.server_address[1]}{WEBHOOK_PATH}"
+    cache_path = os.path.join(tempfile.mkdtemp(), 'legal_cache.sqlite3')
+    success_ttl, failure_ttl = 2.0, 0.5
+
+    def new_queue():
+        # 새 큐 = 메모리가 빈 새 프로세스와 같음 (디스크 캐시만 공유)
+        return LegalJobQueue(url, max_workers=2, max_pending=16, success_ttl=success_ttl,
+                             failure_ttl=failure_ttl, timeout=10, cache=LegalSummaryCache(cache_path))
+
+    queue = new_queue()
+    countries = ["미국", "베트남", "브라질", "영국", "중국"]
+    failures = []
+
+    start = time.perf_counter()
+    jobs = queue.prefetch(countries)
+    queue.submit("미국")  # 실행 중인 작업에 합쳐짐
+    submit_ms = (time.perf_counter() - start) * 1000
+    wait_for(jobs)
+    total = time.perf_counter() - start
+
+    if submit_ms > 50:
+        failures.append(f"요청 제출이 {submit_ms:.1f}ms 동안 막혔습니다.")
+    if stats['requests'] != len(countries):
+        failures.append(f"웹훅 요청 {stats['requests']}회 (기대 {len(countries)}회, 중복 제거 실패)")
+    if stats['max_active'] > 2:
+        failures.append(f"동시 요청 {stats['max_active']}개 (작업자 2개 초과)")
+    if [job.status for job in jobs] != ['done'] * 4 + ['failed']:
+        failures.append(f"작업 상태 {[job.status for job in jobs]}")
+
+    # 새 프로세스: 성공 결과는 디스크에서 바로, 웹훅 요청 없음
+    requests_before = stats['requests']
+    other = new_queue()
+    start = time.perf_counter()
+    cached = [other.get(country) for country in countries[:4]]
+    cached_ms = (time.perf_counter() - start) * 1000 / 4
+    if [job and job.result for job in cached] != [job.result for job in jobs[:4]]:
+        failures.append("새 큐가 디스크에 저장된 결과를 읽지 못했습니다.")
+    if stats['requests'] != requests_before:
+        failures.append("저장된 결과가 있는데 웹훅을 다시 호출했습니다.")
+
+    # 실패 결과는 짧은 유효 시간 뒤에 다시 요청
+    time.sleep(failure_ttl)
+    if other.get("중국") is not None:
+        failures.append("만료된 실패 결과를 그대로 반환했습니다.")
+
+    # 만료된 성공 결과: 바로 반환하고 백그라운드에서 한 번만 갱신
+    time.sleep(success_ttl - failure_ttl)
+    start = time.perf_counter()
+    stale = other.get("미국")
+    stale_ms = (time.perf_counter() - start) * 1000
+    third = new_queue()
+    third.get("미국")  # 다른 프로세스는 갱신 임대 때문에 갱신하지 않음
+    if stale is None or stale.status != 'done' or not other.refreshing("미국"):
+        failures.append("만료된 성공 결과를 반환하며 갱신을 시작하지 않았습니다.")
+    if third.refreshing("미국"):
+        failures.append("두 프로세스가 같은 국가를 동시에 갱신했습니다.")
+    while other.refreshing("미국"):
+        time.sleep(0.02)
+    refreshed = other.get("미국")
+    if refreshed is stale or refreshed.expired():
+        failures.append("갱신된 결과로 바뀌지 않았습니다.")
+    server.shutdown()
+
+    print(f"작업 {len(jobs)}개: 제출 {submit_ms:.1f}ms, 전체 {total:.2f}초, "
+          f"웹훅 요청 {stats['requests']}회, 최대 동시 요청 {stats['max_active']}개")
+    print(f"디스크 캐시 조회 {cached_ms:.2f}ms/국가, 만료 결과 반환 {stale_ms:.2f}ms")
+    for message in failures:
+        print(f"실패: {message}")
+    return 1 if failures else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="법률 정보 웹훅 로컬 테스트 서버")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay', type=float, default=5.0, help="응답까지 걸리는 시간 (초)")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="500 오류로 응답할 비율")
+    parser.add_argument('--no-data-country', action='append', default=[], help="데이터 없음으로 응답할 국가")
+    parser.add_argument('--check', action='store_true', help="작업 큐 동작 검사만 실행")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        return check(delay=min(args.delay, 0.3))
+
+    server, stats = serve(args.port, args.delay, args.fail_rate, args.no_data_country)
+    print(f"웹훅 테스트 서버: http://127.0.0.1:{args.port}{WEBHOOK_PATH} (Ctrl+C로 종료)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"요청 {stats['requests']}회 처리")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""Cosmetic_trends_cleaned.xlsx를 키워드·국가 수를 늘린 합성 워크북으로 확장합니다. (벤치마크용)
+
+사용법 (프로젝트 루트에서 실행):
+    python -m scripts.make_synthetic_data --scale 10
+    python -m scripts.make_synthetic_data --scale 100 --extra-countries 20 --output data/synthetic/cosmetic_x100.xlsx
+
+- 어휘: 원본 키워드에 더해 (scale - 1)배의 합성 키워드를 만듭니다.
+  합성 키워드는 원본 키워드 두 개의 앞/뒤 절반을 이어 붙여, 문자 분포(한글/영문 비율, 길이)가 원본과 비슷합니다.
+- 국가 시트: 원본 시트마다 합성 키워드 행을 원본 비율대로 추가하고,
+  --extra-countries개의 합성 국가 시트(synthetic_01, ...)를 만듭니다.
+- 빈도: 원본 빈도 분포에서 표본 추출합니다.
+"""
+import argparse
+import os
+import time
+import numpy as np
+import openpyxl
+
+from modules.recommender import COSMETIC_DATA_PATH, iter_cosmetic_rows
+
+SYNTHETIC_DIR = './data/synthetic'
+
+def read_source(path):
+    """원본 워크북의 {국가: [(키워드, 빈도), ...]}"""
+    wb = openpyxl.load_workbook(path, read_only=True)
+    sheetnames = list(wb.sheetnames)
+    wb.close()
+    sheets = {name: [] for name in sheetnames}
+    for country, kw, freq in iter_cosmetic_rows(path, sheetnames):
+        if kw is None or not isinstance(freq, (int, float)):
+            continue
+        sheets[country].append((str(kw), freq))
+    return sheets
+
+def synthetic_keywords(vocabulary, n, rng):
+    """원본 키워드 조각을 이어 붙인 새 키워드 n개 (원본과 겹치지 않음)"""
+    vocabulary = list(vocabulary)
+    seen = set(vocabulary)
+    result = []
+    while len(result) < n:
+        a, b = rng.integers(0, len(vocabulary), 2)
+        left, right = vocabulary[a], vocabulary[b]
+        kw = left[:max(1, len(left) // 2 + int(rng.integers(0, 2)))] + right[len(right) // 2:]
+        if kw not in seen:
+            seen.add(kw)
+            result.append(kw)
+    return result
+
+def build_sheets(sheets, scale, extra_countries, rng):
+    vocabulary = sorted({kw for rows in sheets.values() for kw, _ in rows})
+    freqs = np.array([f for rows in sheets.values() for _, f in rows], dtype=float)
+    new_keywords = synthetic_keywords(vocabulary, len(vocabulary) * (scale - 1), rng)
+
+    # 원본에서 키워드 하나가 평균 몇 개 국가에 나타나는지 유지
+    n_rows = sum(len(rows) for rows in sheets.values())
+    countries = list(sheets) + [f"synthetic_{i + 1:02d}" for i in range(extra_countries)]
+    out = {country: list(sheets.get(country, [])) for country in countries}
+    per_keyword = max(1.0, n_rows / len(vocabulary))
+
+    for kw in new_keywords:
+        k = min(len(countries), max(1, int(rng.poisson(per_keyword))))
+        for c in rng.choice(len(countries), k, replace=False):
+            out[countries[c]].append((kw, float(rng.choice(freqs))))
+
+    # 합성 국가에는 원본 키워드도 원본 시트 크기만큼 섞음
+    avg_sheet = n_rows // max(1, len(sheets))
+    for country in countries[len(sheets):]:
+        for i in rng.choice(len(vocabulary), min(avg_sheet, len(vocabulary)), replace=False):
+            out[country].append((vocabulary[i], float(rng.choice(freqs))))
+
+    # 시트 안에서는 원본처럼 빈도 내림차순
+    return {country: sorted(rows, key=lambda r: -r[1]) for country, rows in out.items()}
+
+def write_workbook(sheets, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    wb = openpyxl.Workbook(write_only=True)
+    for country, rows in sheets.items():
+        ws = wb.create_sheet(country)
+        ws.append(['word', 'frequency'])
+        for kw, freq in rows:
+            ws.append([kw, int(round(freq))])
+    wb.save(path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="벤치마크용 합성 키워드 워크북 생성")
+    parser.add_argument('--source', default=COSMETIC_DATA_PATH)
+    parser.add_argument('--scale', type=int, default=10, help="어휘 배수 (10이면 키워드 10배)")
+    parser.add_argument('--extra-countries', type=int, default=0, help="추가할 합성 국가 시트 수")
+    parser.add_argument('--output', default=None, help=f"기본: {SYNTHETIC_DIR}/cosmetic_x<scale>.xlsx")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    if args.scale < 1:
+        parser.error("--scale은 1 이상이어야 합니다.")
+
+    output = args.output or os.path.join(SYNTHETIC_DIR, f"cosmetic_x{args.scale}.xlsx")
+    start = time.perf_counter()
+    sheets = build_sheets(read_source(args.source), args.scale, args.extra_countries,
+                          np.random.default_rng(args.seed))
+    write_workbook(sheets, output)
+    n_keywords = len({kw for rows in sheets.values() for kw, _ in rows})
+    n_rows = sum(len(rows) for rows in sheets.values())
+    print(f"{output}: 국가 {len(sheets)}개, 키워드 {n_keywords:,}개, 행 {n_rows:,}개 "
+          f"({time.perf_counter() - start:.1f}초)")
+
+if __name__ == '__main__':
+    main()
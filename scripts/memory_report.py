@@ -0,0 +1,71 @@
+"""추천 시스템의 메모리 사용량과 세션당 추가 메모리를 보고합니다.
+
+사용법 (프로젝트 루트에서 실행):
+    python -m scripts.memory_report --sessions 300
+
+- 공유 추천 시스템의 구성 요소별 크기 (mmap 임베딩은 프로세스 간 공유로 따로 표시)
+- 세션 N개가 get_shared_recommender()로 추천을 받을 때 세션당 늘어나는 Python 할당량
+- 비교용: 예전처럼 세션마다 initialize_recommender_system()을 호출해 보관할 때의 세션당 할당량
+"""
+import argparse
+import gc
+import tracemalloc
+
+from modules.recommender import (
+    fast_recommend, get_shared_recommender, initialize_recommender_system, memory_report,
+)
+
+def format_bytes(n):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(n) < 1024 or unit == 'GB':
+            return f"{n:,.1f} {unit}"
+        n /= 1024
+
+def per_session_bytes(make_session_state, n_sessions):
+    """세션 상태 n개를 만들어 유지할 때 세션당 늘어나는 할당량"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    sessions = [make_session_state() for _ in range(n_sessions)]
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    del sessions
+    return total / n_sessions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="추천 시스템 메모리 보고서")
+    parser.add_argument('--sessions', type=int, default=300, help="흉내 낼 동시 세션 수")
+    parser.add_argument('--wait-for-model', action='store_true', help="임베딩 모델 준비까지 기다린 뒤 측정")
+    args = parser.parse_args(argv)
+
+    shared = get_shared_recommender()
+    if args.wait_for_model:
+        shared['semantic'].wait()
+    fast_recommend(shared, ['vegan'])  # 지연 초기화되는 항목을 미리 준비
+
+    report = memory_report(shared)
+    print("공유 추천 시스템 (프로세스당 1개)")
+    for name, size in sorted(report.items(), key=lambda x: -x[1]):
+        print(f"  {name:<34}{format_bytes(size):>14}")
+    print(f"  {'합계':<34}{format_bytes(sum(report.values())):>14}")
+
+    def shared_session():
+        # 페이지가 세션마다 하는 일: 공유 객체를 참조해 추천만 계산 (세션 상태에 저장하지 않음)
+        recommender_data = get_shared_recommender()
+        fast_recommend(recommender_data, ['vegan', 'organic'])
+        return {}
+
+    def legacy_session():
+        # 예전 방식: 세션마다 초기화 결과 dict를 session_state에 보관
+        return {'recommender_data': initialize_recommender_system(wait_for_model=False)}
+
+    shared_bytes = per_session_bytes(shared_session, args.sessions)
+    legacy_bytes = per_session_bytes(legacy_session, min(args.sessions, 50))
+    print(f"\n세션당 추가 메모리 (세션 {args.sessions}개 기준)")
+    print(f"  {'공유 객체 (get_shared_recommender)':<34}{format_bytes(shared_bytes):>14}")
+    print(f"  {'세션별 복사 (이전 방식)':<34}{format_bytes(legacy_bytes):>14}")
+
+if __name__ == '__main__':
+    main()
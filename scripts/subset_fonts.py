@@ -0,0 +1,175 @@
+"""화면에 쓰이는 글자만 남긴 WOFF2 폰트를 만들고 .streamlit/config.toml의 fontFaces를 갱신합니다.
+
+사용법 (프로젝트 루트에서 실행, fontTools·brotli 필요):
+    python -m scripts.subset_fonts           # 서브셋 생성 + config.toml 갱신
+    python -m scripts.subset_fonts --check   # 소스·데이터의 글자가 모두 서브셋에 있는지 검사 (없으면 종료 코드 1)
+
+서브셋 글자 = 기본 집합(ASCII, Latin-1, 문장 부호, 호환 자모, KS X 1001 한글 2,350자)
+            + 앱 소스(.py)·설정(.json)·데이터(.xlsx)에 나오는 모든 글자
+원본 TTF는 서브셋에 없는 글자를 위한 대체 폰트로 함께 등록되며, 브라우저는 unicodeRange를 보고
+화면에 그 글자가 있을 때만 원본을 내려받습니다.
+"""
+import argparse
+import re
+import sys
+from pathlib import Path
+
+from openpyxl import load_workbook
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+FONT_DIR = BASE_DIR / "static" / "fonts"
+SOURCE_FONT = FONT_DIR / "JalnanGothicTTF.ttf"
+SUBSET_FONT = FONT_DIR / "JalnanGothic-subset.woff2"
+CONFIG_PATH = BASE_DIR / ".streamlit" / "config.toml"
+FONT_FAMILY = "JalnanGothic"
+STATIC_URL = "app/static/fonts/"  # server.enableStaticServing으로 제공되는 경로
+
+BEGIN_MARKER = "# BEGIN fontFaces (scripts/subset_fonts.py가 생성, 직접 수정하지 마세요)"
+END_MARKER = "# END fontFaces"
+
+TEXT_SOURCES = ("K-Beauty-Direct.py", "pages/*.py", "modules/*.py", "data/*.json")
+DATA_SOURCES = ("data/*.xlsx",)
+
+BASE_RANGES = (
+    (0x0020, 0x007E),  # ASCII
+    (0x00A0, 0x00FF),  # Latin-1 보충
+    (0x2010, 0x2027),  # 대시·따옴표·말줄임표
+    (0x2030, 0x203B),  # ‰ ′ ″ ※
+    (0x20A9, 0x20A9),  # ₩
+    (0x2190, 0x2199),  # 화살표
+    (0x3000, 0x3011),  # CJK 문장 부호·괄호
+    (0x3131, 0x318E),  # 한글 호환 자모 (입력 중인 글자)
+    (0xFF01, 0xFF5E),  # 전각 ASCII
+)
+
+def ksx1001_hangul():
+    """KS X 1001(EUC-KR) 완성형 한글 2,350자"""
+    chars = set()
+    for lead in range(0xB0, 0xC9):
+        for trail in range(0xA1, 0xFF):
+            try:
+                chars.add(bytes((lead, trail)).decode('euc-kr'))
+            except UnicodeDecodeError:
+                pass
+    return chars
+
+def base_codepoints():
+    codepoints = {cp for start, end in BASE_RANGES for cp in range(start, end + 1)}
+    codepoints.update(ord(ch) for ch in ksx1001_hangul())
+    return codepoints
+
+def used_codepoints(base_dir=BASE_DIR):
+    """앱 소스·설정·데이터 파일에 나오는 모든 글자의 코드 포인트"""
+    text = []
+    for pattern in TEXT_SOURCES:
+        for path in sorted(base_dir.glob(pattern)):
+            text.append(path.read_text(encoding='utf-8'))
+    for pattern in DATA_SOURCES:
+        for path in sorted(base_dir.glob(pattern)):
+            wb = load_workbook(path, read_only=True, data_only=True)
+            try:
+                for ws in wb.worksheets:
+                    text.append(ws.title)
+                    for row in ws.iter_rows(values_only=True):
+                        text.extend(value for value in row if isinstance(value, str))
+            finally:
+                wb.close()
+    return {ord(ch) for ch in ''.join(text) if ord(ch) >= 0x20}
+
+def unicode_ranges(codepoints):
+    """코드 포인트 집합 → CSS unicode-range 문자열 (연속 구간 병합)"""
+    ranges = []
+    for cp in sorted(codepoints):
+        if ranges and cp == ranges[-1][1] + 1:
+            ranges[-1][1] = cp
+        else:
+            ranges.append([cp, cp])
+    return ", ".join(f"U+{start:X}" if start == end else f"U+{start:X}-{end:X}" for start, end in ranges)
+
+def build_subset(source=SOURCE_FONT, target=SUBSET_FONT):
+    """서브셋 WOFF2를 만들고 실제로 들어간 코드 포인트 집합을 반환합니다."""
+    from fontTools import subset
+    from fontTools.ttLib import TTFont
+
+    font = TTFont(source)
+    available = set(font.getBestCmap())
+    codepoints = sorted((base_codepoints() | used_codepoints()) & available)
+
+    options = subset.Options()
+    options.flavor = 'woff2'
+    options.layout_features = ['*']
+    options.name_IDs = ['*']
+    options.notdef_outline = True
+    options.hinting = False  # 힌팅 명령은 브라우저 렌더링에 거의 쓰이지 않음
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    font.save(target)
+    return set(codepoints)
+
+def font_faces_block(codepoints):
+    """config.toml에 넣을 [[theme.fontFaces]] 블록
+
+    같은 family의 @font-face는 나중에 선언된 것이 먼저 검사되므로, 원본(대체)을 먼저, 서브셋을 나중에 둡니다.
+    """
+    return "\n".join([
+        BEGIN_MARKER,
+        "[[theme.fontFaces]]",
+        f'family = "{FONT_FAMILY}"',
+        f'url = "{STATIC_URL}{SOURCE_FONT.name}"',
+        'weight = 400',
+        "",
+        "[[theme.fontFaces]]",
+        f'family = "{FONT_FAMILY}"',
+        f'url = "{STATIC_URL}{SUBSET_FONT.name}"',
+        'weight = 400',
+        f'unicodeRange = "{unicode_ranges(codepoints)}"',
+        END_MARKER,
+    ])
+
+def update_config(block, path=CONFIG_PATH):
+    """config.toml의 생성 블록을 바꿉니다. (블록이 없으면 파일 끝에 추가)"""
+    text = path.read_text(encoding='utf-8') if path.exists() else ""
+    pattern = re.compile(re.escape(BEGIN_MARKER) + r".*?" + re.escape(END_MARKER), re.S)
+    if pattern.search(text):
+        text = pattern.sub(lambda _: block, text)
+    else:
+        text = text.rstrip("\n") + ("\n\n" if text else "") + block
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text.rstrip("\n") + "\n", encoding='utf-8')
+
+def check():
+    """소스·데이터에 나오는 (원본 폰트에 있는) 글자가 모두 서브셋에 들어 있는지"""
+    from fontTools.ttLib import TTFont
+
+    if not SUBSET_FONT.exists():
+        print(f"실패: {SUBSET_FONT.relative_to(BASE_DIR)}가 없습니다. python -m scripts.subset_fonts를 실행하세요.")
+        return 1
+    available = set(TTFont(SOURCE_FONT).getBestCmap())
+    subset_cmap = set(TTFont(SUBSET_FONT).getBestCmap())
+    missing = sorted((used_codepoints() & available) - subset_cmap)
+    print(f"서브셋 {len(subset_cmap)}자, {SUBSET_FONT.stat().st_size / 1024:.0f}KB "
+          f"(원본 {SOURCE_FONT.stat().st_size / 1024:.0f}KB)")
+    if missing:
+        print(f"실패: 서브셋에 없는 글자 {len(missing)}개: {''.join(map(chr, missing[:50]))}")
+        return 1
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="UI용 WOFF2 폰트 서브셋 생성")
+    parser.add_argument('--check', action='store_true', help="서브셋이 최신인지 검사만 실행")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        return check()
+
+    codepoints = build_subset()
+    update_config(font_faces_block(codepoints))
+    print(f"{SUBSET_FONT.relative_to(BASE_DIR)}: {len(codepoints)}자, "
+          f"{SUBSET_FONT.stat().st_size / 1024:.0f}KB (원본 {SOURCE_FONT.stat().st_size / 1024:.0f}KB)")
+    print(f"{CONFIG_PATH.relative_to(BASE_DIR)} fontFaces 갱신")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())